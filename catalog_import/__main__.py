@@ -1,6 +1,24 @@
-from data import providers
-from models import main as main_model
-from threading import Thread
+import os
+import sys
+
+if not __package__:
+    # Run as `python catalog_import/__main__.py`, the package is imported from the parent directory
+    sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from catalog_import.data import providers
+from catalog_import.models import main as main_model
+from catalog_import.models.blob_store import create_blob_store
+from catalog_import.models.bulk_loader import ImportVerification
+from catalog_import.models.import_planner import ImportPlanner
+from catalog_import.models.item_layout import LayoutMigration
+from catalog_import.models.load_test import LoadTest
+from catalog_import.models.runner import get_capacity_controller, get_catalog_reader, get_components, get_dynamodb, get_profiler, get_settings, run_providers
+from catalog_import.models.search_index import SearchIndex
+from catalog_import.models.stale_sweep import StaleSweep
+from catalog_import.models.xml_offset_index import XmlOffsetIndex
+import argparse
+import json
+import sqlite3
 
 
 def main(**kwargs):
@@ -19,27 +37,265 @@ def main(**kwargs):
     main = main_model.Main(**kwargs)
     main.execute()
 
+def replay(**kwargs):
+    """
+    Entry point for the replay of the quarantined products and requests of a provider.
+
+    Arguments:
+        **kwargs: Keyword arguments to be passed to the `Main` instance.
+
+    Returns:
+        None
+    """
+    main = main_model.Main(**kwargs)
+    main.replay()
+
+def search(arguments, index_settings):
+    """
+    Prints the products of the local search index matching the search arguments, one JSON object per line, or exits
+    with a usage error if the query is not a valid search, like an operator without terms.
+
+    Arguments:
+        arguments {object} -- The parsed arguments.
+        index_settings {dict} -- The settings of the search index.
+
+    Returns:
+        None
+    """
+    search_index = SearchIndex(filepath=index_settings.get("filepath"))
+    attribute = tuple(arguments.attribute.split("=", 1)) if arguments.attribute else None
+    try:
+        documents = search_index.search(
+            text=arguments.query,
+            category=arguments.category,
+            providers=arguments.providers,
+            attribute=attribute,
+            limit=arguments.limit,
+        )
+    except sqlite3.OperationalError as error:
+        raise SystemExit("python -m catalog_import: error: argument --query: %s" % error)
+    finally:
+        search_index.close()
+    for document in documents:
+        print(json.dumps(document, ensure_ascii=False))
+
+def index(arguments, providers_dict):
+    """
+    Builds the offset index of the XML file of each file provider and prints its records split in ranges, one JSON
+    object per provider, to set as the `xml_range` of provider entries reading the file in parallel.
+
+    Arguments:
+        arguments {object} -- The parsed arguments.
+        providers_dict {dict} -- The providers to index, by provider name.
+
+    Returns:
+        None
+    """
+    for provider_name, provider_values in providers_dict.items():
+        if provider_values.get("connection_type") != "file" or not str(provider_values.get("filepath")).endswith(".xml"):
+            continue
+        offset_index = XmlOffsetIndex(
+            filepath=provider_values.get("filepath"),
+            index_filepath=provider_values.get("xml_index_filepath"),
+            item_name=provider_values.get("xml_item_name") or "Product",
+        ).open()
+        print(json.dumps({"provider": provider_name, "records": len(offset_index), "ranges": offset_index.split(arguments.parts)}))
+        offset_index.close()
+
+def plan(arguments, providers_dict, run_settings):
+    """
+    Estimates the import run of the providers from a sample of their feeds and prints the plan of each provider and the
+    totals of the run, one JSON object per line.
+
+    The table is read for its size and capacity and for the sampled products it already has, unless the `read_table`
+    planner setting is off.
+
+    Arguments:
+        arguments {object} -- The parsed arguments.
+        providers_dict {dict} -- The providers to plan, by provider name.
+        run_settings {dict} -- The settings of the run.
+
+    Returns:
+        None
+    """
+    planner_settings = run_settings["planner"]
+    db_table = None
+    catalog_reader = None
+    if planner_settings.get("read_table"):
+        dynamodb = get_dynamodb(run_settings["dynamodb"])
+        db_table = dynamodb.Table(arguments.table)
+        catalog_reader = get_catalog_reader(dynamodb, db_table, run_settings)
+    import_planner = ImportPlanner(
+        providers_dict=providers_dict,
+        run_settings=run_settings,
+        db_table=db_table,
+        catalog_reader=catalog_reader,
+        sample_size=planner_settings.get("sample_size"),
+        sample_requests=planner_settings.get("sample_requests"),
+        request_concurrency=planner_settings.get("request_concurrency"),
+        request_latency=planner_settings.get("request_latency"),
+        write_concurrency=planner_settings.get("write_concurrency"),
+        write_latency=planner_settings.get("write_latency"),
+        write_capacity=planner_settings.get("write_capacity") or run_settings["capacity_controller"].get("table_capacity"),
+        read_capacity=planner_settings.get("read_capacity"),
+    )
+    report = import_planner.execute()
+    for provider_plan in report["providers"]:
+        print(json.dumps(provider_plan))
+    print(json.dumps({"totals": report["totals"]}))
+
+def load_test(arguments, run_settings):
+    """
+    Runs the API import path against the local stand-in of the Etilize API and prints the report as a JSON object.
+
+    The products are bulk loaded to local import files unless the `bulk` load test setting is off, in which case
+    they are written to the table.
+
+    Arguments:
+        arguments {object} -- The parsed arguments.
+        run_settings {dict} -- The settings of the run.
+
+    Returns:
+        None
+    """
+    test_settings = run_settings["load_test"]
+    if test_settings.get("bulk"):
+        run_settings["bulk_load"]["enabled"] = True
+        dynamodb = None
+        db_table = None
+    else:
+        dynamodb = get_dynamodb(run_settings["dynamodb"])
+        db_table = dynamodb.Table(arguments.table)
+    breaker_settings = run_settings["circuit_breaker"]
+    load_test_run = LoadTest(
+        provider_values=providers.providers["Etilize"],
+        components=get_components(dynamodb, db_table, run_settings),
+        breaker_settings=breaker_settings if breaker_settings.get("enabled") else None,
+        server_settings=test_settings.get("server"),
+        products=test_settings.get("products"),
+        providers=test_settings.get("providers"),
+        profiler=get_profiler(run_settings["profiling"]),
+    )
+    print(json.dumps(load_test_run.execute()))
+
+def parse_arguments():
+    """
+    Parses the command line arguments.
+
+    Returns:
+        {object} -- The parsed arguments.
+    """
+    parser = argparse.ArgumentParser(prog="python -m catalog_import", description="Catalog Provider Importation")
+    parser.add_argument("command", nargs="?", default="run", choices=["run", "replay", "search", "migrate", "bulk", "verify", "index", "sweep", "plan", "loadtest"],
+                        help="run imports the providers, replay reprocesses their quarantined products, search queries "
+                             "the local search index, migrate converts the stored products to the map layout, bulk "
+                             "writes the products to DynamoDB import files, verify compares an imported table with the "
+                             "manifest of its import files, index builds the offset index of the XML files, sweep flags "
+                             "or deletes the products the providers stopped sending, plan estimates the capacity and "
+                             "time of a run from a sample of the feeds, loadtest runs the API import path against a "
+                             "local stand-in of the Etilize API")
+    parser.add_argument("--providers", nargs="+", help="The providers to process, every provider if not given")
+    parser.add_argument("--settings", type=json.loads, default={},
+                        help="A JSON object overriding the run settings, like '{\"bloom_filter\": {\"enabled\": true}}'")
+    parser.add_argument("--table", default="product_catalog", help="The products db table")
+    parser.add_argument("--query", help="The full-text query of the search command, like 'laptop AND 16GB'")
+    parser.add_argument("--category", help="The category name filter of the search command")
+    parser.add_argument("--attribute", metavar="LABEL=VALUE", help="The attribute filter of the search command")
+    parser.add_argument("--limit", type=int, default=20, help="The maximum number of products of the search command")
+    parser.add_argument("--dry-run", action="store_true",
+                        help="Only count the products the migrate command converts or the sweep command sweeps")
+    parser.add_argument("--run-id", help="The ID of a complete run of the providers for the sweep command, as printed "
+                                         "at the end of the run")
+    parser.add_argument("--action", choices=["flag", "delete"],
+                        help="What the sweep command does with the stale products of no other provider")
+    parser.add_argument("--manifest", help="The key of the bulk load manifest for the verify command, like "
+                                           "'<run_id>/manifest.json'")
+    parser.add_argument("--parts", type=int, default=4, help="The number of record ranges of the index command")
+    parser.add_argument("--profile", metavar="DIRECTORY",
+                        help="Profile the run and write the cProfile, flamegraph and allocation reports to the directory")
+    return parser.parse_args()
+
 if __name__ == "__main__":
     """
     Main entry point of the program.
 
-    The code block initializes multiple threads to execute the `main` function concurrently for each provider in the
-    `providers_dict`. It creates a separate thread for each provider and starts its execution. After starting all the
-    threads, the code block waits for each thread to complete by calling the `join` method.
+    The code block initializes multiple threads to execute the `main` function, or the `replay` function for the replay
+    command, concurrently for each provider in the `providers_dict`. It creates a separate thread for each provider and
+    starts its execution, then waits for each thread to complete. The search command only queries the local search
+    index, and the migrate command converts the stored products to the map layout. The bulk command runs the providers
+    with the bulk load enabled, and the verify command compares an imported table with the manifest of the bulk load.
+    The index command builds the offset index of the XML files of the providers, and the sweep command flags or deletes
+    the products the providers stopped sending. The plan command estimates the capacity and time of a run of the
+    providers, and the loadtest command measures the API import path against a local stand-in of the provider API.
 
     Returns:
         None
     """
-    threads = []
-    providers_dict = providers.providers
-    for provider_name, provider_values in providers_dict.items():
-        provider = {
-            "provider_name": provider_name,
-            "provider_values": provider_values,
+    arguments = parse_arguments()
+    if arguments.profile:
+        arguments.settings.setdefault("profiling", {}).update({"enabled": True, "directory": arguments.profile})
+    if arguments.command == "bulk":
+        arguments.settings.setdefault("bulk_load", {})["enabled"] = True
+    if arguments.command == "loadtest":
+        arguments.settings.setdefault("quarantine", {}).setdefault("enabled", False)
+    run_settings = get_settings({"settings": arguments.settings})
+    if arguments.command == "search":
+        search(arguments, run_settings["search_index"])
+    elif arguments.command == "migrate":
+        db_table = get_dynamodb(run_settings["dynamodb"]).Table(arguments.table)
+        layout_migration = LayoutMigration(
+            db_table=db_table,
+            segments=run_settings["item_layout"].get("migration_segments"),
+            dry_run=arguments.dry_run,
+            capacity_controller=get_capacity_controller(db_table, run_settings["capacity_controller"]),
+        )
+        layout_migration.execute()
+    elif arguments.command == "verify":
+        import_verification = ImportVerification(
+            db_table=get_dynamodb(run_settings["dynamodb"]).Table(arguments.table),
+            blob_store=create_blob_store(run_settings["bulk_load"].get("blob_store", {})),
+            manifest_key=arguments.manifest,
+            segments=run_settings["bulk_load"].get("verify_segments"),
+        )
+        import_verification.execute()
+    elif arguments.command == "sweep":
+        if not arguments.providers or not arguments.run_id:
+            raise SystemExit("The sweep command needs --providers and --run-id")
+        db_table = get_dynamodb(run_settings["dynamodb"]).Table(arguments.table)
+        for provider_name in arguments.providers:
+            stale_sweep = StaleSweep(
+                db_table=db_table,
+                provider=providers.providers.get(provider_name, {}).get("name") or provider_name,
+                run_id=arguments.run_id,
+                action=arguments.action or run_settings["stale_sweep"].get("action"),
+                segments=run_settings["stale_sweep"].get("segments"),
+                max_stale_ratio=run_settings["stale_sweep"].get("max_stale_ratio"),
+                dry_run=arguments.dry_run,
+                capacity_controller=get_capacity_controller(db_table, run_settings["capacity_controller"]),
+            )
+            stale_sweep.execute()
+    elif arguments.command == "loadtest":
+        load_test(arguments, run_settings)
+    elif arguments.command == "plan":
+        plan(arguments, {
+            provider_name: provider_values
+            for provider_name, provider_values in providers.providers.items()
+            if not arguments.providers or provider_name in arguments.providers
+        }, run_settings)
+    elif arguments.command == "index":
+        index(arguments, {
+            provider_name: provider_values
+            for provider_name, provider_values in providers.providers.items()
+            if not arguments.providers or provider_name in arguments.providers
+        })
+    else:
+        providers_dict = {
+            provider_name: provider_values
+            for provider_name, provider_values in providers.providers.items()
+            if not arguments.providers or provider_name in arguments.providers
         }
-        x = Thread(target=main, kwargs=provider)
-        threads.append(x)
-        x.start()
-
-    for thread in threads:
-        thread.join()
+        dynamodb = get_dynamodb(run_settings["dynamodb"])
+        db_table = dynamodb.Table(arguments.table)
+        components = get_components(dynamodb, db_table, run_settings)
+        profiler = get_profiler(run_settings["profiling"])
+        run_providers(replay if arguments.command == "replay" else main, providers_dict, components, profiler)
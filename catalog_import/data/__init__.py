@@ -1 +1,2 @@
 from . import providers
+from . import settings
@@ -3,6 +3,19 @@ providers = {
         "name": "Icecat",
         "url": False,
         "filepath": "catalog_import/data/files/IcecatProductsExampleEN.xml",
+        "archive_member": False,
+        "xml_projection": [
+            "Products/Product/SKU",
+            "Products/Product/MPN",
+            "Products/Product/EANS",
+            "Products/Product/Category/CategoryId",
+            "Products/Product/Category/CategoryName",
+            "Products/Product/Description",
+            "Products/Product/Images",
+            "Products/Product/Attributes/Attribute/Name",
+            "Products/Product/Attributes/Attribute/Label",
+            "Products/Product/Attributes/Attribute/Value",
+        ],
         "connection_type": "file",
         "response_type": "file",
         "products_list": False,
@@ -14,6 +27,19 @@ providers = {
         "name": "IcecatES",
         "url": False,
         "filepath": "catalog_import/data/files/IcecatProductsExampleES.xml",
+        "archive_member": False,
+        "xml_projection": [
+            "Products/Product/SKU",
+            "Products/Product/MPN",
+            "Products/Product/EANS",
+            "Products/Product/Category/CategoryId",
+            "Products/Product/Category/CategoryName",
+            "Products/Product/Description",
+            "Products/Product/Images",
+            "Products/Product/Attributes/Attribute/Name",
+            "Products/Product/Attributes/Attribute/Label",
+            "Products/Product/Attributes/Attribute/Value",
+        ],
         "connection_type": "file",
         "response_type": "file",
         "products_list": False,
@@ -27,6 +53,15 @@ providers = {
         "filepath": False,
         "connection_type": "api",
         "response_type": "xml",
+        "connect_timeout": 3.05,
+        "read_timeout": 10,
+        "xml_projection": [
+            "ErrorResponse",
+            "Product/skus",
+            "Product/descriptions",
+            "Product/category",
+            "Product/datasheet",
+        ],
         "products_list": "catalog_import/data/files/EtilizeProductsMPNList.json",
         "locations": [
             {"location_tag": "en_US", "location_label": "English"},
@@ -0,0 +1,158 @@
+settings = {
+    "dynamodb": {
+        "region_name": False,
+        "endpoint_url": False,
+        "max_pool_connections": 50,
+        "tcp_keepalive": True,
+        "retry_mode": "standard",
+        "max_attempts": 3,
+        "connect_timeout": 5,
+        "read_timeout": 30,
+    },
+    "bloom_filter": {
+        "enabled": False,
+        "filepath": "/tmp/product_catalog_mpn.bloom",
+        "max_age": 3600,
+        "segments": 4,
+        "error_rate": 0.001,
+        "headroom": 100000,
+    },
+    "item_layout": {
+        "maps": False,
+        "migration_segments": 4,
+    },
+    "stale_sweep": {
+        "enabled": False,
+        "action": "flag",
+        "segments": 4,
+        "max_stale_ratio": 0.5,
+    },
+    "attribute_dictionary": {
+        "enabled": False,
+        "table_name": "product_catalog_attributes",
+    },
+    "category_taxonomy": {
+        "enabled": False,
+        "table_name": "product_catalog_categories",
+    },
+    "description_storage": {
+        "enabled": False,
+        "compress_threshold": 4096,
+        "offload_threshold": 131072,
+        "blob_store": {
+            "type": "local",
+            "directory": "/tmp/product_catalog_blobs",
+            "bucket": False,
+            "prefix": "product_catalog/",
+            "endpoint_url": False,
+        },
+    },
+    "capacity_controller": {
+        "enabled": False,
+        "table_capacity": False,
+        "min_rate": 1,
+        "increase_rate": 1,
+        "decrease_factor": 0.5,
+        "max_retries": 8,
+        "shares": {},
+    },
+    "circuit_breaker": {
+        "enabled": False,
+        "window": 20,
+        "min_calls": 10,
+        "error_rate": 0.5,
+        "slow_call_duration": 5,
+        "slow_rate": 0.8,
+        "consecutive_timeouts": 3,
+        "open_seconds": 5,
+        "half_open_probes": 1,
+        "max_opens": 3,
+    },
+    "quarantine": {
+        "enabled": False,
+        "type": "local",
+        "filepath": "/tmp/product_catalog_quarantine.ndjson",
+        "queue_url": False,
+        "endpoint_url": False,
+    },
+    "change_feed": {
+        "enabled": False,
+        "type": "local",
+        "filepath": "/tmp/product_catalog_changes.ndjson",
+        "queue_url": False,
+        "endpoint_url": False,
+        "batch_size": 100,
+        "flush_interval": 1,
+        "max_pending": 10000,
+        "max_retries": 3,
+        "backoff": 0.5,
+    },
+    "search_index": {
+        "enabled": False,
+        "filepath": "/tmp/product_catalog_search.sqlite",
+        "commit_every": 500,
+    },
+    "gallery_checker": {
+        "enabled": False,
+        "workers": 16,
+        "timeout": 10,
+        "max_pending": 10000,
+        "cache_filepath": "/tmp/product_catalog_gallery.json",
+        "max_age": 86400,
+    },
+    "bulk_load": {
+        "enabled": False,
+        "staging_directory": "/tmp/product_catalog_bulk",
+        "partitions": 64,
+        "max_file_size": 104857600,
+        "samples": 100,
+        "verify_segments": 4,
+        "blob_store": {
+            "type": "local",
+            "directory": "/tmp/product_catalog_import",
+            "bucket": False,
+            "prefix": "product_catalog_import/",
+            "endpoint_url": False,
+        },
+    },
+    "catalog_reader": {
+        "cache_enabled": True,
+        "cache_entries": 10000,
+        "cache_ttl": 60,
+        "max_retries": 5,
+    },
+    "planner": {
+        "sample_size": 200,
+        "sample_requests": 5,
+        "read_table": True,
+        "request_concurrency": 1,
+        "request_latency": 0.5,
+        "write_concurrency": 1,
+        "write_latency": 0.01,
+        "write_capacity": False,
+        "read_capacity": False,
+    },
+    "load_test": {
+        "products": 500,
+        "providers": 1,
+        "bulk": True,
+        "server": {
+            "latency": 0.05,
+            "latency_jitter": 0.02,
+            "error_rate": 0,
+            "throttle_rate": False,
+            "attributes": 40,
+            "description_size": 1000,
+            "compress": True,
+            "seed": 0,
+        },
+    },
+    "profiling": {
+        "enabled": False,
+        "directory": "/tmp/product_catalog_profile",
+        "interval": 0.005,
+        "snapshot_interval": 1,
+        "top": 25,
+        "frames": 25,
+    },
+}
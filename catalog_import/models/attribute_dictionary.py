@@ -0,0 +1,202 @@
+import hashlib
+from functools import lru_cache
+from threading import Lock
+
+
+@lru_cache(maxsize=65536)
+def label_from_name(name):
+    """
+    Get the label of an attribute name, computed once per distinct name
+
+    Arguments:
+        name {str} -- The attribute name, like "Display resolution"
+
+    Returns:
+        {str} -- The attribute label, like "display_resolution"
+
+    """
+    return name.lower().replace(" ", "_")
+
+
+class AttributeDictionary:
+    """
+    A class used to represent the shared dictionary of product attributes
+    ...
+
+    Every distinct attribute label gets a short stable ID, and the names of the attribute are stored once per provider
+    and locale in the attributes table, so products only store a map of attribute IDs to values. The dictionary is
+    loaded in memory at run start and shared by every provider thread.
+
+    Attributes:
+        db_table {object} -- The attributes db table, with the AttributeID hash key and the Variant range key
+        attributes {dict} -- The cached attributes by ID, with their label and names by variant
+
+    Methods:
+        attribute_id(label) -- Get the stable ID of an attribute label
+        variant(metadata) -- Get the provider and locale variant of a metadata dict
+        load() -- Load every attribute of the table in the cache
+        register(name, label, metadata) -- Get the ID of an attribute, storing it if it is new
+        compact(attributes, metadata) -- Convert a list of attributes to a map of attribute IDs to values
+        resolve(attribute_id, variant) -- Get the name and label of an attribute ID
+        expand(product, variant) -- Get the product with its attribute map converted back to a list of attributes
+
+    """
+    def __init__(self, **kwargs) -> None:
+        """
+        Parameters:
+            db_table {object} -- The attributes db table
+
+        """
+        self.db_table = kwargs.get("db_table")
+        self.attributes = {}
+        self.lock = Lock()
+
+    @staticmethod
+    def attribute_id(label):
+        """
+        Get the stable ID of an attribute label, so every thread and run agrees on it without coordination
+
+        Arguments:
+            label {str} -- The attribute label
+
+        Returns:
+            {str} -- The attribute ID
+
+        """
+        return hashlib.blake2b(label.encode("utf-8"), digest_size=6).hexdigest()
+
+    @staticmethod
+    def variant(metadata):
+        """
+        Get the provider and locale variant of a metadata dict, like "Icecat#en_US"
+
+        Arguments:
+            metadata {dict} -- The metadata of the provider
+
+        Returns:
+            {str} -- The variant
+
+        """
+        return "%s#%s" % (metadata.get("name"), ",".join(metadata.get("i18n") or {}))
+
+    def load(self):
+        """
+        Load every attribute of the table in the cache
+
+        Returns:
+            {object} -- The dictionary itself
+
+        """
+        scan_kwargs = {}
+        while True:
+            response = self.db_table.scan(**scan_kwargs)
+            with self.lock:
+                for item in response.get("Items", []):
+                    attribute = self.attributes.setdefault(item.get("AttributeID"), {"Label": item.get("Label"), "Names": {}})
+                    attribute["Names"][item.get("Variant")] = item.get("Name")
+            if not response.get("LastEvaluatedKey"):
+                return self
+            scan_kwargs["ExclusiveStartKey"] = response.get("LastEvaluatedKey")
+
+    def register(self, name, label, metadata):
+        """
+        Get the ID of an attribute, storing its name for the provider and locale if it is new
+
+        Arguments:
+            name {str} -- The attribute name
+            label {str} -- The attribute label
+            metadata {dict} -- The metadata of the provider
+
+        Returns:
+            attribute_id {str} -- The attribute ID
+
+        """
+        attribute_id = self.attribute_id(label)
+        variant = self.variant(metadata)
+        with self.lock:
+            attribute = self.attributes.setdefault(attribute_id, {"Label": label, "Names": {}})
+            if attribute["Label"] != label:
+                raise ValueError("The attribute labels %s and %s have the same ID" % (attribute["Label"], label))
+            if attribute["Names"].get(variant) == name:
+                return attribute_id
+        # The name is known only once it is stored, so a failed put is retried by the next product
+        self.db_table.put_item(
+            Item={
+                "AttributeID": attribute_id,
+                "Variant": variant,
+                "Label": label,
+                "Name": name,
+            }
+        )
+        with self.lock:
+            attribute["Names"][variant] = name
+        return attribute_id
+
+    def compact(self, attributes, metadata):
+        """
+        Convert a list of attributes to a map of attribute IDs to values
+
+        Arguments:
+            attributes {list} -- The attributes, with Name, Label and Values
+            metadata {dict} -- The metadata of the provider
+
+        Returns:
+            attribute_values {dict} -- The values of the attributes by attribute ID
+
+        """
+        attribute_values = {}
+        for attribute in attributes:
+            attribute_id = self.register(attribute.get("Name"), attribute.get("Label"), metadata)
+            attribute_values.setdefault(attribute_id, []).extend(attribute.get("Values"))
+        return attribute_values
+
+    def resolve(self, attribute_id, variant=None):
+        """
+        Get the name and label of an attribute ID, reading the table if it is not cached
+
+        Arguments:
+            attribute_id {str} -- The attribute ID
+            variant {str} -- The preferred provider and locale of the name, any name is used if it is missing
+
+        Returns:
+            {tuple} -- The name and label of the attribute, or None if the ID is unknown
+
+        """
+        attribute = self.attributes.get(attribute_id)
+        if attribute is None:
+            response = self.db_table.query(
+                KeyConditionExpression="AttributeID = :attribute_id",
+                ExpressionAttributeValues={":attribute_id": attribute_id},
+            )
+            if not response.get("Items"):
+                return None
+            with self.lock:
+                attribute = self.attributes.setdefault(attribute_id, {"Label": response["Items"][0].get("Label"), "Names": {}})
+                for item in response.get("Items"):
+                    attribute["Names"][item.get("Variant")] = item.get("Name")
+        names = attribute["Names"]
+        name = names.get(variant) or next(iter(names.values()), attribute["Label"])
+        return name, attribute["Label"]
+
+    def expand(self, product, variant=None):
+        """
+        Get the product with its map of attribute IDs converted back to the list of attributes layout
+
+        Arguments:
+            product {dict} -- The product item
+            variant {str} -- The preferred provider and locale of the attribute names
+
+        Returns:
+            expanded {dict} -- A copy of the product with the Attributes list
+
+        """
+        expanded = dict(product)
+        attributes = list(expanded.pop("AttributeValues", {}).items())
+        expanded["Attributes"] = list(expanded.get("Attributes") or [])
+        for attribute_id, values in attributes:
+            resolved = self.resolve(attribute_id, variant)
+            if resolved is None:
+                continue
+            name, label = resolved
+            expanded["Attributes"].append({"Name": name, "Label": label, "Values": values})
+        return expanded
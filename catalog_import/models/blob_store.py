@@ -0,0 +1,202 @@
+import os
+import tempfile
+import boto3
+
+
+class LocalBlobStore:
+    """
+    A class used to represent a blob store on the local filesystem, a stand-in for the S3 blob store
+    ...
+
+    Attributes:
+        directory {string} -- The directory of the blobs
+
+    Methods:
+        filepath(key) -- Get the filepath of a blob
+        exists(key) -- Check if a blob exists
+        put(key, data) -- Store a blob
+        get(key) -- Read a blob
+
+    """
+    def __init__(self, **kwargs) -> None:
+        """
+        Parameters:
+            directory {string} -- The directory of the blobs
+
+        """
+        self.directory = kwargs.get("directory") or "/tmp/product_catalog_blobs"
+
+    def filepath(self, key):
+        """
+        Get the filepath of a blob
+
+        Arguments:
+            key {string} -- The key of the blob
+
+        Returns:
+            {string} -- The filepath of the blob
+
+        """
+        return os.path.join(self.directory, *key.split("/"))
+
+    def exists(self, key):
+        """
+        Check if a blob exists
+
+        Arguments:
+            key {string} -- The key of the blob
+
+        Returns:
+            {Bool} -- True or False depending if the blob exists
+
+        """
+        return os.path.isfile(self.filepath(key))
+
+    def put(self, key, data):
+        """
+        Store a blob, replacing it atomically through a temporary file of its own, so threads can store the same blob at
+        the same time
+
+        Arguments:
+            key {string} -- The key of the blob
+            data {bytes} -- The content of the blob
+
+        Returns:
+            None
+
+        """
+        filepath = self.filepath(key)
+        os.makedirs(os.path.dirname(filepath), exist_ok=True)
+        descriptor, temporary_filepath = tempfile.mkstemp(dir=os.path.dirname(filepath), suffix=".tmp")
+        try:
+            with os.fdopen(descriptor, "wb") as file:
+                file.write(data)
+            os.replace(temporary_filepath, filepath)
+        except BaseException:
+            if os.path.exists(temporary_filepath):
+                os.remove(temporary_filepath)
+            raise
+
+    def get(self, key):
+        """
+        Read a blob
+
+        Arguments:
+            key {string} -- The key of the blob
+
+        Returns:
+            {bytes} -- The content of the blob
+
+        """
+        with open(self.filepath(key), "rb") as file:
+            return file.read()
+
+
+class S3BlobStore:
+    """
+    A class used to represent a blob store in an S3-compatible bucket
+    ...
+
+    Attributes:
+        bucket {string} -- The bucket of the blobs
+        prefix {string} -- The prefix of the blob keys in the bucket
+        client {object} -- The S3 client
+
+    Methods:
+        object_key(key) -- Get the object key of a blob
+        exists(key) -- Check if a blob exists
+        put(key, data) -- Store a blob
+        get(key) -- Read a blob
+
+    """
+    def __init__(self, **kwargs) -> None:
+        """
+        Parameters:
+            bucket {string} -- The bucket of the blobs
+            prefix {string} -- The prefix of the blob keys in the bucket
+            client {object} -- The S3 client, created from the default session if not given
+            endpoint_url {string} -- The endpoint of an S3-compatible service, if the client is not given
+
+        """
+        self.bucket = kwargs.get("bucket")
+        self.prefix = kwargs.get("prefix") or ""
+        self.client = kwargs.get("client") or boto3.client("s3", endpoint_url=kwargs.get("endpoint_url") or None)
+
+    def object_key(self, key):
+        """
+        Get the object key of a blob
+
+        Arguments:
+            key {string} -- The key of the blob
+
+        Returns:
+            {string} -- The object key in the bucket
+
+        """
+        return self.prefix + key
+
+    def exists(self, key):
+        """
+        Check if a blob exists
+
+        Arguments:
+            key {string} -- The key of the blob
+
+        Returns:
+            {Bool} -- True or False depending if the blob exists
+
+        """
+        try:
+            self.client.head_object(Bucket=self.bucket, Key=self.object_key(key))
+            return True
+        except self.client.exceptions.ClientError as error:
+            if error.response.get("Error", {}).get("Code") in ("404", "NoSuchKey", "NotFound"):
+                return False
+            raise
+
+    def put(self, key, data):
+        """
+        Store a blob
+
+        Arguments:
+            key {string} -- The key of the blob
+            data {bytes} -- The content of the blob
+
+        Returns:
+            None
+
+        """
+        self.client.put_object(Bucket=self.bucket, Key=self.object_key(key), Body=data)
+
+    def get(self, key):
+        """
+        Read a blob
+
+        Arguments:
+            key {string} -- The key of the blob
+
+        Returns:
+            {bytes} -- The content of the blob
+
+        """
+        return self.client.get_object(Bucket=self.bucket, Key=self.object_key(key))["Body"].read()
+
+
+def create_blob_store(blob_settings):
+    """
+    Create the blob store described by the settings
+
+    Arguments:
+        blob_settings {dict} -- The settings of the blob store, with a "type" of "s3" or "local"
+
+    Returns:
+        {object} -- The blob store
+
+    """
+    if blob_settings.get("type") == "s3":
+        return S3BlobStore(
+            bucket=blob_settings.get("bucket"),
+            prefix=blob_settings.get("prefix"),
+            endpoint_url=blob_settings.get("endpoint_url"),
+        )
+    return LocalBlobStore(directory=blob_settings.get("directory"))
@@ -0,0 +1,284 @@
+import hashlib
+import math
+import os
+import struct
+import time
+from concurrent.futures import ThreadPoolExecutor
+from threading import Lock
+
+
+class BloomFilter:
+    """
+    A class used to represent a compact probabilistic set of product identifiers
+    ...
+
+    A Bloom filter never gives false negatives: if `value in bloom_filter` is False the value was never added. It may
+    give false positives at roughly `error_rate`.
+
+    A filter cached in a file keeps the time it was built, the file modification time, so saving the values added since
+    it was loaded does not make a filter built from an old scan of the table look recent.
+
+    Attributes:
+        capacity {int} -- The number of values the filter was sized for
+        error_rate {float} -- The expected false positive rate at capacity
+        size {int} -- The number of bits in the filter
+        hashes {int} -- The number of bit positions set per value
+        bits {bytearray} -- The bit array of the filter
+        filepath {string} -- The filepath of the cached filter, False if it is not cached
+        built {float} -- The time the filter was built, None if it is not known
+        changed {Bool} -- Whether values were added since the filter was built, loaded or saved
+
+    Methods:
+        positions(value) -- Get the bit positions of a value
+        add(value) -- Add a value to the filter
+        save(filepath) -- Write the filter to a file
+        load(filepath) -- Read a filter from a file
+        close() -- Save the values added to the cached filter
+
+    """
+    HEADER = struct.Struct("<4sQQQd")
+    MAGIC = b"BLM1"
+
+    def __init__(self, **kwargs) -> None:
+        """
+        Parameters:
+            capacity {int} -- The number of values the filter is sized for
+            error_rate {float} -- The expected false positive rate at capacity
+            size {int} -- The number of bits, computed from capacity and error_rate if not given
+            hashes {int} -- The number of hashes, computed from size and capacity if not given
+            bits {bytearray} -- An existing bit array
+            filepath {string} -- The filepath of the cached filter, False if it is not cached
+            built {float} -- The time the filter was built
+
+        """
+        self.capacity = max(int(kwargs.get("capacity", 100000)), 1)
+        self.error_rate = kwargs.get("error_rate", 0.001)
+        self.size = kwargs.get("size") or math.ceil(
+            -self.capacity * math.log(self.error_rate) / (math.log(2) ** 2)
+        )
+        self.hashes = kwargs.get("hashes") or max(1, round(self.size / self.capacity * math.log(2)))
+        self.bits = kwargs.get("bits") or bytearray((self.size + 7) // 8)
+        self.filepath = kwargs.get("filepath", False)
+        self.built = kwargs.get("built")
+        self.changed = False
+        self.lock = Lock()
+
+    def positions(self, value):
+        """
+        Get the bit positions of a value using double hashing over a single digest
+
+        Arguments:
+            value {str} -- The value to hash
+
+        Returns:
+            {list} -- The bit positions of the value
+
+        """
+        digest = hashlib.blake2b(str(value).encode("utf-8"), digest_size=16).digest()
+        first = int.from_bytes(digest[:8], "little")
+        second = int.from_bytes(digest[8:], "little") | 1
+        return [(first + i * second) % self.size for i in range(self.hashes)]
+
+    def add(self, value):
+        """
+        Add a value to the filter
+
+        Arguments:
+            value {str} -- The value to add
+
+        Returns:
+            None
+
+        """
+        positions = self.positions(value)
+        with self.lock:
+            for position in positions:
+                if not self.bits[position >> 3] & (1 << (position & 7)):
+                    self.bits[position >> 3] |= 1 << (position & 7)
+                    self.changed = True
+
+    def __contains__(self, value):
+        """
+        Check if a value may have been added to the filter
+
+        Arguments:
+            value {str} -- The value to check
+
+        Returns:
+            {Bool} -- False if the value was never added, True if it was added or is a false positive
+
+        """
+        return all(self.bits[position >> 3] & (1 << (position & 7)) for position in self.positions(value))
+
+    def save(self, filepath):
+        """
+        Write the filter to a file, replacing it atomically, with the time the filter was built as modification time
+
+        Arguments:
+            filepath {string} -- The filepath of the filter file
+
+        Returns:
+            None
+
+        """
+        temporary_filepath = "%s.%s.tmp" % (filepath, os.getpid())
+        with open(temporary_filepath, "wb") as file:
+            file.write(self.HEADER.pack(self.MAGIC, self.capacity, self.size, self.hashes, self.error_rate))
+            with self.lock:
+                file.write(self.bits)
+                self.changed = False
+        if self.built is not None:
+            os.utime(temporary_filepath, (self.built, self.built))
+        os.replace(temporary_filepath, filepath)
+
+    @classmethod
+    def load(cls, filepath):
+        """
+        Read a filter from a file
+
+        Arguments:
+            filepath {string} -- The filepath of the filter file
+
+        Returns:
+            {object} -- The filter object, or None if the file is not a valid filter
+
+        """
+        with open(filepath, "rb") as file:
+            built = os.fstat(file.fileno()).st_mtime
+            header = file.read(cls.HEADER.size)
+            bits = bytearray(file.read())
+        if len(header) != cls.HEADER.size:
+            return None
+        magic, capacity, size, hashes, error_rate = cls.HEADER.unpack(header)
+        if magic != cls.MAGIC or len(bits) != (size + 7) // 8:
+            return None
+        return cls(
+            capacity=capacity, error_rate=error_rate, size=size, hashes=hashes, bits=bits, filepath=filepath, built=built
+        )
+
+    def close(self):
+        """
+        Save the values added during the run to the cached filter, so the next runs within its maximum age find the
+        products created by this run
+
+        Returns:
+            None
+
+        """
+        if self.filepath and self.changed:
+            self.save(self.filepath)
+
+
+class ExistingProductsFilter:
+    """
+    A class used to represent the snapshot of the MPNs already stored in the products table
+    ...
+
+    The snapshot is built with a parallel keys-only scan of the table and cached in a file, so the products whose MPN is
+    not in the filter can be created without reading the table first. The MPNs of the products created by a run are
+    added to the filter and saved to the file at the end of the run, while its age stays the age of the scan.
+
+    Attributes:
+        db_table {object} -- The product's db table
+        filepath {string} -- The filepath of the cached filter
+        max_age {int} -- The seconds a cached filter is reused before it is rebuilt
+        segments {int} -- The number of parallel scan segments
+        error_rate {float} -- The expected false positive rate of the filter
+        headroom {int} -- The extra capacity reserved for the products created during the run
+
+    Methods:
+        load_cached() -- Load the cached filter if it is recent enough
+        scan_segment(segment, bloom_filter) -- Add the MPNs of a scan segment to the filter
+        build() -- Build the filter with a parallel scan of the table
+        get_filter() -- Get the cached filter or build a new one
+
+    """
+    def __init__(self, **kwargs) -> None:
+        """
+        Parameters:
+            db_table {object} -- The product's db table
+            filepath {string} -- The filepath of the cached filter
+            max_age {int} -- The seconds a cached filter is reused before it is rebuilt
+            segments {int} -- The number of parallel scan segments
+            error_rate {float} -- The expected false positive rate of the filter
+            headroom {int} -- The extra capacity reserved for the products created during the run
+
+        """
+        self.db_table = kwargs.get("db_table")
+        self.filepath = kwargs.get("filepath", False)
+        self.max_age = kwargs.get("max_age", 3600)
+        self.segments = kwargs.get("segments", 4)
+        self.error_rate = kwargs.get("error_rate", 0.001)
+        self.headroom = kwargs.get("headroom", 100000)
+
+    def load_cached(self):
+        """
+        Load the cached filter if it is recent enough
+
+        Returns:
+            {object} -- The cached filter, or None if there is no valid cached filter
+
+        """
+        if not self.filepath or not os.path.isfile(self.filepath):
+            return None
+        if time.time() - os.path.getmtime(self.filepath) > self.max_age:
+            return None
+        return BloomFilter.load(self.filepath)
+
+    def scan_segment(self, segment, bloom_filter):
+        """
+        Add the MPNs of a scan segment to the filter
+
+        Arguments:
+            segment {int} -- The scan segment number
+            bloom_filter {object} -- The filter to fill
+
+        Returns:
+            count {int} -- The number of MPNs added
+
+        """
+        count = 0
+        scan_kwargs = {
+            "ProjectionExpression": "MPN",
+            "Segment": segment,
+            "TotalSegments": self.segments,
+        }
+        while True:
+            response = self.db_table.scan(**scan_kwargs)
+            for item in response.get("Items", []):
+                bloom_filter.add(item.get("MPN"))
+                count += 1
+            if not response.get("LastEvaluatedKey"):
+                return count
+            scan_kwargs["ExclusiveStartKey"] = response.get("LastEvaluatedKey")
+
+    def build(self):
+        """
+        Build the filter with a parallel scan of the table and cache it
+
+        Returns:
+            bloom_filter {object} -- The filter with every MPN of the table
+
+        """
+        bloom_filter = BloomFilter(
+            capacity=int(self.db_table.item_count or 0) + self.headroom,
+            error_rate=self.error_rate,
+            filepath=self.filepath,
+            built=time.time(),
+        )
+        with ThreadPoolExecutor(max_workers=self.segments) as executor:
+            counts = list(executor.map(lambda segment: self.scan_segment(segment, bloom_filter), range(self.segments)))
+        print("Existing Products Filter Built: ", sum(counts))
+        if self.filepath:
+            bloom_filter.save(self.filepath)
+        return bloom_filter
+
+    def get_filter(self):
+        """
+        Get the cached filter or build a new one
+
+        Returns:
+            {object} -- The filter with every MPN of the table
+
+        """
+        return self.load_cached() or self.build()
@@ -0,0 +1,409 @@
+import base64
+import gzip
+import hashlib
+import json
+import os
+import pickle
+import random
+from concurrent.futures import ThreadPoolExecutor
+from decimal import Decimal
+from threading import Lock
+from boto3.dynamodb.types import Binary, TypeDeserializer, TypeSerializer
+from .item_layout import MAP_FIELDS, to_map
+
+
+SERIALIZER = TypeSerializer()
+DESERIALIZER = TypeDeserializer()
+
+
+def to_dynamodb_value(value):
+    """
+    Get a value with its floats converted to decimals, the number type of DynamoDB
+
+    Arguments:
+        value {object} -- The value
+
+    Returns:
+        {object} -- The value, ready for the DynamoDB serializer
+
+    """
+    if isinstance(value, float):
+        return Decimal(str(value))
+    if isinstance(value, dict):
+        return {key: to_dynamodb_value(entry) for key, entry in value.items()}
+    if isinstance(value, list):
+        return [to_dynamodb_value(entry) for entry in value]
+    return value
+
+
+def encode_binary(value):
+    """
+    Encode the binary values of a serialized item in base64, as the DynamoDB JSON format expects them
+
+    Arguments:
+        value {object} -- A value that is not JSON serializable
+
+    Returns:
+        {str} -- The base64 encoded value
+
+    """
+    if isinstance(value, (bytes, bytearray, Binary)):
+        return base64.b64encode(bytes(value)).decode("ascii")
+    raise TypeError("Object of type %s is not JSON serializable" % type(value).__name__)
+
+
+def to_dynamodb_json(item):
+    """
+    Get an item as a line of a DynamoDB JSON import file
+
+    Arguments:
+        item {dict} -- The product item
+
+    Returns:
+        {str} -- The JSON object with the typed attributes of the item under "Item"
+
+    """
+    typed = {key: SERIALIZER.serialize(to_dynamodb_value(value)) for key, value in item.items()}
+    return json.dumps({"Item": typed}, ensure_ascii=False, separators=(",", ":"), default=encode_binary)
+
+
+def decode_binary(value):
+    """
+    Decode the base64 binary values of a typed value of a DynamoDB JSON file, at any depth
+
+    Arguments:
+        value {dict} -- The typed value, like {"B": "eJw..."} or {"M": {...}}
+
+    Returns:
+        {dict} -- The typed value with its binary values decoded
+
+    """
+    if "B" in value:
+        return {"B": base64.b64decode(value["B"])}
+    if "BS" in value:
+        return {"BS": [base64.b64decode(entry) for entry in value["BS"]]}
+    if "M" in value:
+        return {"M": {key: decode_binary(entry) for key, entry in value["M"].items()}}
+    if "L" in value:
+        return {"L": [decode_binary(entry) for entry in value["L"]]}
+    return value
+
+
+def from_dynamodb_json(typed):
+    """
+    Get an item from its typed attributes, the way the DynamoDB resource reads it
+
+    Arguments:
+        typed {dict} -- The typed attributes of the item
+
+    Returns:
+        {dict} -- The product item
+
+    """
+    return {key: DESERIALIZER.deserialize(decode_binary(value)) for key, value in typed.items()}
+
+
+def merge_items(item, product):
+    """
+    Merge a later record of an MPN into its item, keeping the entries of the item like an update of a stored product:
+    new fields are added, categories, descriptions and attributes of new providers or labels are added, and new
+    attribute values, run stamps, canonical category IDs and EANs are appended
+
+    Arguments:
+        item {dict} -- The item of the MPN, modified in place
+        product {dict} -- The later product record
+
+    Returns:
+        item {dict} -- The merged item
+
+    """
+    for field, value in product.items():
+        if field not in item:
+            item[field] = value
+        elif field in MAP_FIELDS and isinstance(item[field], dict):
+            for key, entry in to_map(field, value).items():
+                item[field].setdefault(key, entry)
+        elif field in MAP_FIELDS:
+            keys = {MAP_FIELDS[field](entry) for entry in item[field]}
+            for entry in value.values() if isinstance(value, dict) else value:
+                if MAP_FIELDS[field](entry) not in keys:
+                    keys.add(MAP_FIELDS[field](entry))
+                    item[field].append(entry)
+        elif field in ("AttributeValues", "Runs"):
+            for key, entry in value.items():
+                item[field].setdefault(key, entry)
+        elif field in ("CategoryIDs", "EAN"):
+            for entry in value:
+                if entry not in item[field]:
+                    item[field].append(entry)
+    return item
+
+
+class BulkLoader:
+    """
+    A class used to represent the bulk load of the products as DynamoDB import files
+    ...
+
+    Instead of a write per product, the records of every provider are staged in local partition files by MPN hash.
+    When the run ends, each partition is read in memory, the records of the same MPN are merged like the updates of
+    the import merge them, and the items are written as gzip DynamoDB JSON files of about the same compressed size to
+    the blob store, under "<prefix><run_id>/data/", the key prefix to give to the table import. A manifest with the
+    counts, the files and a random sample of items is written next to the data, for the verification of the import.
+
+    Attributes:
+        run_id {str} -- The identifier of the run, in the keys of the files
+        blob_store {object} -- The local or S3 blob store of the import files
+        staging_directory {string} -- The directory of the partition files
+        partitions {int} -- The number of partition files
+        max_file_size {int} -- The compressed size of an import file, in bytes
+        samples {int} -- The number of items kept in the manifest for the verification
+        stats {dict} -- The staged records, merged records, items, files and bytes
+
+    Methods:
+        partition(mpn) -- Get the partition of an MPN
+        add(product) -- Stage a product record
+        read_partition(partition) -- Read the merged items of a partition
+        write_file(filepath, index) -- Store an import file
+        close() -- Write the import files and the manifest
+
+    """
+    def __init__(self, **kwargs) -> None:
+        """
+        Parameters:
+            run_id {str} -- The identifier of the run, in the keys of the files
+            blob_store {object} -- The local or S3 blob store of the import files
+            staging_directory {string} -- The directory of the partition files
+            partitions {int} -- The number of partition files
+            max_file_size {int} -- The compressed size of an import file, in bytes
+            samples {int} -- The number of items kept in the manifest for the verification
+
+        """
+        self.run_id = kwargs.get("run_id")
+        self.blob_store = kwargs.get("blob_store")
+        self.staging_directory = os.path.join(kwargs.get("staging_directory") or "/tmp/product_catalog_bulk", self.run_id)
+        self.partitions = kwargs.get("partitions") or 64
+        self.max_file_size = kwargs.get("max_file_size") or 104857600
+        self.samples = kwargs.get("samples") or 100
+        self.stats = {"staged": 0, "merged": 0, "items": 0, "files": 0, "bytes": 0}
+        os.makedirs(self.staging_directory, exist_ok=True)
+        self.files = [
+            open(os.path.join(self.staging_directory, "partition-%05d.pickle" % partition), "wb")
+            for partition in range(self.partitions)
+        ]
+        self.locks = [Lock() for _ in range(self.partitions)]
+        self.lock = Lock()
+
+    def partition(self, mpn):
+        """
+        Get the partition of an MPN, so every record of the MPN is staged in the same file
+
+        Arguments:
+            mpn {str} -- The MPN of the product
+
+        Returns:
+            {int} -- The partition number
+
+        """
+        digest = hashlib.blake2b(str(mpn).encode("utf-8"), digest_size=8).digest()
+        return int.from_bytes(digest, "big") % self.partitions
+
+    def add(self, product):
+        """
+        Stage a product record
+
+        Arguments:
+            product {dict} -- The product values, in the layout of the item
+
+        Returns:
+            None
+
+        """
+        partition = self.partition(product.get("MPN"))
+        data = pickle.dumps(product, protocol=pickle.HIGHEST_PROTOCOL)
+        with self.locks[partition]:
+            self.files[partition].write(data)
+        with self.lock:
+            self.stats["staged"] += 1
+
+    def read_partition(self, partition):
+        """
+        Read the staged records of a partition, merging the records of the same MPN in the order they were staged
+
+        Arguments:
+            partition {int} -- The partition number
+
+        Returns:
+            items {dict} -- The merged items by MPN
+
+        """
+        items = {}
+        with open(os.path.join(self.staging_directory, "partition-%05d.pickle" % partition), "rb") as file:
+            while True:
+                try:
+                    product = pickle.load(file)
+                except EOFError:
+                    return items
+                if product.get("MPN") in items:
+                    merge_items(items[product.get("MPN")], product)
+                    self.stats["merged"] += 1
+                else:
+                    items[product.get("MPN")] = product
+
+    def write_file(self, filepath, index):
+        """
+        Store an import file in the blob store and remove its local copy
+
+        Arguments:
+            filepath {string} -- The filepath of the local import file
+            index {int} -- The number of the import file
+
+        Returns:
+            {dict} -- The key and compressed size of the import file
+
+        """
+        key = "%s/data/part-%05d.json.gz" % (self.run_id, index)
+        with open(filepath, "rb") as file:
+            data = file.read()
+        self.blob_store.put(key, data)
+        os.remove(filepath)
+        self.stats["files"] += 1
+        self.stats["bytes"] += len(data)
+        return {"Key": key, "Size": len(data)}
+
+    def close(self):
+        """
+        Write the import files of the staged records and the manifest, then remove the partition files
+
+        Returns:
+            manifest {dict} -- The run ID, the data key prefix, the counts, the files and the sampled items
+
+        """
+        for file in self.files:
+            file.close()
+        sampler = random.Random(self.run_id)
+        samples = []
+        files = []
+        filepath = os.path.join(self.staging_directory, "part.json.gz.tmp")
+        raw = gzip_file = None
+        for partition in range(self.partitions):
+            for item in self.read_partition(partition).values():
+                if gzip_file is None:
+                    raw = open(filepath, "wb")
+                    gzip_file = gzip.GzipFile(fileobj=raw, mode="wb", compresslevel=6)
+                line = to_dynamodb_json(item)
+                gzip_file.write(line.encode("utf-8") + b"\n")
+                self.stats["items"] += 1
+                # Reservoir sample, so every item has the same chance of being verified
+                if len(samples) < self.samples:
+                    samples.append(line)
+                elif sampler.randrange(self.stats["items"]) < self.samples:
+                    samples[sampler.randrange(self.samples)] = line
+                if raw.tell() >= self.max_file_size:
+                    gzip_file.close()
+                    raw.close()
+                    files.append(self.write_file(filepath, len(files)))
+                    gzip_file = None
+            os.remove(os.path.join(self.staging_directory, "partition-%05d.pickle" % partition))
+        if gzip_file is not None:
+            gzip_file.close()
+            raw.close()
+            files.append(self.write_file(filepath, len(files)))
+        manifest = {
+            "RunID": self.run_id,
+            "DataPrefix": "%s/data/" % self.run_id,
+            "Format": "DYNAMODB_JSON",
+            "Compression": "GZIP",
+            "Stats": self.stats,
+            "Files": files,
+            "Samples": [json.loads(line)["Item"] for line in samples],
+        }
+        self.blob_store.put("%s/manifest.json" % self.run_id, json.dumps(manifest, ensure_ascii=False).encode("utf-8"))
+        os.rmdir(self.staging_directory)
+        print("Import Files Written: ", self.stats, manifest["DataPrefix"])
+        return manifest
+
+
+class ImportVerification:
+    """
+    A class used to represent the verification of a table imported from the files of a bulk load
+    ...
+
+    The items of the table are counted with a parallel scan and compared with the items of the manifest, and every
+    sampled item of the manifest is read from the table and compared with the item of the import files.
+
+    Attributes:
+        db_table {object} -- The product's db table
+        blob_store {object} -- The blob store of the import files
+        manifest_key {string} -- The key of the manifest in the blob store
+        segments {int} -- The number of parallel scan segments
+
+    Methods:
+        count_segment(segment) -- Count the items of a scan segment
+        execute() -- Verify the table against the manifest
+
+    """
+    def __init__(self, **kwargs) -> None:
+        """
+        Parameters:
+            db_table {object} -- The product's db table
+            blob_store {object} -- The blob store of the import files
+            manifest_key {string} -- The key of the manifest in the blob store, like "<run_id>/manifest.json"
+            segments {int} -- The number of parallel scan segments
+
+        """
+        self.db_table = kwargs.get("db_table")
+        self.blob_store = kwargs.get("blob_store")
+        self.manifest_key = kwargs.get("manifest_key")
+        self.segments = kwargs.get("segments") or 4
+
+    def count_segment(self, segment):
+        """
+        Count the items of a scan segment
+
+        Arguments:
+            segment {int} -- The scan segment number
+
+        Returns:
+            count {int} -- The number of items
+
+        """
+        count = 0
+        scan_kwargs = {"Select": "COUNT", "Segment": segment, "TotalSegments": self.segments}
+        while True:
+            response = self.db_table.scan(**scan_kwargs)
+            count += response.get("Count", 0)
+            if not response.get("LastEvaluatedKey"):
+                return count
+            scan_kwargs["ExclusiveStartKey"] = response.get("LastEvaluatedKey")
+
+    def execute(self):
+        """
+        Verify the table against the manifest of the bulk load
+
+        Returns:
+            report {dict} -- The expected and counted items, the sampled items, and the MPNs of the sampled items
+                missing from the table or different from the import files
+
+        """
+        manifest = json.loads(self.blob_store.get(self.manifest_key))
+        with ThreadPoolExecutor(max_workers=self.segments) as executor:
+            counted = sum(executor.map(self.count_segment, range(self.segments)))
+        missing = []
+        different = []
+        for typed in manifest.get("Samples"):
+            expected = from_dynamodb_json(typed)
+            item = self.db_table.get_item(Key={"MPN": expected.get("MPN")}, ConsistentRead=True).get("Item")
+            if item is None:
+                missing.append(expected.get("MPN"))
+            elif item != expected:
+                different.append(expected.get("MPN"))
+        report = {
+            "expected": manifest["Stats"]["items"],
+            "counted": counted,
+            "sampled": len(manifest.get("Samples")),
+            "missing": missing,
+            "different": different,
+        }
+        report["verified"] = report["expected"] == counted and not missing and not different
+        print("Import Verified: " if report["verified"] else "Import Verification Failed: ", report)
+        return report
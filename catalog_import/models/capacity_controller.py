@@ -0,0 +1,260 @@
+import time
+from threading import Lock
+from botocore.exceptions import ClientError
+
+
+class TokenBucket:
+    """
+    A class used to represent a rate limit of capacity units per second
+    ...
+
+    The tokens can go negative when a call consumes more than it reserved, which delays the next calls instead of
+    letting the deficit pass.
+
+    Attributes:
+        rate {float} -- The capacity units per second
+        tokens {float} -- The capacity units available
+        updated {float} -- The time of the last refill
+
+    Methods:
+        refill() -- Add the tokens accumulated since the last refill
+        take(units) -- Reserve capacity units
+        debit(units) -- Remove capacity units without waiting
+
+    """
+    def __init__(self, **kwargs) -> None:
+        """
+        Parameters:
+            rate {float} -- The capacity units per second
+
+        """
+        self.rate = kwargs.get("rate")
+        self.tokens = self.rate
+        self.updated = time.monotonic()
+
+    def refill(self):
+        """
+        Add the tokens accumulated since the last refill, up to one second of capacity
+
+        Returns:
+            None
+
+        """
+        now = time.monotonic()
+        self.tokens = min(self.rate, self.tokens + (now - self.updated) * self.rate)
+        self.updated = now
+
+    def take(self, units):
+        """
+        Reserve capacity units
+
+        Arguments:
+            units {float} -- The capacity units to reserve
+
+        Returns:
+            {float} -- The seconds to wait before using the reserved units
+
+        """
+        self.refill()
+        self.tokens -= units
+        return -self.tokens / self.rate if self.tokens < 0 else 0
+
+    def debit(self, units):
+        """
+        Remove capacity units without waiting, like the units consumed above the reserved ones
+
+        Arguments:
+            units {float} -- The capacity units to remove
+
+        Returns:
+            None
+
+        """
+        self.refill()
+        self.tokens -= units
+
+
+class CapacityController:
+    """
+    A class used to represent the adaptive write rate shared by every provider thread
+    ...
+
+    Every write reserves capacity from the table bucket and from the provider bucket, if the provider has a share of
+    the table capacity. The consumed capacity of each response corrects the reservation. The rate grows additively
+    while writes succeed and is cut multiplicatively when DynamoDB throttles, leaving room for the online reads of
+    the same table.
+
+    Attributes:
+        table_capacity {float} -- The maximum write capacity units per second of the import
+        min_rate {float} -- The minimum write capacity units per second
+        increase_rate {float} -- The capacity units per second added for each second without throttling
+        decrease_factor {float} -- The factor applied to the rate when a write is throttled
+        shares {dict} -- The share of the rate of each provider name
+        max_retries {int} -- The retries of a throttled write before failing
+        rate {float} -- The current write capacity units per second
+        stats {dict} -- The consumed units, writes and throttles
+
+    Methods:
+        bucket(provider) -- Get the bucket of a provider
+        set_rate(rate) -- Change the rate of every bucket
+        acquire(provider, units) -- Wait until capacity units are available
+        consumed(provider, units, reserved) -- Record the capacity consumed by a write
+        throttled() -- Decrease the rate after a throttled write
+        execute(provider, operation, **kwargs) -- Run a write within the rate, retrying it when it is throttled
+
+    """
+    THROTTLING_ERRORS = ("ProvisionedThroughputExceededException", "ThrottlingException", "RequestLimitExceeded")
+
+    def __init__(self, **kwargs) -> None:
+        """
+        Parameters:
+            table_capacity {float} -- The maximum write capacity units per second of the import
+            min_rate {float} -- The minimum write capacity units per second
+            increase_rate {float} -- The capacity units per second added for each second without throttling
+            decrease_factor {float} -- The factor applied to the rate when a write is throttled
+            shares {dict} -- The share of the rate of each provider name, between 0 and 1
+            max_retries {int} -- The retries of a throttled write before failing
+
+        """
+        self.table_capacity = float(kwargs.get("table_capacity"))
+        self.min_rate = float(kwargs.get("min_rate") or 1)
+        self.increase_rate = float(kwargs.get("increase_rate") or 1)
+        self.decrease_factor = float(kwargs.get("decrease_factor") or 0.5)
+        self.shares = kwargs.get("shares") or {}
+        self.max_retries = kwargs.get("max_retries", 8)
+        self.rate = self.table_capacity
+        self.table_bucket = TokenBucket(rate=self.rate)
+        self.buckets = {}
+        self.adjusted = time.monotonic()
+        self.decreased = 0
+        self.stats = {"consumed": 0.0, "writes": 0, "throttles": 0}
+        self.lock = Lock()
+
+    def bucket(self, provider):
+        """
+        Get the bucket of a provider, or None if the provider has no share of the table capacity
+
+        Arguments:
+            provider {str} -- The provider name
+
+        Returns:
+            {object} -- The provider bucket
+
+        """
+        share = self.shares.get(provider)
+        if not share:
+            return None
+        if provider not in self.buckets:
+            self.buckets[provider] = TokenBucket(rate=self.rate * share)
+        return self.buckets[provider]
+
+    def set_rate(self, rate):
+        """
+        Change the rate of the table bucket and of every provider bucket, keeping it within the limits
+
+        Arguments:
+            rate {float} -- The new capacity units per second
+
+        Returns:
+            None
+
+        """
+        self.rate = min(self.table_capacity, max(self.min_rate, rate))
+        self.table_bucket.refill()
+        self.table_bucket.rate = self.rate
+        for provider, bucket in self.buckets.items():
+            bucket.refill()
+            bucket.rate = self.rate * self.shares.get(provider)
+        self.adjusted = time.monotonic()
+
+    def acquire(self, provider, units=1):
+        """
+        Wait until capacity units are available for the table and for the provider
+
+        Arguments:
+            provider {str} -- The provider name
+            units {float} -- The capacity units to reserve
+
+        Returns:
+            None
+
+        """
+        with self.lock:
+            wait = self.table_bucket.take(units)
+            bucket = self.bucket(provider)
+            if bucket is not None:
+                wait = max(wait, bucket.take(units))
+        if wait:
+            time.sleep(wait)
+
+    def consumed(self, provider, units, reserved=1):
+        """
+        Record the capacity consumed by a successful write and increase the rate additively
+
+        Arguments:
+            provider {str} -- The provider name
+            units {float} -- The capacity units consumed by the write
+            reserved {float} -- The capacity units reserved before the write
+
+        Returns:
+            None
+
+        """
+        with self.lock:
+            self.stats["consumed"] += units
+            self.stats["writes"] += 1
+            if units > reserved:
+                self.table_bucket.debit(units - reserved)
+                bucket = self.bucket(provider)
+                if bucket is not None:
+                    bucket.debit(units - reserved)
+            if self.rate < self.table_capacity:
+                self.set_rate(self.rate + self.increase_rate * (time.monotonic() - self.adjusted))
+
+    def throttled(self):
+        """
+        Decrease the rate multiplicatively after a throttled write, at most once per second so the concurrent
+        throttles of a single burst count once
+
+        Returns:
+            None
+
+        """
+        with self.lock:
+            self.stats["throttles"] += 1
+            if time.monotonic() - self.decreased >= 1:
+                self.decreased = time.monotonic()
+                self.set_rate(self.rate * self.decrease_factor)
+                print("Write Rate Decreased: ", round(self.rate, 2))
+
+    def execute(self, provider, operation, **kwargs):
+        """
+        Run a write within the rate, retrying it with a growing wait when it is throttled
+
+        Arguments:
+            provider {str} -- The provider name
+            operation {function} -- The table write method, like `put_item`
+            **kwargs: The keyword arguments of the write
+
+        Returns:
+            response {dict} -- The response of the write
+
+        """
+        kwargs["ReturnConsumedCapacity"] = "TOTAL"
+        retries = 0
+        while True:
+            self.acquire(provider)
+            try:
+                response = operation(**kwargs)
+            except ClientError as error:
+                if error.response.get("Error", {}).get("Code") not in self.THROTTLING_ERRORS:
+                    raise
+                self.throttled()
+                retries += 1
+                if retries > self.max_retries:
+                    raise
+                time.sleep(min(0.05 * 2 ** retries, 5))
+                continue
+            units = (response.get("ConsumedCapacity") or {}).get("CapacityUnits", 1)
+            self.consumed(provider, units)
+            return response
@@ -0,0 +1,304 @@
+import time
+from collections import OrderedDict
+from threading import Lock
+from .item_layout import to_list_layout
+
+
+class ProductCache:
+    """
+    A class used to represent an in-process LRU cache of product items with a time to live
+    ...
+
+    The cache also keeps the products that were not found, so the lookups of missing MPNs do not reach the table
+    either. The items are shared by every caller and must not be modified.
+
+    Attributes:
+        max_entries {int} -- The maximum number of cached items
+        ttl {float} -- The seconds an item stays valid
+        entries {object} -- The cached items and their expiry time, from the least recently used
+        stats {dict} -- The hits, misses, evictions and expirations
+
+    Methods:
+        get(key) -- Get a cached item
+        put(key, item) -- Store an item
+        invalidate(mpn) -- Remove the cached items of an MPN
+        hit_rate() -- Get the share of lookups served by the cache
+        metrics() -- Get the cache statistics
+
+    """
+    MISSING = object()
+
+    def __init__(self, **kwargs) -> None:
+        """
+        Parameters:
+            max_entries {int} -- The maximum number of cached items
+            ttl {float} -- The seconds an item stays valid
+
+        """
+        self.max_entries = kwargs.get("max_entries") or 10000
+        self.ttl = kwargs.get("ttl") or 60
+        self.entries = OrderedDict()
+        self.stats = {"hits": 0, "misses": 0, "evictions": 0, "expirations": 0}
+        self.lock = Lock()
+
+    def get(self, key):
+        """
+        Get a cached item
+
+        Arguments:
+            key {tuple} -- The MPN and the projected fields
+
+        Returns:
+            {dict|None|object} -- The item, None for a product that was not found, or MISSING if it is not cached
+
+        """
+        with self.lock:
+            entry = self.entries.get(key)
+            if entry is None:
+                self.stats["misses"] += 1
+                return self.MISSING
+            item, expires = entry
+            if expires < time.monotonic():
+                del self.entries[key]
+                self.stats["expirations"] += 1
+                self.stats["misses"] += 1
+                return self.MISSING
+            self.entries.move_to_end(key)
+            self.stats["hits"] += 1
+            return item
+
+    def put(self, key, item):
+        """
+        Store an item, evicting the least recently used ones above the maximum number of items
+
+        Arguments:
+            key {tuple} -- The MPN and the projected fields
+            item {dict|None} -- The item, or None for a product that was not found
+
+        Returns:
+            None
+
+        """
+        with self.lock:
+            self.entries[key] = (item, time.monotonic() + self.ttl)
+            self.entries.move_to_end(key)
+            while len(self.entries) > self.max_entries:
+                self.entries.popitem(last=False)
+                self.stats["evictions"] += 1
+
+    def invalidate(self, mpn):
+        """
+        Remove the cached items of an MPN, for every projection
+
+        Arguments:
+            mpn {str} -- The MPN of the product
+
+        Returns:
+            None
+
+        """
+        with self.lock:
+            for key in [key for key in self.entries if key[0] == mpn]:
+                del self.entries[key]
+
+    def hit_rate(self):
+        """
+        Get the share of lookups served by the cache
+
+        Returns:
+            {float} -- The hit rate, between 0 and 1
+
+        """
+        lookups = self.stats["hits"] + self.stats["misses"]
+        return self.stats["hits"] / lookups if lookups else 0.0
+
+    def metrics(self):
+        """
+        Get the cache statistics
+
+        Returns:
+            {dict} -- The hits, misses, evictions, expirations, hit rate and size of the cache
+
+        """
+        with self.lock:
+            return dict(self.stats, hit_rate=round(self.hit_rate(), 4), size=len(self.entries))
+
+
+class CatalogReader:
+    """
+    A class used to represent the read API of the products db table
+    ...
+
+    The products are read by MPN, alone or in batches of up to 100 keys per request, optionally projected to some of
+    their top-level fields, and returned in the list layout of the import: the categories, descriptions and
+    attributes maps are converted back to lists, the attribute map is expanded back to the attributes list when the
+    shared attribute dictionary is given, and the packed descriptions are restored when the description storage is
+    given.
+
+    Attributes:
+        dynamodb {object} -- The DynamoDB resource
+        db_table {object} -- The products db table
+        attribute_dictionary {object} -- The shared attribute dictionary, if enabled
+        description_storage {object} -- The storage of large descriptions, if enabled
+        cache {object} -- The product cache, or None to always read the table
+        max_retries {int} -- The retries of the unprocessed keys of a batch
+
+    Methods:
+        projection(fields) -- Get the projection arguments of the requested fields
+        decode(item) -- Get an item in the layout of the import
+        get(mpn, fields) -- Get a product by MPN
+        get_many(mpns, fields) -- Get products by MPN in batches
+        invalidate(mpn) -- Remove a product from the cache
+        metrics() -- Get the cache statistics
+
+    """
+    BATCH_SIZE = 100
+
+    def __init__(self, **kwargs) -> None:
+        """
+        Parameters:
+            dynamodb {object} -- The DynamoDB resource
+            db_table {object} -- The products db table
+            attribute_dictionary {object} -- The shared attribute dictionary, if enabled
+            description_storage {object} -- The storage of large descriptions, if enabled
+            cache {object} -- The product cache, or None to always read the table
+            max_retries {int} -- The retries of the unprocessed keys of a batch
+
+        """
+        self.dynamodb = kwargs.get("dynamodb")
+        self.db_table = kwargs.get("db_table")
+        self.attribute_dictionary = kwargs.get("attribute_dictionary")
+        self.description_storage = kwargs.get("description_storage")
+        self.cache = kwargs.get("cache")
+        self.max_retries = kwargs.get("max_retries") or 5
+
+    @staticmethod
+    def projection(fields):
+        """
+        Get the projection arguments of the requested fields, always including the MPN
+
+        The attributes map of the shared attribute dictionary is projected when the Attributes field is requested.
+
+        Arguments:
+            fields {tuple} -- The top-level fields, or None for the whole item
+
+        Returns:
+            {dict} -- The ProjectionExpression and ExpressionAttributeNames arguments, empty for the whole item
+
+        """
+        if not fields:
+            return {}
+        names = ["MPN"] + [field for field in fields if field != "MPN"]
+        if "Attributes" in names and "AttributeValues" not in names:
+            names.append("AttributeValues")
+        return {
+            "ProjectionExpression": ", ".join("#f%s" % index for index in range(len(names))),
+            "ExpressionAttributeNames": {"#f%s" % index: name for index, name in enumerate(names)},
+        }
+
+    def decode(self, item):
+        """
+        Get an item in the list layout of the import, with its attributes list and its descriptions restored
+
+        Arguments:
+            item {dict} -- The item of the table
+
+        Returns:
+            item {dict} -- The product values
+
+        """
+        item = to_list_layout(item)
+        if self.attribute_dictionary is not None and "AttributeValues" in item:
+            item = self.attribute_dictionary.expand(item)
+        if self.description_storage is not None and "Descriptions" in item:
+            item = self.description_storage.unpack(item)
+        return item
+
+    def get(self, mpn, fields=None):
+        """
+        Get a product by MPN
+
+        Arguments:
+            mpn {str} -- The MPN of the product
+            fields {list} -- The top-level fields to read, or None for the whole product
+
+        Returns:
+            {dict} -- The product values, or None if the product does not exist
+
+        """
+        key = (mpn, tuple(fields) if fields else None)
+        if self.cache is not None:
+            item = self.cache.get(key)
+            if item is not ProductCache.MISSING:
+                return item
+        response = self.db_table.get_item(Key={"MPN": mpn}, **self.projection(key[1]))
+        item = self.decode(response["Item"]) if response.get("Item") else None
+        if self.cache is not None:
+            self.cache.put(key, item)
+        return item
+
+    def get_many(self, mpns, fields=None):
+        """
+        Get products by MPN, reading the products that are not cached in batches of up to 100 keys
+
+        Arguments:
+            mpns {list} -- The MPNs of the products
+            fields {list} -- The top-level fields to read, or None for the whole products
+
+        Returns:
+            products {dict} -- The product values by MPN, None for the products that do not exist
+
+        """
+        projected = tuple(fields) if fields else None
+        products = {}
+        missing = []
+        for mpn in dict.fromkeys(mpns):
+            item = self.cache.get((mpn, projected)) if self.cache is not None else ProductCache.MISSING
+            if item is ProductCache.MISSING:
+                missing.append(mpn)
+            else:
+                products[mpn] = item
+        for start in range(0, len(missing), self.BATCH_SIZE):
+            batch = missing[start:start + self.BATCH_SIZE]
+            request = {"Keys": [{"MPN": mpn} for mpn in batch], **self.projection(projected)}
+            found = {}
+            retries = 0
+            while request:
+                response = self.dynamodb.batch_get_item(RequestItems={self.db_table.name: request})
+                for item in response.get("Responses", {}).get(self.db_table.name, []):
+                    found[item.get("MPN")] = self.decode(item)
+                request = response.get("UnprocessedKeys", {}).get(self.db_table.name)
+                if request:
+                    retries += 1
+                    if retries > self.max_retries:
+                        raise RuntimeError("Products not read after %s retries: %s" % (self.max_retries, len(request.get("Keys"))))
+                    time.sleep(min(0.05 * 2 ** retries, 5))
+            for mpn in batch:
+                products[mpn] = found.get(mpn)
+                if self.cache is not None:
+                    self.cache.put((mpn, projected), found.get(mpn))
+        return products
+
+    def invalidate(self, mpn):
+        """
+        Remove a product from the cache, like after it is updated
+
+        Arguments:
+            mpn {str} -- The MPN of the product
+
+        Returns:
+            None
+
+        """
+        if self.cache is not None:
+            self.cache.invalidate(mpn)
+
+    def metrics(self):
+        """
+        Get the cache statistics
+
+        Returns:
+            {dict} -- The cache statistics, empty without a cache
+
+        """
+        return self.cache.metrics() if self.cache is not None else {}
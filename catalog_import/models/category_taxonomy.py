@@ -0,0 +1,196 @@
+import hashlib
+from threading import Lock
+from botocore.exceptions import ClientError
+from .attribute_dictionary import label_from_name
+
+
+class CategoryTaxonomy:
+    """
+    A class used to represent the taxonomy of the provider categories and their canonical categories
+    ...
+
+    Every provider category is stored once in the categories table with the ID of its canonical category, which is
+    derived from the category name until it is mapped to another canonical category, so the categories of different
+    providers with the same name, or mapped together, share a canonical ID. The taxonomy is loaded in memory at run
+    start and shared by every provider thread.
+
+    Attributes:
+        db_table {object} -- The categories db table, with the Provider hash key and the CategoryID range key
+        categories {dict} -- The cached provider categories by provider and category ID
+        canonical {dict} -- The provider categories of each canonical ID
+
+    Methods:
+        canonical_id(name) -- Get the default canonical ID of a category name
+        category_id(category) -- Get the provider ID of a category
+        cache(item) -- Add a provider category to the cache
+        load() -- Load every provider category of the table in the cache
+        register(category, metadata) -- Get the canonical ID of a provider category, storing it if it is new
+        categorize(categories, metadata) -- Set the canonical ID of product categories
+        map(provider, category_id, canonical_id) -- Map a provider category to a canonical category
+        provider_categories(canonical_id) -- Get the provider categories of a canonical category
+
+    """
+    def __init__(self, **kwargs) -> None:
+        """
+        Parameters:
+            db_table {object} -- The categories db table
+
+        """
+        self.db_table = kwargs.get("db_table")
+        self.categories = {}
+        self.canonical = {}
+        self.lock = Lock()
+
+    @staticmethod
+    def canonical_id(name):
+        """
+        Get the default canonical ID of a category name, so every thread and run agrees on it without coordination
+
+        Arguments:
+            name {str} -- The category name
+
+        Returns:
+            {str} -- The canonical ID
+
+        """
+        return hashlib.blake2b(label_from_name(name.strip()).encode("utf-8"), digest_size=6).hexdigest()
+
+    @staticmethod
+    def category_id(category):
+        """
+        Get the provider ID of a category, or its name if the provider has no category IDs
+
+        Arguments:
+            category {dict} -- The product category, with ID and Name
+
+        Returns:
+            {str} -- The provider category ID
+
+        """
+        return str(category.get("ID") or category.get("Name"))
+
+    def cache(self, item):
+        """
+        Add a provider category to the cache, replacing its previous canonical ID
+
+        Arguments:
+            item {dict} -- The item of the categories table
+
+        Returns:
+            None
+
+        """
+        with self.lock:
+            key = (item.get("Provider"), item.get("CategoryID"))
+            previous = self.categories.get(key)
+            if previous is not None:
+                self.canonical.get(previous.get("CanonicalID"), set()).discard(key)
+            self.categories[key] = item
+            self.canonical.setdefault(item.get("CanonicalID"), set()).add(key)
+
+    def load(self):
+        """
+        Load every provider category of the table in the cache
+
+        Returns:
+            {object} -- The taxonomy itself
+
+        """
+        scan_kwargs = {}
+        while True:
+            response = self.db_table.scan(**scan_kwargs)
+            for item in response.get("Items", []):
+                self.cache(item)
+            if not response.get("LastEvaluatedKey"):
+                return self
+            scan_kwargs["ExclusiveStartKey"] = response.get("LastEvaluatedKey")
+
+    def register(self, category, metadata):
+        """
+        Get the canonical ID of a provider category, storing the category if it is new
+
+        The write is conditioned on the category not existing, so the mapping of a category stored by another thread
+        or edited in the table is kept.
+
+        Arguments:
+            category {dict} -- The product category, with ID and Name
+            metadata {dict} -- The metadata of the provider
+
+        Returns:
+            {str} -- The canonical ID
+
+        """
+        key = (metadata.get("name"), self.category_id(category))
+        item = self.categories.get(key)
+        if item is not None:
+            return item.get("CanonicalID")
+        item = {
+            "Provider": key[0],
+            "CategoryID": key[1],
+            "Name": category.get("Name") or key[1],
+            "CanonicalID": self.canonical_id(category.get("Name") or key[1]),
+        }
+        try:
+            self.db_table.put_item(Item=item, ConditionExpression="attribute_not_exists(CategoryID)")
+        except ClientError as error:
+            if error.response.get("Error", {}).get("Code") != "ConditionalCheckFailedException":
+                raise
+            item = self.db_table.get_item(Key={"Provider": key[0], "CategoryID": key[1]}).get("Item") or item
+        self.cache(item)
+        return item.get("CanonicalID")
+
+    def categorize(self, categories, metadata):
+        """
+        Set the canonical ID of product categories
+
+        Arguments:
+            categories {list} -- The product categories, with ID and Name
+            metadata {dict} -- The metadata of the provider
+
+        Returns:
+            canonical_ids {list} -- The canonical IDs of the categories, without duplicates
+
+        """
+        canonical_ids = []
+        for category in categories:
+            category["CanonicalID"] = self.register(category, metadata)
+            if category["CanonicalID"] not in canonical_ids:
+                canonical_ids.append(category["CanonicalID"])
+        return canonical_ids
+
+    def map(self, provider, category_id, canonical_id):
+        """
+        Map a provider category to a canonical category, like the category of another provider
+
+        Products keep the canonical IDs they were stored with until they are imported again.
+
+        Arguments:
+            provider {str} -- The provider name
+            category_id {str} -- The provider category ID
+            canonical_id {str} -- The canonical ID
+
+        Returns:
+            None
+
+        """
+        response = self.db_table.update_item(
+            Key={"Provider": provider, "CategoryID": str(category_id)},
+            UpdateExpression="SET CanonicalID = :canonical_id",
+            ExpressionAttributeValues={":canonical_id": canonical_id},
+            ReturnValues="ALL_NEW",
+        )
+        self.cache(response.get("Attributes") or {"Provider": provider, "CategoryID": str(category_id), "CanonicalID": canonical_id})
+
+    def provider_categories(self, canonical_id):
+        """
+        Get the provider categories of a canonical category
+
+        Arguments:
+            canonical_id {str} -- The canonical ID
+
+        Returns:
+            {list} -- The provider categories, with Provider, CategoryID, Name and CanonicalID
+
+        """
+        with self.lock:
+            return [self.categories[key] for key in sorted(self.canonical.get(canonical_id, set()), key=str)]
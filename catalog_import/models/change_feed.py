@@ -0,0 +1,342 @@
+import datetime
+import json
+import os
+import queue
+import time
+import uuid
+from threading import Lock, Thread
+import boto3
+
+
+def change_record(run_id, provider, mpn, operation, fields):
+    """
+    Create a change record
+
+    Arguments:
+        run_id {str} -- The identifier of the import run
+        provider {str} -- The provider name
+        mpn {str} -- The MPN of the changed product
+        operation {str} -- "create" or "update"
+        fields {list} -- The names of the changed fields
+
+    Returns:
+        {dict} -- The change record
+
+    """
+    return {
+        "ID": uuid.uuid4().hex,
+        "RunID": run_id,
+        "Provider": provider,
+        "MPN": mpn,
+        "Operation": operation,
+        "Fields": sorted(fields),
+        "Datetime": datetime.datetime.now().strftime("%m-%d-%Y, %H:%M:%S"),
+    }
+
+
+class LocalChangeSink:
+    """
+    A class used to represent a sink of change records in a local NDJSON file
+    ...
+
+    Attributes:
+        filepath {string} -- The filepath of the NDJSON file
+
+    Methods:
+        write(records) -- Store a batch of change records
+
+    """
+    def __init__(self, **kwargs) -> None:
+        """
+        Parameters:
+            filepath {string} -- The filepath of the NDJSON file
+
+        """
+        self.filepath = kwargs.get("filepath") or "/tmp/product_catalog_changes.ndjson"
+        self.lock = Lock()
+
+    def write(self, records):
+        """
+        Store a batch of change records
+
+        Arguments:
+            records {list} -- The change records
+
+        Returns:
+            None
+
+        """
+        lines = "".join(json.dumps(record, default=str) + "\n" for record in records)
+        with self.lock:
+            directory = os.path.dirname(self.filepath)
+            if directory:
+                os.makedirs(directory, exist_ok=True)
+            with open(self.filepath, "a", encoding="utf-8") as file:
+                file.write(lines)
+
+
+class MemoryChangeQueue:
+    """
+    A class used to represent an in-memory queue of change records, a stand-in for the SQS sink
+    ...
+
+    Attributes:
+        records {object} -- The queued change records
+
+    Methods:
+        write(records) -- Store a batch of change records
+        receive(max_records) -- Take change records from the queue
+
+    """
+    def __init__(self, **kwargs) -> None:
+        """
+        Parameters:
+            max_size {int} -- The maximum number of queued records, unbounded if not given
+
+        """
+        self.records = queue.Queue(maxsize=kwargs.get("max_size") or 0)
+
+    def write(self, records):
+        """
+        Store a batch of change records
+
+        Arguments:
+            records {list} -- The change records
+
+        Returns:
+            None
+
+        """
+        for record in records:
+            self.records.put(record)
+
+    def receive(self, max_records=10):
+        """
+        Take change records from the queue without waiting
+
+        Arguments:
+            max_records {int} -- The maximum number of records to take
+
+        Returns:
+            records {list} -- The change records
+
+        """
+        records = []
+        while len(records) < max_records:
+            try:
+                records.append(self.records.get_nowait())
+            except queue.Empty:
+                break
+        return records
+
+
+class SqsChangeSink:
+    """
+    A class used to represent a sink of change records in an SQS-compatible queue
+    ...
+
+    Attributes:
+        queue_url {string} -- The URL of the queue
+        client {object} -- The SQS client
+
+    Methods:
+        write(records) -- Store a batch of change records
+
+    """
+    def __init__(self, **kwargs) -> None:
+        """
+        Parameters:
+            queue_url {string} -- The URL of the queue
+            client {object} -- The SQS client, created from the default session if not given
+            endpoint_url {string} -- The endpoint of an SQS-compatible service, if the client is not given
+
+        """
+        self.queue_url = kwargs.get("queue_url")
+        self.client = kwargs.get("client") or boto3.client("sqs", endpoint_url=kwargs.get("endpoint_url") or None)
+
+    def write(self, records):
+        """
+        Store a batch of change records, ten messages per request
+
+        Arguments:
+            records {list} -- The change records
+
+        Returns:
+            None
+
+        """
+        for start in range(0, len(records), 10):
+            response = self.client.send_message_batch(
+                QueueUrl=self.queue_url,
+                Entries=[
+                    {"Id": str(index), "MessageBody": json.dumps(record, default=str)}
+                    for index, record in enumerate(records[start:start + 10])
+                ],
+            )
+            if response.get("Failed"):
+                raise RuntimeError("Change records not sent: %s" % response.get("Failed"))
+
+
+class ChangeFeed:
+    """
+    A class used to represent the feed of the products created and updated by an import run
+    ...
+
+    The provider threads only queue the change records; a writer thread sends them to the sink in batches, so the
+    writes to the sink stay off the import path. The pending records are bounded, and a full queue makes the provider
+    threads wait for the writer. A batch is written when it is full or when its first record waited the flush interval.
+    A batch that fails is written again up to `max_retries` times with a doubling backoff, so the sink gets the records
+    at least once; their IDs tell the records sent twice.
+
+    Attributes:
+        run_id {string} -- The identifier of the import run
+        sink {object} -- The sink of the change records
+        batch_size {int} -- The maximum number of records of a batch
+        flush_interval {float} -- The maximum seconds a record waits for its batch
+        max_retries {int} -- The number of times a failed batch is written again
+        backoff {float} -- The seconds to wait before the first retry, doubled on each retry
+        stats {dict} -- The emitted, written, retried and failed records
+
+    Methods:
+        emit(provider, mpn, operation, fields) -- Queue a change record
+        writer() -- Write the queued records in batches until the feed closes
+        flush(records) -- Write a batch of records to the sink
+        close() -- Write the pending records and stop the writer
+
+    """
+    CLOSE = object()
+
+    def __init__(self, **kwargs) -> None:
+        """
+        Parameters:
+            run_id {string} -- The identifier of the import run
+            sink {object} -- The sink of the change records
+            batch_size {int} -- The maximum number of records of a batch
+            flush_interval {float} -- The maximum seconds a record waits for its batch
+            max_pending {int} -- The maximum number of records waiting for the writer
+            max_retries {int} -- The number of times a failed batch is written again
+            backoff {float} -- The seconds to wait before the first retry, doubled on each retry
+
+        """
+        self.run_id = kwargs.get("run_id")
+        self.sink = kwargs.get("sink")
+        self.batch_size = kwargs.get("batch_size") or 100
+        self.flush_interval = kwargs.get("flush_interval") or 1
+        self.pending = queue.Queue(maxsize=kwargs.get("max_pending") or 10000)
+        self.max_retries = kwargs.get("max_retries") if kwargs.get("max_retries") is not None else 3
+        self.backoff = kwargs.get("backoff") or 0.5
+        self.stats = {"emitted": 0, "written": 0, "retried": 0, "failed": 0}
+        self.lock = Lock()
+        self.writer_thread = Thread(target=self.writer, daemon=True)
+        self.writer_thread.start()
+
+    def emit(self, provider, mpn, operation, fields):
+        """
+        Queue a change record
+
+        Arguments:
+            provider {str} -- The provider name
+            mpn {str} -- The MPN of the changed product
+            operation {str} -- "create" or "update"
+            fields {list} -- The names of the changed fields
+
+        Returns:
+            None
+
+        """
+        self.pending.put(change_record(self.run_id, provider, mpn, operation, fields))
+        with self.lock:
+            self.stats["emitted"] += 1
+
+    def writer(self):
+        """
+        Write the queued records in batches, when a batch is full or its oldest record waited the flush interval
+
+        Returns:
+            None
+
+        """
+        batch = []
+        deadline = None
+        closed = False
+        while not closed:
+            try:
+                record = self.pending.get(timeout=max(0, deadline - time.monotonic()) if batch else None)
+            except queue.Empty:
+                record = None
+            if record is self.CLOSE:
+                closed = True
+            elif record is not None:
+                if not batch:
+                    deadline = time.monotonic() + self.flush_interval
+                batch.append(record)
+                if len(batch) < self.batch_size and time.monotonic() < deadline:
+                    continue
+            if batch:
+                self.flush(batch)
+                batch = []
+
+    def flush(self, records):
+        """
+        Write a batch of records to the sink, retrying a failed batch with a doubling backoff; a batch still failing
+        after the retries is reported and counted
+
+        Arguments:
+            records {list} -- The change records
+
+        Returns:
+            None
+
+        """
+        retries = 0
+        while True:
+            try:
+                self.sink.write(records)
+                break
+            except Exception as error:
+                if retries >= self.max_retries:
+                    print("Change Records Failed: ", len(records), error)
+                    with self.lock:
+                        self.stats["failed"] += len(records)
+                    return
+                print("Change Records Retried: ", len(records), error)
+                time.sleep(self.backoff * 2 ** retries)
+                retries += 1
+                with self.lock:
+                    self.stats["retried"] += len(records)
+        with self.lock:
+            self.stats["written"] += len(records)
+
+    def close(self):
+        """
+        Write the pending records and stop the writer
+
+        Returns:
+            stats {dict} -- The emitted, written, retried and failed records
+
+        """
+        self.pending.put(self.CLOSE)
+        self.writer_thread.join()
+        print("Change Records Written: ", self.stats.get("written"))
+        return self.stats
+
+
+def create_change_sink(feed_settings):
+    """
+    Create the sink of change records described by the settings
+
+    Arguments:
+        feed_settings {dict} -- The settings of the change feed, with a "type" of "sqs", "memory" or "local"
+
+    Returns:
+        {object} -- The change sink
+
+    """
+    if feed_settings.get("type") == "sqs":
+        return SqsChangeSink(
+            queue_url=feed_settings.get("queue_url"),
+            endpoint_url=feed_settings.get("endpoint_url"),
+        )
+    if feed_settings.get("type") == "memory":
+        return MemoryChangeQueue()
+    return LocalChangeSink(filepath=feed_settings.get("filepath"))
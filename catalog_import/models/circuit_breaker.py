@@ -0,0 +1,236 @@
+import time
+from collections import deque
+from threading import Lock
+
+
+class CircuitBreaker:
+    """
+    A class used to represent the health of a provider API and a circuit breaker on its requests
+    ...
+
+    The breaker is closed while the API is healthy. It opens when the failed or slow requests of the last `window`
+    requests reach their rate, or when `consecutive_timeouts` requests in a row timed out, so a hung API trips it
+    without waiting for a full window of timeouts. While it is open the requests are rejected at once, without waiting.
+    After `open_seconds` it lets `half_open_probes` requests through: if they succeed the breaker closes again,
+    otherwise it opens for another period. Once it opened `max_opens` times in a row without recovering, the provider
+    is considered down and the rest of its requests are skipped. A setting of 0 disables its threshold.
+
+    Attributes:
+        window {int} -- The number of recent requests the rates are computed on
+        min_calls {int} -- The number of requests in the window before the breaker can open
+        error_rate {float} -- The rate of failed requests opening the breaker
+        slow_call_duration {float} -- The seconds after which a request is slow
+        slow_rate {float} -- The rate of slow requests opening the breaker
+        consecutive_timeouts {int} -- The number of timeouts in a row opening the breaker
+        open_seconds {float} -- The seconds the breaker stays open before probing the API
+        half_open_probes {int} -- The number of successful probes closing the breaker
+        max_opens {int} -- The number of consecutive openings after which the provider is considered down
+        state {str} -- "closed", "open" or "half_open"
+        stats {dict} -- The requests, failed, slow, timed out, rejected requests and openings
+
+    Methods:
+        allow() -- Check if a request can be sent
+        record(success, duration, timeout) -- Record the outcome of a request
+        trip() -- Open the breaker
+        aborted() -- Check if the provider is considered down
+        metrics() -- Get the health statistics
+
+    """
+    def __init__(self, **kwargs) -> None:
+        """
+        Parameters:
+            window {int} -- The number of recent requests the rates are computed on
+            min_calls {int} -- The number of requests in the window before the breaker can open
+            error_rate {float} -- The rate of failed requests opening the breaker
+            slow_call_duration {float} -- The seconds after which a request is slow
+            slow_rate {float} -- The rate of slow requests opening the breaker
+            consecutive_timeouts {int} -- The number of timeouts in a row opening the breaker
+            open_seconds {float} -- The seconds the breaker stays open before probing the API
+            half_open_probes {int} -- The number of successful probes closing the breaker
+            max_opens {int} -- The number of consecutive openings after which the provider is considered down
+
+        """
+        self.window = kwargs.get("window") if kwargs.get("window") is not None else 20
+        self.min_calls = kwargs.get("min_calls") if kwargs.get("min_calls") is not None else 10
+        self.error_rate = kwargs.get("error_rate") if kwargs.get("error_rate") is not None else 0.5
+        self.slow_call_duration = kwargs.get("slow_call_duration") if kwargs.get("slow_call_duration") is not None else 5
+        self.slow_rate = kwargs.get("slow_rate") if kwargs.get("slow_rate") is not None else 0.8
+        self.consecutive_timeouts = kwargs.get("consecutive_timeouts") if kwargs.get("consecutive_timeouts") is not None else 3
+        self.open_seconds = kwargs.get("open_seconds") if kwargs.get("open_seconds") is not None else 5
+        self.half_open_probes = kwargs.get("half_open_probes") if kwargs.get("half_open_probes") is not None else 1
+        self.max_opens = kwargs.get("max_opens") if kwargs.get("max_opens") is not None else 3
+        self.state = "closed"
+        self.calls = deque(maxlen=self.window)
+        self.timeouts = 0
+        self.opened_until = 0
+        self.opens = 0
+        self.probes = 0
+        self.successful_probes = 0
+        self.stats = {"requests": 0, "failed": 0, "slow": 0, "timed_out": 0, "rejected": 0, "opened": 0}
+        self.lock = Lock()
+
+    def allow(self):
+        """
+        Check if a request can be sent, moving an open breaker to half open once its open period is over
+
+        Returns:
+            {Bool} -- True if the request can be sent, False if it must be skipped
+
+        """
+        with self.lock:
+            if self.state == "open" and time.monotonic() >= self.opened_until:
+                self.state = "half_open"
+                self.probes = 0
+                self.successful_probes = 0
+            if self.state == "closed" or (self.state == "half_open" and self.probes < self.half_open_probes):
+                if self.state == "half_open":
+                    self.probes += 1
+                return True
+            self.stats["rejected"] += 1
+            return False
+
+    def record(self, success, duration, timeout=False):
+        """
+        Record the outcome of a request, opening or closing the breaker when its thresholds are reached
+
+        Arguments:
+            success {Bool} -- Whether the API answered, even with a client error
+            duration {float} -- The seconds the request took
+            timeout {Bool} -- Whether the request timed out
+
+        Returns:
+            None
+
+        """
+        slow = duration >= self.slow_call_duration
+        with self.lock:
+            self.stats["requests"] += 1
+            self.stats["failed"] += 0 if success else 1
+            self.stats["slow"] += 1 if slow else 0
+            self.stats["timed_out"] += 1 if timeout else 0
+            self.timeouts = self.timeouts + 1 if timeout else 0
+            if self.state == "half_open":
+                if not success or slow:
+                    self.trip()
+                    return
+                self.successful_probes += 1
+                if self.successful_probes >= self.half_open_probes:
+                    self.state = "closed"
+                    self.opens = 0
+                    self.calls.clear()
+                return
+            if self.state == "open":
+                return
+            if self.consecutive_timeouts and self.timeouts >= self.consecutive_timeouts:
+                self.trip()
+                return
+            self.calls.append((success, slow))
+            if not self.calls or len(self.calls) < self.min_calls:
+                return
+            failed = sum(1 for call_success, _ in self.calls if not call_success)
+            slow_calls = sum(1 for _, call_slow in self.calls if call_slow)
+            if failed >= self.error_rate * len(self.calls) or slow_calls >= self.slow_rate * len(self.calls):
+                self.trip()
+
+    def trip(self):
+        """
+        Open the breaker for `open_seconds`, with the lock held
+
+        Returns:
+            None
+
+        """
+        self.state = "open"
+        self.opened_until = time.monotonic() + self.open_seconds
+        self.opens += 1
+        self.stats["opened"] += 1
+        self.timeouts = 0
+        self.calls.clear()
+
+    def aborted(self):
+        """
+        Check if the provider is considered down, after `max_opens` consecutive openings
+
+        Returns:
+            {Bool} -- True if the rest of the requests must be skipped
+
+        """
+        with self.lock:
+            return self.state == "open" and self.opens >= self.max_opens
+
+    def metrics(self):
+        """
+        Get the health statistics
+
+        Returns:
+            {dict} -- The state, the requests, failed, slow, timed out and rejected requests, and the openings
+
+        """
+        with self.lock:
+            return dict(self.stats, state=self.state)
+
+
+class CircuitBreakers:
+    """
+    A class used to represent the circuit breakers of the provider APIs, one per provider
+    ...
+
+    Attributes:
+        breaker_settings {dict} -- The settings of every circuit breaker
+        breaker_class {class} -- The class of the circuit breakers
+        breakers {dict} -- The circuit breakers by provider name
+
+    Methods:
+        breaker(provider_name) -- Get the circuit breaker of a provider
+        metrics() -- Get the health statistics of every provider
+
+    """
+    def __init__(self, **kwargs) -> None:
+        """
+        Parameters:
+            breaker_settings {dict} -- The settings of every circuit breaker
+            breaker_class {class} -- The class of the circuit breakers, like a subclass recording the requests
+
+        """
+        self.breaker_settings = kwargs.get("breaker_settings") or {}
+        self.breaker_class = kwargs.get("breaker_class") or CircuitBreaker
+        self.breakers = {}
+        self.lock = Lock()
+
+    def breaker(self, provider_name):
+        """
+        Get the circuit breaker of a provider, creating it on first use
+
+        Arguments:
+            provider_name {str} -- The provider name
+
+        Returns:
+            {object} -- The circuit breaker
+
+        """
+        with self.lock:
+            if provider_name not in self.breakers:
+                self.breakers[provider_name] = self.breaker_class(
+                    window=self.breaker_settings.get("window"),
+                    min_calls=self.breaker_settings.get("min_calls"),
+                    error_rate=self.breaker_settings.get("error_rate"),
+                    slow_call_duration=self.breaker_settings.get("slow_call_duration"),
+                    slow_rate=self.breaker_settings.get("slow_rate"),
+                    consecutive_timeouts=self.breaker_settings.get("consecutive_timeouts"),
+                    open_seconds=self.breaker_settings.get("open_seconds"),
+                    half_open_probes=self.breaker_settings.get("half_open_probes"),
+                    max_opens=self.breaker_settings.get("max_opens"),
+                )
+            return self.breakers[provider_name]
+
+    def metrics(self):
+        """
+        Get the health statistics of every provider
+
+        Returns:
+            {dict} -- The statistics by provider name
+
+        """
+        with self.lock:
+            breakers = dict(self.breakers)
+        return {provider_name: breaker.metrics() for provider_name, breaker in breakers.items()}
@@ -1,7 +1,14 @@
+import io
 import json
+import os
+import time
 import requests
+import urllib3
 import xmltodict
+from .directory_feed import DirectoryFeed, ProcessedFiles
 from .file_manager import FileManager
+from .http_stream import HttpStream
+from .locale_join import LocaleJoin
 
 
 class Connection:
@@ -11,12 +18,23 @@ class Connection:
 
     Attributes:
         provider {object} -- The provider related to the connection
+        quarantine {object} -- The quarantine of failed requests, if enabled
+        circuit_breaker {object} -- The circuit breaker of the provider API, if enabled
+        skipped {list} -- The products whose request was skipped because the provider API is unhealthy
 
     Methods:
         xml_to_dict_response(response) -- Convert the XML response to dict
         connection_products_list() -- Retrieves a list of products from the provider's products list file
+        timeout() -- Get the connect and read timeouts of the provider's requests
         get_request(product) -- Sends a GET request to the provider's URL to retrieve data for a specific product
+        skip_product(product, reason) -- Records a product whose request is skipped
+        request_product(product) -- Retrieves the data of a product, quarantining the request if it fails
         response_request() -- Get the API response to the provider's request
+        response_stream() -- Get the records of the provider's remote feed as it is downloaded
+        response_locales() -- Get the products of the provider's locale files joined by product
+        directory_feed() -- Check if the provider's filepath is a directory or a glob of files
+        create_directory_feed() -- Creates the feed of the files of the provider's directory
+        response_directory() -- Get the records of the files of the provider's directory
         response_dict() -- Get the response dict to the provider's request
 
     """
@@ -25,22 +43,27 @@ class Connection:
         """
         Parameters:
             provider {object} -- The provider related to the connection
+            quarantine {object} -- The quarantine of failed requests, if enabled
+            circuit_breaker {object} -- The circuit breaker of the provider API, if enabled
 
         """
         self.provider = kwargs.get("provider")
+        self.quarantine = kwargs.get("quarantine")
+        self.circuit_breaker = kwargs.get("circuit_breaker")
+        self.skipped = []
 
     def xml_to_dict_response(self, response):
         """
-        Convert the XML reponse to a dictionary
+        Convert the XML reponse to a dictionary, building only the provider's XML projection if it has one
 
         Arguments:
-            response {string} -- The connection XML response
+            response {string|object} -- The connection XML response, as a string or a binary file object
 
         Returns:
             {dict} -- Response converted to a dictionary
 
         """
-        return xmltodict.parse(response)
+        return xmltodict.parse(response, projection=getattr(self.provider, "xml_projection", False) or None)
 
     def connection_products_list(self):
         """
@@ -55,10 +78,25 @@ class Connection:
         file.close()
         return products_list
 
+    def timeout(self):
+        """
+        Get the connect and read timeouts of the provider's requests, so a request to an unresponsive API fails instead
+        of blocking the run
+
+        Returns:
+            {tuple} -- The connect timeout and the read timeout between bytes, in seconds
+        """
+        return (getattr(self.provider, "connect_timeout", False) or 3.05, getattr(self.provider, "read_timeout", False) or 30)
+
     def get_request(self, product):
         """
         Sends a GET request to the provider's URL to retrieve data for a specific product.
 
+        The body is parsed straight from the raw byte stream, decompressed transparently, instead of being decoded to a
+        string first. The outcome and duration of the request are recorded by the circuit breaker, if it is enabled:
+        connection errors, timeouts, server errors, rate limiting and bodies that fail to parse count as failures, and
+        the timeouts are also counted in a row.
+
         Arguments:
             product {str} -- The product identifier or parameter to include in the request URL.
 
@@ -67,17 +105,86 @@ class Connection:
         """
         url = self.provider.url
         request_url = url % product
-        response = requests.get(request_url)
-        if response.status_code == 200:
-            request_result = self.xml_to_dict_response(response.text) if self.provider.response_type=="xml" else json.loads(response.text)
-        else:
-            request_result = {}
+        started = time.monotonic()
+        healthy = False
+        timeout = False
+        try:
+            with requests.get(request_url, stream=True, timeout=self.timeout()) as response:
+                if response.status_code == 200:
+                    response.raw.decode_content = True
+                    request_result = self.xml_to_dict_response(response.raw) if self.provider.response_type=="xml" else json.load(response.raw)
+                    healthy = True
+                else:
+                    healthy = response.status_code < 500 and response.status_code != 429
+                    request_result = {}
+                    # Only the server errors and the rate limiting are quarantined, a client error like 404 is final
+                    if self.quarantine is not None and not healthy:
+                        self.quarantine.add(self.provider.name, "request", "HTTP status %s" % response.status_code, product)
+        except (requests.exceptions.Timeout, urllib3.exceptions.ReadTimeoutError):
+            timeout = True
+            raise
+        finally:
+            # Every request is recorded once, so a failed half-open probe reopens the breaker
+            if self.circuit_breaker is not None:
+                self.circuit_breaker.record(healthy, time.monotonic() - started, timeout)
         return request_result
 
+    def skip_product(self, product, reason):
+        """
+        Records a product whose request is skipped because the provider API is unhealthy, quarantining the request so
+        it is sent again by a replay.
+
+        Arguments:
+            product {str} -- The product identifier or parameter of the request.
+            reason {str} -- The reason the request is skipped.
+
+        Returns:
+            None
+        """
+        self.skipped.append(product)
+        if self.quarantine is not None:
+            self.quarantine.add(self.provider.name, "request", reason, product)
+
+    def request_product(self, product):
+        """
+        Retrieves the data of a product, quarantining the request instead of failing if it raises a network error, so
+        it is sent again by a replay. Other errors, like a body that fails to parse, are reported and the product is
+        skipped, since sending the request again would fail the same way.
+
+        Arguments:
+            product {str} -- The product identifier or parameter to include in the request URL.
+
+        Returns:
+            {dict} -- The response data, or an empty dict if the request failed or was skipped, or the provider answered
+                with an error.
+        """
+        if self.circuit_breaker is not None and not self.circuit_breaker.allow():
+            self.skip_product(product, "Circuit breaker open")
+            return {}
+        try:
+            request_result = self.get_request(product=product)
+        except (requests.exceptions.RequestException, urllib3.exceptions.HTTPError) as error:
+            if self.quarantine is None:
+                raise
+            self.quarantine.add(self.provider.name, "request", error, product)
+            return {}
+        except Exception as error:
+            if self.quarantine is None:
+                raise
+            print("Request Failed: ", self.provider.name, product, repr(error))
+            return {}
+        if request_result and not request_result.get("ErrorResponse", False):
+            return request_result
+        return {}
+
     def response_request(self):
         """
         Get the API response to the provider's request
 
+        While the circuit breaker is open the requests are skipped at once and quarantined, without waiting for the API;
+        once its open period is over the next requests probe the API. When the breaker considers the provider down, the
+        rest of the products are skipped at once and recorded instead of being requested.
+
         Returns:
             {dict} -- Dict response
 
@@ -85,12 +192,134 @@ class Connection:
         if self.provider.products_list:
             result = []
             products_list = self.connection_products_list()
-            for product in products_list:
-                request_result = self.get_request(product=product)
-                if request_result and not request_result.get("ErrorResponse", False):
+            for position, product in enumerate(products_list):
+                if self.circuit_breaker is not None and self.circuit_breaker.aborted():
+                    for skipped_product in products_list[position:]:
+                        self.skip_product(skipped_product, "Provider unavailable")
+                    break
+                request_result = self.request_product(product=product)
+                if request_result:
                     result.append(request_result)
+            if self.circuit_breaker is not None:
+                print("Provider Health: ", self.provider.name, self.circuit_breaker.metrics(), "skipped", len(self.skipped))
         return result
 
+    def response_stream(self):
+        """
+        Get the records of the provider's remote feed, parsing the body while it is downloaded
+
+        Returns:
+            {generator} -- The records of the feed
+
+        """
+        stream = HttpStream(
+            url = self.provider.url,
+            compression = getattr(self.provider, "compression", False),
+            max_retries = getattr(self.provider, "max_retries", 5),
+        )
+        file_manager = FileManager(
+            stream = io.BufferedReader(stream),
+            file_format = self.provider.response_type,
+            csv_delimiter = getattr(self.provider, "csv_delimiter", False),
+            csv_list_separator = getattr(self.provider, "csv_list_separator", False),
+            xml_item_name = getattr(self.provider, "xml_item_name", False),
+            xml_item_depth = getattr(self.provider, "xml_item_depth", False),
+            xml_projection = getattr(self.provider, "xml_projection", False),
+        )
+        return file_manager.parse_file_response()
+
+    def response_locales(self):
+        """
+        Get the products of the provider's locale files, streamed together and joined by product so each product is
+        parsed and written once with the records of every locale. The records are the `xml_item_name` elements,
+        "Product" if not set, and the document paths of the projection are then made relative to the records.
+
+        Returns:
+            {generator} -- The joined products, as {"Locales": {location_tag: record}}
+
+        """
+        xml_projection = getattr(self.provider, "xml_projection", False)
+        if not getattr(self.provider, "xml_item_name", False):
+            xml_projection = FileManager.record_projection(xml_projection)
+        sources = {}
+        for locale_file in self.provider.locale_files:
+            file_manager = FileManager(
+                filepath = locale_file.filepath,
+                archive_member = getattr(locale_file, "archive_member", False),
+                file_format = getattr(self.provider, "file_format", False),
+                csv_delimiter = getattr(self.provider, "csv_delimiter", False),
+                csv_list_separator = getattr(self.provider, "csv_list_separator", False),
+                xml_item_name = getattr(self.provider, "xml_item_name", False) or "Product",
+                xml_item_depth = getattr(self.provider, "xml_item_depth", False),
+                xml_projection = xml_projection,
+            )
+            sources[locale_file.location_tag] = file_manager.parse_file_response()
+        locale_join = LocaleJoin(
+            sources = sources,
+            join_key = getattr(self.provider, "join_key", False),
+            sorted = getattr(self.provider, "sorted", False),
+            max_pending = getattr(self.provider, "max_pending", False),
+        )
+        return locale_join.records()
+
+    def directory_feed(self):
+        """
+        Check if the provider's filepath is a directory or a glob of files, like "exports/*.xml.gz"
+
+        Returns:
+            {Bool} -- True if the provider's feed is split in files
+
+        """
+        filepath = self.provider.filepath or ""
+        return os.path.isdir(filepath) or any(character in filepath for character in "*?[")
+
+    def create_directory_feed(self):
+        """
+        Creates the feed of the files of the provider's directory, or of the files matching its glob.
+
+        The files matching the provider's `file_pattern` in the directory are read in the order of their names by
+        `file_workers` threads. The processed files are recorded in the provider's `processed_files` log. XML records
+        are the `xml_item_name` elements, "Product" if not set, and the document paths of the projection of a provider
+        converting the whole XML are made relative to the records.
+
+        Returns:
+            {object} -- The directory feed
+
+        """
+        xml_projection = getattr(self.provider, "xml_projection", False)
+        if not getattr(self.provider, "xml_item_name", False):
+            xml_projection = FileManager.record_projection(xml_projection)
+        processed_files = ProcessedFiles(
+            filepath = getattr(self.provider, "processed_files", False) or "/tmp/product_catalog_files_%s.ndjson" % self.provider.name,
+        )
+        directory_feed = DirectoryFeed(
+            filepath = self.provider.filepath,
+            pattern = getattr(self.provider, "file_pattern", False),
+            workers = getattr(self.provider, "file_workers", False),
+            queue_size = getattr(self.provider, "queue_size", False),
+            processed_files = processed_files,
+            file_manager_kwargs = {
+                "archive_member": getattr(self.provider, "archive_member", False),
+                "file_format": getattr(self.provider, "file_format", False),
+                "csv_delimiter": getattr(self.provider, "csv_delimiter", False),
+                "csv_list_separator": getattr(self.provider, "csv_list_separator", False),
+                "xml_item_name": getattr(self.provider, "xml_item_name", False) or "Product",
+                "xml_item_depth": getattr(self.provider, "xml_item_depth", False),
+                "xml_projection": xml_projection,
+            },
+        )
+        return directory_feed
+
+    def response_directory(self):
+        """
+        Get the records of the files of the provider's directory, skipping the files already processed
+
+        Returns:
+            {generator} -- The records of the files
+
+        """
+        return self.create_directory_feed().records()
+
     def response_dict(self):
         """
         Get the response dict to the provider's request
@@ -99,11 +328,27 @@ class Connection:
             result {dict} -- The result to the connection
 
         """
-        if self.provider.connection_type == "file":  # If the connection returns a file
+        if self.provider.connection_type == "file" and getattr(self.provider, "locale_files", False):  # If the provider has a file per locale
+            response = self.response_locales()
+        elif self.provider.connection_type == "file" and self.directory_feed():  # If the provider's feed is split in files
+            response = self.response_directory()
+        elif self.provider.connection_type == "file":  # If the connection returns a file
             file_manager = FileManager(
-                filepath = self.provider.filepath
+                filepath = self.provider.filepath,
+                archive_member = getattr(self.provider, "archive_member", False),
+                file_format = getattr(self.provider, "file_format", False),
+                csv_delimiter = getattr(self.provider, "csv_delimiter", False),
+                csv_list_separator = getattr(self.provider, "csv_list_separator", False),
+                xml_item_name = getattr(self.provider, "xml_item_name", False),
+                xml_item_depth = getattr(self.provider, "xml_item_depth", False),
+                xml_projection = getattr(self.provider, "xml_projection", False),
+                xml_range = getattr(self.provider, "xml_range", False),
+                xml_start_mpn = getattr(self.provider, "xml_start_mpn", False),
+                xml_index_filepath = getattr(self.provider, "xml_index_filepath", False),
             )  # Creating a FileManager object to manage the file response
             response = file_manager.parse_file_response()
         elif self.provider.connection_type == "api":  # If the connection is to an API
             response = self.response_request()
+        elif self.provider.connection_type == "stream":  # If the connection is to a remote feed
+            response = self.response_stream()
         return response
@@ -0,0 +1,170 @@
+import hashlib
+import zlib
+from threading import Lock
+
+
+class LazyBlob:
+    """
+    A class used to represent a description stored in the blob store, read the first time it is used
+    ...
+
+    Attributes:
+        blob_store {object} -- The blob store of the description
+        key {string} -- The key of the blob
+
+    Methods:
+        load() -- Read and decompress the description
+
+    """
+    def __init__(self, **kwargs) -> None:
+        """
+        Parameters:
+            blob_store {object} -- The blob store of the description
+            key {string} -- The key of the blob
+
+        """
+        self.blob_store = kwargs.get("blob_store")
+        self.key = kwargs.get("key")
+        self.value = None
+        self.lock = Lock()
+
+    def load(self):
+        """
+        Read and decompress the description, only once
+
+        Returns:
+            {str} -- The description
+
+        """
+        with self.lock:
+            if self.value is None:
+                self.value = zlib.decompress(self.blob_store.get(self.key)).decode("utf-8")
+        return self.value
+
+    def __str__(self):
+        return self.load()
+
+
+class DescriptionStorage:
+    """
+    A class used to represent the storage of large description fields
+    ...
+
+    Descriptions above `compress_threshold` bytes are stored compressed as a binary attribute, and descriptions above
+    `offload_threshold` bytes are stored compressed in the blob store with only a reference in the product item. The
+    blob key is the hash of the text, so a text already in the blob store is not stored again.
+
+    Attributes:
+        compress_threshold {int} -- The size in bytes from which a description is compressed
+        offload_threshold {int} -- The size in bytes from which a description is moved to the blob store
+        blob_store {object} -- The blob store of the large descriptions
+        level {int} -- The zlib compression level
+
+    Methods:
+        pack_value(value) -- Get the stored form of a description
+        pack(product) -- Replace the large descriptions of a product with their stored form
+        unpack_value(value, lazy) -- Get the description of a stored form
+        unpack(product, lazy) -- Get a copy of a product with its descriptions restored
+
+    """
+    ENCODING = "zlib"
+
+    def __init__(self, **kwargs) -> None:
+        """
+        Parameters:
+            compress_threshold {int} -- The size in bytes from which a description is compressed
+            offload_threshold {int} -- The size in bytes from which a description is moved to the blob store
+            blob_store {object} -- The blob store of the large descriptions
+            level {int} -- The zlib compression level
+
+        """
+        self.compress_threshold = kwargs.get("compress_threshold") or 4096
+        self.offload_threshold = kwargs.get("offload_threshold") or 131072
+        self.blob_store = kwargs.get("blob_store")
+        self.level = kwargs.get("level") or 6
+
+    def pack_value(self, value):
+        """
+        Get the stored form of a description: the text itself, a compressed binary or a blob store reference
+
+        Arguments:
+            value {str} -- The description
+
+        Returns:
+            {str|dict} -- The stored form of the description
+
+        """
+        if not isinstance(value, str) or len(value) < self.compress_threshold // 4:
+            return value  # A UTF-8 character is at most 4 bytes, so the text is under the threshold
+        encoded = value.encode("utf-8")
+        if len(encoded) < self.compress_threshold:
+            return value
+        compressed = zlib.compress(encoded, self.level)
+        if len(encoded) >= self.offload_threshold and self.blob_store is not None:
+            key = "descriptions/%s.zlib" % hashlib.sha256(encoded).hexdigest()  # Identical texts share a blob
+            if not self.blob_store.exists(key):
+                self.blob_store.put(key, compressed)
+            return {"Encoding": self.ENCODING, "BlobKey": key, "Size": len(encoded)}
+        if len(compressed) >= len(encoded):
+            return value
+        return {"Encoding": self.ENCODING, "Data": compressed, "Size": len(encoded)}
+
+    def pack(self, product):
+        """
+        Replace the large descriptions of a product with their stored form
+
+        Arguments:
+            product {dict} -- The product values
+
+        Returns:
+            None
+
+        """
+        for description in product.get("Descriptions") or []:
+            for key, value in description.items():
+                if key != "Metadata":
+                    description[key] = self.pack_value(value)
+
+    def unpack_value(self, value, lazy=True):
+        """
+        Get the description of a stored form
+
+        Arguments:
+            value {str|dict} -- The stored form of the description
+            lazy {Bool} -- Whether the blob store descriptions are read when they are first used
+
+        Returns:
+            {str|object} -- The description, or a LazyBlob for a lazy blob store description
+
+        """
+        if not isinstance(value, dict) or value.get("Encoding") != self.ENCODING:
+            return value
+        if value.get("BlobKey"):
+            blob = LazyBlob(blob_store=self.blob_store, key=value.get("BlobKey"))
+            return blob if lazy else blob.load()
+        data = value.get("Data")
+        data = getattr(data, "value", data)  # boto3 reads binary attributes as Binary objects
+        return zlib.decompress(bytes(data)).decode("utf-8")
+
+    def unpack(self, product, lazy=True):
+        """
+        Get a copy of a product with its descriptions restored
+
+        Arguments:
+            product {dict} -- The product item
+            lazy {Bool} -- Whether the blob store descriptions are read when they are first used
+
+        Returns:
+            unpacked {dict} -- The product with the restored descriptions
+
+        """
+        unpacked = dict(product)
+        if product.get("Descriptions") is not None:
+            unpacked["Descriptions"] = [
+                {
+                    key: value if key == "Metadata" else self.unpack_value(value, lazy)
+                    for key, value in description.items()
+                }
+                for description in product.get("Descriptions")
+            ]
+        return unpacked
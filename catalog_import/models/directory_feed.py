@@ -0,0 +1,250 @@
+import glob
+import json
+import os
+import queue
+from collections import deque
+from threading import Event, Lock, Thread
+from .file_manager import FileManager
+
+
+class ProcessedFiles:
+    """
+    A class used to represent the files of a directory feed already processed, by filepath, size and modification time
+    ...
+
+    The processed files are appended to an NDJSON log, one line per file, so marking a file does not rewrite the log.
+    The log is compacted when it is loaded with more than twice as many lines as files. A file changed since it was
+    processed, with another size or modification time, is processed again.
+
+    Attributes:
+        filepath {string} -- The filepath of the NDJSON log
+        files {dict} -- The size and modification time in nanoseconds of each processed file
+
+    Methods:
+        load() -- Load the processed files from the log
+        processed(filepath, stat) -- Check if a file was processed
+        mark(filepath, stat) -- Record a processed file
+
+    """
+    def __init__(self, **kwargs) -> None:
+        """
+        Parameters:
+            filepath {string} -- The filepath of the NDJSON log
+
+        """
+        self.filepath = kwargs.get("filepath")
+        self.files = {}
+        self.lock = Lock()
+        self.load()
+
+    def load(self):
+        """
+        Load the processed files from the log, compacting it if most of its lines are outdated
+
+        Returns:
+            None
+
+        """
+        if not os.path.isfile(self.filepath):
+            return
+        lines = 0
+        with open(self.filepath, encoding="utf-8") as file:
+            for line in file:
+                if line.strip():
+                    entry = json.loads(line)
+                    self.files[entry["File"]] = (entry["Size"], entry["Mtime"])
+                    lines += 1
+        if lines > 2 * len(self.files):
+            temporary_filepath = "%s.%s.tmp" % (self.filepath, os.getpid())
+            with open(temporary_filepath, "w", encoding="utf-8") as file:
+                for filepath, (size, mtime) in self.files.items():
+                    file.write(json.dumps({"File": filepath, "Size": size, "Mtime": mtime}) + "\n")
+            os.replace(temporary_filepath, self.filepath)
+
+    def processed(self, filepath, stat):
+        """
+        Check if a file was processed with the same size and modification time
+
+        Arguments:
+            filepath {string} -- The filepath of the file
+            stat {object} -- The status of the file
+
+        Returns:
+            {Bool} -- True if the file was processed and did not change since
+
+        """
+        return self.files.get(filepath) == (stat.st_size, stat.st_mtime_ns)
+
+    def mark(self, filepath, stat):
+        """
+        Record a processed file
+
+        Arguments:
+            filepath {string} -- The filepath of the file
+            stat {object} -- The status of the file when it was read
+
+        Returns:
+            None
+
+        """
+        with self.lock:
+            self.files[filepath] = (stat.st_size, stat.st_mtime_ns)
+            directory = os.path.dirname(self.filepath)
+            if directory:
+                os.makedirs(directory, exist_ok=True)
+            with open(self.filepath, "a", encoding="utf-8") as file:
+                file.write(json.dumps({"File": filepath, "Size": stat.st_size, "Mtime": stat.st_mtime_ns}) + "\n")
+
+
+class DirectoryFeed:
+    """
+    A class used to represent a feed split in many files, like per-product files or daily delta files of a directory
+    ...
+
+    The files are the files of a directory matching `pattern`, or the files matching a glob, in the order of their
+    filepaths. The files already processed are skipped. Up to `workers` files are read and parsed at the same time,
+    each by its own thread into a queue of `queue_size` records, and their records are yielded file after file in the
+    order of the files, so the products are written in the same order on every run. A file is recorded as processed
+    once every one of its records was consumed; a file that fails to be read, or has no records, is reported and left to
+    the next run. A XML file whose root element is a record, like a file per product, is a single record.
+
+    Attributes:
+        filepath {string} -- The directory, or a glob like "exports/*.xml.gz"
+        pattern {string} -- The glob of the files of a directory
+        workers {int} -- The number of files read at the same time
+        queue_size {int} -- The number of records of a file buffered ahead of the consumer
+        processed_files {object} -- The files already processed, or None to read every file
+        file_manager_kwargs {dict} -- The keyword arguments of the file manager of each file
+        stats {dict} -- The files found, skipped, read, failed and without records
+
+    Methods:
+        files() -- Get the files to read
+        file_records(filepath) -- Get the records of a file
+        records() -- Yield the records of every file
+
+    """
+    def __init__(self, **kwargs) -> None:
+        """
+        Parameters:
+            filepath {string} -- The directory, or a glob like "exports/*.xml.gz"
+            pattern {string} -- The glob of the files of a directory, every file if not set
+            workers {int} -- The number of files read at the same time
+            queue_size {int} -- The number of records of a file buffered ahead of the consumer
+            processed_files {object} -- The files already processed, or None to read every file
+            file_manager_kwargs {dict} -- The keyword arguments of the file manager of each file
+
+        """
+        self.filepath = kwargs.get("filepath")
+        self.pattern = kwargs.get("pattern") or "*"
+        self.workers = kwargs.get("workers") or 4
+        self.queue_size = kwargs.get("queue_size") or 100
+        self.processed_files = kwargs.get("processed_files")
+        self.file_manager_kwargs = kwargs.get("file_manager_kwargs") or {}
+        self.stats = {"found": 0, "skipped": 0, "read": 0, "failed": 0, "empty": 0}
+
+    def files(self):
+        """
+        Get the files to read, sorted by filepath, without the files already processed
+
+        Returns:
+            files {list} -- The filepath and status of each file
+
+        """
+        pattern = os.path.join(self.filepath, self.pattern) if os.path.isdir(self.filepath) else self.filepath
+        files = []
+        for filepath in sorted(glob.glob(pattern, recursive=True)):
+            if not os.path.isfile(filepath):
+                continue
+            filepath = os.path.abspath(filepath)
+            stat = os.stat(filepath)
+            self.stats["found"] += 1
+            if self.processed_files is not None and self.processed_files.processed(filepath, stat):
+                self.stats["skipped"] += 1
+                continue
+            files.append((filepath, stat))
+        return files
+
+    def file_records(self, filepath):
+        """
+        Get the records of a file, through a file manager with the options of the provider
+
+        Arguments:
+            filepath {string} -- The filepath of the file
+
+        Returns:
+            {iterable} -- The records of the file, none if its format is not supported
+
+        """
+        file_manager = FileManager(filepath=filepath, **self.file_manager_kwargs)
+        response = file_manager.parse_file_response()
+        return [] if isinstance(response, dict) else response
+
+    def records(self):
+        """
+        Yield the records of every file, in the order of the files, while the next files are read in parallel
+
+        Returns:
+            {generator} -- The records of the files
+
+        """
+        files = deque(self.files())
+        stop = Event()
+        end = object()
+        pending = deque()
+
+        def read(filepath, records):
+            def put(value):
+                while not stop.is_set():
+                    try:
+                        records.put(value, timeout=0.1)
+                        return True
+                    except queue.Full:
+                        continue
+                return False
+
+            try:
+                file_records = self.file_records(filepath)
+                for record in file_records:
+                    if not put(record):
+                        break
+                else:
+                    put(end)
+                if hasattr(file_records, "close"):
+                    file_records.close()
+            except Exception as error:
+                put(error)
+
+        def submit():
+            filepath, stat = files.popleft()
+            records = queue.Queue(maxsize=self.queue_size)
+            Thread(target=read, args=(filepath, records), daemon=True).start()
+            pending.append((filepath, stat, records))
+
+        try:
+            while files and len(pending) < self.workers:
+                submit()
+            while pending:
+                filepath, stat, records = pending.popleft()
+                count = 0
+                while True:
+                    record = records.get()
+                    if record is end and not count:
+                        self.stats["empty"] += 1
+                        print("File Without Records: ", filepath)
+                        break
+                    if record is end:
+                        self.stats["read"] += 1
+                        if self.processed_files is not None:
+                            self.processed_files.mark(filepath, stat)
+                        break
+                    if isinstance(record, Exception):
+                        self.stats["failed"] += 1
+                        print("File Not Read: ", filepath, record)
+                        break
+                    count += 1
+                    yield record
+                if files:
+                    submit()
+        finally:
+            stop.set()
+            print("Directory Files: ", self.filepath, self.stats)
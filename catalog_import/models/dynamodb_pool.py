@@ -0,0 +1,237 @@
+import threading
+import time
+from collections import deque
+import boto3
+from botocore.config import Config
+
+
+class PooledTable:
+    """
+    A class used to represent a db table shared by many threads, each using the table of its own pooled client
+    ...
+
+    The table is used like a boto3 Table: every attribute, like `put_item`, `scan` or `batch_writer`, is the attribute
+    of the Table of the calling thread, created on the first use of the thread. The name of the table needs no request.
+
+    Attributes:
+        pool {object} -- The DynamoDB pool
+        name {string} -- The name of the table
+
+    """
+    def __init__(self, **kwargs) -> None:
+        """
+        Parameters:
+            pool {object} -- The DynamoDB pool
+            name {string} -- The name of the table
+
+        """
+        self.pool = kwargs.get("pool")
+        self.name = kwargs.get("name")
+
+    def __getattr__(self, attribute):
+        return getattr(self.pool.table(self.name), attribute)
+
+
+class DynamoDBPool:
+    """
+    A class used to represent the DynamoDB clients of the threads of a run, created from one session
+    ...
+
+    boto3 resources and tables are not thread-safe, so every thread, like a provider thread or a worker of a parallel
+    scan, gets its own resource and low-level client, created once from the shared session under a lock since the
+    session is not thread-safe either. The clients keep their connections alive up to `max_pool_connections` each, and
+    retry the throttled and failed requests with the `retry_mode` retries of botocore, up to `max_attempts` attempts.
+
+    The pool is used like the boto3 DynamoDB resource, through `Table` and `batch_get_item`. The requests in flight of
+    every client are limited to `max_pool_connections` together, so the threads wait for a free connection instead of
+    opening and dropping connections past the pool, in the order they asked for one, and the time waited is measured.
+    A connection is held from the start of a request to its response, over the retries of the request.
+
+    Attributes:
+        region_name {string} -- The region of the tables, the region of the environment if not set
+        endpoint_url {string} -- The endpoint of DynamoDB, like a local DynamoDB, the AWS endpoint if not set
+        max_pool_connections {int} -- The connections kept alive and the requests in flight of the run
+        config {object} -- The botocore configuration of the clients
+        session {object} -- The boto3 session of the clients
+        stats {dict} -- The clients created, requests, requests that waited, and seconds waited for a connection
+
+    Methods:
+        resource() -- Get the DynamoDB resource of the calling thread
+        client() -- Get the low-level client of the calling thread
+        table(name) -- Get the Table of the calling thread
+        Table(name) -- Get a table shared by the threads
+        batch_get_item(**kwargs) -- Get items of many tables
+        acquire(context) -- Wait for a connection before a request
+        release(context) -- Free the connection of a request
+        metrics() -- Get the pool statistics
+
+    """
+    def __init__(self, **kwargs) -> None:
+        """
+        Parameters:
+            region_name {string} -- The region of the tables, the region of the environment if not set
+            endpoint_url {string} -- The endpoint of DynamoDB, the AWS endpoint if not set
+            max_pool_connections {int} -- The connections kept alive and the requests in flight of the run
+            tcp_keepalive {Bool} -- Whether the TCP keep-alive probes are sent on idle connections
+            retry_mode {string} -- The botocore retry mode, "standard" or "adaptive"
+            max_attempts {int} -- The maximum attempts of a request, with the first one
+            connect_timeout {float} -- The seconds to open a connection
+            read_timeout {float} -- The seconds to wait for a response
+
+        """
+        self.region_name = kwargs.get("region_name") or None
+        self.endpoint_url = kwargs.get("endpoint_url") or None
+        self.max_pool_connections = kwargs.get("max_pool_connections") or 50
+        self.config = Config(
+            max_pool_connections=self.max_pool_connections,
+            tcp_keepalive=kwargs.get("tcp_keepalive", True),
+            retries={"mode": kwargs.get("retry_mode") or "standard", "max_attempts": kwargs.get("max_attempts") or 3},
+            connect_timeout=kwargs.get("connect_timeout") or 5,
+            read_timeout=kwargs.get("read_timeout") or 30,
+        )
+        self.session = boto3.session.Session(region_name=self.region_name)
+        self.stats = {"clients": 0, "requests": 0, "waited": 0, "wait_seconds": 0.0, "max_wait_seconds": 0.0}
+        self.available = self.max_pool_connections
+        self.waiting = deque()
+        self.condition = threading.Condition()
+        self.lock = threading.Lock()
+        self.local = threading.local()
+
+    def resource(self):
+        """
+        Get the DynamoDB resource of the calling thread, created on its first use
+
+        Returns:
+            {object} -- The DynamoDB resource
+
+        """
+        resource = getattr(self.local, "resource", None)
+        if resource is None:
+            with self.lock:
+                resource = self.session.resource("dynamodb", endpoint_url=self.endpoint_url, config=self.config)
+                self.stats["clients"] += 1
+            events = resource.meta.client.meta.events
+            events.register("before-call.dynamodb", self.acquire)
+            events.register("after-call.dynamodb", self.release)
+            events.register("after-call-error.dynamodb", self.release)
+            self.local.resource = resource
+            self.local.tables = {}
+        return resource
+
+    def client(self):
+        """
+        Get the low-level client of the calling thread, the client of its resource
+
+        Returns:
+            {object} -- The DynamoDB client
+
+        """
+        return self.resource().meta.client
+
+    def table(self, name):
+        """
+        Get the Table of the calling thread
+
+        Arguments:
+            name {string} -- The name of the table
+
+        Returns:
+            {object} -- The boto3 Table of the thread
+
+        """
+        resource = self.resource()
+        if name not in self.local.tables:
+            self.local.tables[name] = resource.Table(name)
+        return self.local.tables[name]
+
+    def Table(self, name):
+        """
+        Get a table shared by the threads, like the Table of a boto3 resource
+
+        Arguments:
+            name {string} -- The name of the table
+
+        Returns:
+            {object} -- The pooled table
+
+        """
+        return PooledTable(pool=self, name=name)
+
+    def batch_get_item(self, **kwargs):
+        """
+        Get items of many tables with the client of the calling thread
+
+        Arguments:
+            **kwargs: Keyword arguments of the request
+
+        Returns:
+            {dict} -- The response
+
+        """
+        return self.resource().batch_get_item(**kwargs)
+
+    def acquire(self, context, **kwargs):
+        """
+        Wait for a connection of the pool before a request, after the requests waiting before it, and measure the
+        time waited
+
+        Arguments:
+            context {dict} -- The context of the request
+            **kwargs: Keyword arguments of the event
+
+        Returns:
+            None
+
+        """
+        started = time.monotonic()
+        with self.condition:
+            if self.available and not self.waiting:
+                self.available -= 1
+            else:
+                ticket = object()
+                self.waiting.append(ticket)
+                while self.waiting[0] is not ticket or not self.available:
+                    self.condition.wait()
+                self.waiting.popleft()
+                self.available -= 1
+                self.condition.notify_all()
+        waited = time.monotonic() - started
+        context["pool_connection"] = True
+        with self.lock:
+            self.stats["requests"] += 1
+            self.stats["wait_seconds"] += waited
+            if waited > 0.001:
+                self.stats["waited"] += 1
+            self.stats["max_wait_seconds"] = max(self.stats["max_wait_seconds"], waited)
+
+    def release(self, context, **kwargs):
+        """
+        Free the connection of a request, once it answered or failed
+
+        Arguments:
+            context {dict} -- The context of the request
+            **kwargs: Keyword arguments of the event
+
+        Returns:
+            None
+
+        """
+        if context.pop("pool_connection", False):
+            with self.condition:
+                self.available += 1
+                self.condition.notify_all()
+
+    def metrics(self):
+        """
+        Get the pool statistics
+
+        Returns:
+            {dict} -- The clients created, requests, requests that waited, and total, mean and maximum seconds waited
+
+        """
+        with self.lock:
+            metrics = dict(self.stats)
+        metrics["mean_wait_seconds"] = metrics["wait_seconds"] / metrics["requests"] if metrics["requests"] else 0.0
+        for key in ("wait_seconds", "max_wait_seconds", "mean_wait_seconds"):
+            metrics[key] = round(metrics[key], 4)
+        return metrics
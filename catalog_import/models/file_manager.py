@@ -1,6 +1,15 @@
+import bz2
+import csv
+import gzip
+import io
+import json
 import os
+import queue
+import zipfile
 import xmltodict
-import xml.etree.ElementTree as ET
+from xml.parsers import expat
+from threading import Event, Thread
+from .xml_offset_index import XmlOffsetIndex
 
 
 class FileManager:
@@ -10,20 +19,86 @@ class FileManager:
 
     Attributes:
         filepath {string} -- The filepath of the file
+        archive_member {string} -- The member to read when the file is a zip archive
+        file_format {string} -- The format of the content, inferred from the extension if not set
+        encoding {string} -- The text encoding of JSON, NDJSON and CSV files
+        csv_delimiter {string} -- The delimiter of CSV files
+        csv_list_separator {string} -- The separator splitting CSV cells into lists, if any
+        chunk_size {int} -- The number of characters read at a time from JSON files
+        stream {object} -- A binary file object read instead of the filepath, like a remote feed being downloaded
+        xml_item_name {string} -- The XML element yielded as a record, the whole XML is converted to a dict if not set
+        xml_item_depth {int} -- The depth of the XML records, 2 for the children of the root element, found from the root
+            element of the file if not set
+        xml_projection {list} -- The XML element paths to build, like "Description/ProductName", relative to the
+            records or to the document when the whole XML is converted; every other element is skipped
+        queue_size {int} -- The number of parsed XML records buffered ahead of the consumer
+        xml_range {list} -- The start and stop positions of the XML records to read through the offset index
+        xml_start_mpn {string} -- The MPN of the XML record to resume at through the offset index
+        xml_index_filepath {string} -- The filepath of the sidecar offset index, next to the file if not set
 
     Methods:
         file_exists() -- Check if a file exists
+        compression() -- Get the compression format of the file
+        member_name(archive) -- Get the name of the member to read from a zip archive
+        content_format() -- Get the format of the uncompressed content
+        record_projection(projection) -- Get the document paths of a projection relative to the records
+        open_file() -- Open the file as a decompressed binary stream
+        open_text_file() -- Open the file as a decompressed text stream
+        item_depth() -- Get the depth of the XML records
         xml_to_dict() -- Parse the XML file and create a dictionary
+        xml_records() -- Yield the records of a XML file one at a time
+        xml_range_records() -- Yield a range of records of a XML file through its offset index
+        json_records() -- Yield the records of a JSON array file one at a time
+        ndjson_records() -- Yield the records of a NDJSON file one at a time
+        unflatten_record(row) -- Convert a CSV row with dotted column names to a nested record
+        csv_records() -- Yield the records of a CSV file one at a time
         parse_file_response() -- Main method to parse the file
 
     """
+    COMPRESSIONS = (".gz", ".bz2", ".zip")
+    FORMATS = {
+        ".xml": "xml",
+        ".json": "json",
+        ".ndjson": "ndjson",
+        ".jsonl": "ndjson",
+        ".csv": "csv",
+    }
+
     def __init__(self, **kwargs) -> None:
         """
         Parameters:
             filepath {string} -- The filepath of the file
+            archive_member {string} -- The member to read when the file is a zip archive
+            file_format {string} -- The format of the content: xml, json, ndjson or csv
+            encoding {string} -- The text encoding of JSON, NDJSON and CSV files
+            csv_delimiter {string} -- The delimiter of CSV files
+            csv_list_separator {string} -- The separator splitting CSV cells into lists, if any
+            chunk_size {int} -- The number of characters read at a time from JSON files
+            stream {object} -- A binary file object read instead of the filepath
+            xml_item_name {string} -- The XML element yielded as a record
+            xml_item_depth {int} -- The depth of the XML records
+            xml_projection {list} -- The XML element paths to build, every element is built if not set
+            queue_size {int} -- The number of parsed XML records buffered ahead of the consumer
+            xml_range {list} -- The start and stop positions of the XML records to read, every record if not set
+            xml_start_mpn {string} -- The MPN of the XML record to resume at
+            xml_index_filepath {string} -- The filepath of the sidecar offset index
 
         """
         self.filepath = kwargs.get("filepath", False)
+        self.archive_member = kwargs.get("archive_member", False)
+        self.file_format = kwargs.get("file_format") or False
+        self.encoding = kwargs.get("encoding") or "utf-8-sig"
+        self.csv_delimiter = kwargs.get("csv_delimiter") or ","
+        self.csv_list_separator = kwargs.get("csv_list_separator") or False
+        self.chunk_size = kwargs.get("chunk_size") or 65536
+        self.stream = kwargs.get("stream")
+        self.xml_item_name = kwargs.get("xml_item_name") or False
+        self.xml_item_depth = kwargs.get("xml_item_depth") or False
+        self.xml_projection = kwargs.get("xml_projection") or None
+        self.queue_size = kwargs.get("queue_size") or 100
+        self.xml_range = kwargs.get("xml_range") or False
+        self.xml_start_mpn = kwargs.get("xml_start_mpn") or False
+        self.xml_index_filepath = kwargs.get("xml_index_filepath") or False
 
     def file_exists(self):
         """
@@ -35,29 +110,348 @@ class FileManager:
         """
         return os.path.isfile(self.filepath)
 
+    def compression(self):
+        """
+        Get the compression format of the file based on its extension
+
+        Returns:
+            {string} -- The compression extension, or an empty string if the file is not compressed
+
+        """
+        extension = os.path.splitext(self.filepath)[1].lower()
+        return extension if extension in self.COMPRESSIONS else ""
+
+    def member_name(self, archive):
+        """
+        Get the name of the member to read from a zip archive
+
+        Arguments:
+            archive {object} -- The zip archive
+
+        Returns:
+            {string} -- The configured member, or the first file in the archive
+
+        """
+        if self.archive_member:
+            return self.archive_member
+        members = [member.filename for member in archive.infolist() if not member.is_dir()]
+        if not members:
+            raise ValueError("The archive %s has no files" % self.filepath)
+        return members[0]
+
+    def content_format(self):
+        """
+        Get the format of the uncompressed content, either configured or based on the file or archive member name
+
+        Returns:
+            {string} -- The format of the content, like "xml", or its extension if it is not supported
+
+        """
+        if self.file_format:
+            return self.file_format
+        name = self.filepath or ""
+        if self.compression() == ".zip":
+            with zipfile.ZipFile(self.filepath) as archive:
+                name = self.member_name(archive)
+        elif self.compression():
+            name = os.path.splitext(name)[0]
+        extension = os.path.splitext(name)[1].lower()
+        return self.FORMATS.get(extension, extension)
+
+    @staticmethod
+    def record_projection(projection):
+        """
+        Get the document paths of a projection, like "Products/Product/MPN", relative to the records, like "MPN", for
+        a XML file of a provider converting the whole XML whose records are streamed instead
+
+        Arguments:
+            projection {list} -- The element paths relative to the document
+
+        Returns:
+            {list} -- The element paths relative to the records, or None to build every element
+
+        """
+        if not projection:
+            return None
+        return [path.strip("/").split("/", 2)[2] for path in projection if path.strip("/").count("/") >= 2]
+
+    def open_file(self):
+        """
+        Open the file as a binary stream, decompressing it on the fly without a temporary copy
+
+        Returns:
+            {object} -- A binary file object with the uncompressed content
+
+        """
+        if self.stream is not None:
+            return self.stream
+        compression = self.compression()
+        if compression == ".gz":
+            return gzip.open(self.filepath, "rb")
+        if compression == ".bz2":
+            return bz2.open(self.filepath, "rb")
+        if compression == ".zip":
+            archive = zipfile.ZipFile(self.filepath)
+            member = archive.open(self.member_name(archive))
+            archive.close()  # The member keeps the underlying file open until it is closed
+            return member
+        return open(self.filepath, "rb")
+
+    def open_text_file(self):
+        """
+        Open the file as a text stream, decompressing it on the fly
+
+        Returns:
+            {object} -- A text file object with the uncompressed content
+
+        """
+        return io.TextIOWrapper(self.open_file(), encoding=self.encoding, newline="")
+
+    def item_depth(self):
+        """
+        Get the depth of the XML records: `xml_item_depth` if set, 1 if the root element of the file is a record, like in
+        a file per product, and 2 otherwise, for the children of the root element
+
+        Returns:
+            {int} -- The depth of the XML records
+
+        """
+        if self.xml_item_depth:
+            return self.xml_item_depth
+        if self.stream is not None:  # A stream is read once
+            return 2
+        root = []
+        parser = expat.ParserCreate()
+        parser.StartElementHandler = lambda name, attributes: root.append(name)
+        try:
+            with self.open_file() as file:
+                while not root:
+                    chunk = file.read(4096)
+                    parser.Parse(chunk, not chunk)
+                    if not chunk:
+                        break
+        except expat.ExpatError:  # Reported by the parsing of the records
+            return 2
+        return 1 if root and root[0] == self.xml_item_name else 2
+
     def xml_file_to_dict(self):
         """
-        Parse the XML file to convert it to a dictionary
+        Parse the XML file to convert it to a dictionary, streaming the file into the parser
 
         Returns:
             {dict} -- The XML converted to a dictonary
 
         """
-        tree = ET.parse(self.filepath)
-        root = tree.getroot()
-        xmlstr = ET.tostring(root, encoding="utf-8", method="xml")
-        return xmltodict.parse(xmlstr)
+        with self.open_file() as file:
+            return xmltodict.parse(file, projection=self.xml_projection)
+
+    def xml_records(self):
+        """
+        Yield the `xml_item_name` elements of a XML file one at a time.
+
+        The parser runs in its own thread and hands each record over a bounded queue, so reading and parsing the file
+        overlap with the processing of the records and only `queue_size` records are held in memory.
+
+        Returns:
+            {generator} -- The records of the file
+
+        """
+        item_depth = self.item_depth()
+        records = queue.Queue(maxsize=self.queue_size)
+        stop = Event()
+        end = object()
+
+        def put(value):
+            while not stop.is_set():
+                try:
+                    records.put(value, timeout=0.1)
+                    return True
+                except queue.Full:
+                    continue
+            return False
+
+        def handle_item(path, item):
+            name, attributes = path[-1]
+            if name != self.xml_item_name:
+                return True
+            if attributes:  # The attributes of the item element are only kept in the path
+                record = {"@" + key: value for key, value in attributes.items()}
+                if isinstance(item, dict):
+                    record.update(item)
+                elif item is not None:
+                    record["#text"] = item
+                item = record
+            return put(item)
+
+        def parse():
+            try:
+                with self.open_file() as file:
+                    xmltodict.parse(
+                        file,
+                        item_depth=item_depth,
+                        item_callback=handle_item,
+                        projection=self.xml_projection,
+                    )
+                put(end)
+            except xmltodict.ParsingInterrupted:
+                pass
+            except Exception as error:
+                put(error)
+
+        Thread(target=parse, daemon=True).start()
+        try:
+            while True:
+                record = records.get()
+                if record is end:
+                    return
+                if isinstance(record, Exception):
+                    raise record
+                yield record
+        finally:
+            stop.set()
+
+    def xml_range_records(self):
+        """
+        Yield the `xml_item_name` elements of a range of an uncompressed XML file, read directly from their byte
+        offsets in the sidecar index of the file, which is built on first use
+
+        Returns:
+            {generator} -- The records of the range
+
+        """
+        offset_index = XmlOffsetIndex(
+            filepath=self.filepath,
+            index_filepath=self.xml_index_filepath,
+            item_name=self.xml_item_name,
+        ).open()
+        start, stop = self.xml_range or (0, None)
+        if self.xml_start_mpn:
+            position = offset_index.position(self.xml_start_mpn)
+            if position is None:
+                raise ValueError("The MPN %s is not in the XML file %s" % (self.xml_start_mpn, self.filepath))
+            start = max(start, position)
+        try:
+            yield from offset_index.records(start, stop, self.xml_projection)
+        finally:
+            offset_index.close()
+
+    def json_records(self):
+        """
+        Yield the records of a JSON file whose top level is an array, decoding one record at a time so the memory
+        used is bounded by the largest record and not by the file
+
+        Returns:
+            {generator} -- The records of the array
+
+        """
+        decoder = json.JSONDecoder()
+        with self.open_text_file() as file:
+            buffer = file.read(self.chunk_size).lstrip()
+            if not buffer.startswith("["):
+                raise ValueError("The JSON file %s is not an array of records" % self.filepath)
+            position = 1
+            end_of_file = False
+            while True:
+                while position < len(buffer) and buffer[position] in " \t\r\n,":
+                    position += 1
+                if position < len(buffer) and buffer[position] == "]":
+                    return
+                try:
+                    record, record_end = decoder.raw_decode(buffer, position)
+                except json.JSONDecodeError:
+                    if end_of_file:
+                        raise
+                    record_end = None
+                if record_end is not None and (record_end < len(buffer) or end_of_file):
+                    yield record
+                    position = record_end
+                    continue
+                # The record is incomplete, keep the unread part and read at least as much as is buffered
+                buffer = buffer[position:]
+                position = 0
+                chunk = file.read(max(self.chunk_size, len(buffer)))
+                end_of_file = not chunk
+                if end_of_file and not buffer.strip():
+                    raise ValueError("The JSON file %s ended before the array was closed" % self.filepath)
+                buffer += chunk
+
+    def ndjson_records(self):
+        """
+        Yield the records of a NDJSON file, one JSON document per line
+
+        Returns:
+            {generator} -- The records of the file
+
+        """
+        with self.open_text_file() as file:
+            for line in file:
+                line = line.strip()
+                if line:
+                    yield json.loads(line)
+
+    def unflatten_record(self, row):
+        """
+        Convert a CSV row with dotted column names, like "Category.CategoryName", to a nested record, leaving out the
+        empty cells
+
+        Arguments:
+            row {dict} -- The CSV row
+
+        Returns:
+            record {dict} -- The nested record
+
+        """
+        record = {}
+        for column, value in row.items():
+            if column is None or value is None or value == "":
+                continue
+            if self.csv_list_separator and self.csv_list_separator in value:
+                value = value.split(self.csv_list_separator)
+            keys = column.split(".")
+            node = record
+            for key in keys[:-1]:
+                node = node.setdefault(key, {})
+            node[keys[-1]] = value
+        return record
+
+    def csv_records(self):
+        """
+        Yield the records of a CSV file with a header row, one row at a time
+
+        Returns:
+            {generator} -- The records of the file
+
+        """
+        with self.open_text_file() as file:
+            for row in csv.DictReader(file, delimiter=self.csv_delimiter):
+                yield self.unflatten_record(row)
 
     def parse_file_response(self):
         """
         Main method to parse the file
 
+        XML files are converted to a dictionary, unless `xml_item_name` is set. Streamed XML, JSON, NDJSON and CSV files
+        return a generator of records that is consumed by the products parser one record at a time. A range of an
+        uncompressed XML file, or the records from an MPN on, are read through the offset index of the file.
+
         Returns:
-            response_dict {dict} -- The response file converted to a dictionary
+            response {dict|generator} -- The response file converted to a dictionary, or the generator of its records
 
         """
-        if self.filepath.endswith(".xml"):  # If the file is an XML
+        content_format = self.content_format()
+        indexed = (self.xml_range or self.xml_start_mpn) and self.stream is None and not self.compression()
+        if content_format == "xml" and self.xml_item_name and indexed:  # If a range of the XML records is read
+            response = self.xml_range_records()
+        elif content_format == "xml" and self.xml_item_name:  # If the XML records are streamed one at a time
+            response = self.xml_records()
+        elif content_format == "xml":  # If the file is an XML, compressed or not
             response = self.xml_file_to_dict()
-        else:  # TODO: Add more functions in order to manage different file types
+        elif content_format == "json":
+            response = self.json_records()
+        elif content_format == "ndjson":
+            response = self.ndjson_records()
+        elif content_format == "csv":
+            response = self.csv_records()
+        else:
             response = {}
         return response
@@ -0,0 +1,219 @@
+import json
+import os
+import time
+from concurrent.futures import ThreadPoolExecutor, wait
+from threading import Lock
+import requests
+from requests.adapters import HTTPAdapter
+
+
+def image_urls(gallery):
+    """
+    Get the image URLs of a product gallery
+
+    Arguments:
+        gallery {list} -- The gallery of the product, with the image links of each provider in "Value"
+
+    Returns:
+        urls {list} -- The image URLs, without duplicates
+
+    """
+    urls = []
+    for entry in gallery or []:
+        values = entry.get("Value") or []
+        for value in values if isinstance(values, list) else [values]:
+            url = value.get("@url") or value.get("#text") if isinstance(value, dict) else value
+            if isinstance(url, str) and url.startswith(("http://", "https://")) and url not in urls:
+                urls.append(url)
+    return urls
+
+
+class GalleryChecker:
+    """
+    A class used to represent the verification of the gallery images of the products
+    ...
+
+    The images are checked with HEAD requests on a pool of worker threads sharing a pooled HTTP session, so the
+    upsert path only queues the URLs. A URL shared by several products is requested once, and the results are kept in
+    a cache file between runs. The results of a product whose images are all known are returned at once; otherwise
+    they are passed to the callback of the product when its last image is checked, on the worker thread. When too many
+    checks are pending the new ones are skipped, instead of making the import wait; their URLs are checked by a later
+    run.
+
+    Attributes:
+        workers {int} -- The number of concurrent requests
+        timeout {float} -- The timeout of a request, in seconds
+        max_pending {int} -- The maximum number of URLs waiting to be checked
+        cache_filepath {string} -- The filepath of the results cache
+        max_age {int} -- The seconds a cached result stays valid
+        results {dict} -- The results by URL
+        stats {dict} -- The checked, cached, failed and skipped URLs
+
+    Methods:
+        load() -- Load the results cache
+        save() -- Save the results cache
+        check_url(url) -- Request the metadata of an image
+        check(urls, callback) -- Check the images of a product without waiting
+        close() -- Wait for the pending checks and save the results cache
+
+    """
+    def __init__(self, **kwargs) -> None:
+        """
+        Parameters:
+            workers {int} -- The number of concurrent requests
+            timeout {float} -- The timeout of a request, in seconds
+            max_pending {int} -- The maximum number of URLs waiting to be checked
+            cache_filepath {string} -- The filepath of the results cache, or False to keep the results in memory only
+            max_age {int} -- The seconds a cached result stays valid
+            session {object} -- The HTTP session, created with a connection pool per worker if not given
+
+        """
+        self.workers = kwargs.get("workers") or 16
+        self.timeout = kwargs.get("timeout") or 10
+        self.max_pending = kwargs.get("max_pending") or 10000
+        self.cache_filepath = kwargs.get("cache_filepath")
+        self.max_age = kwargs.get("max_age") or 86400
+        self.session = kwargs.get("session") or requests.Session()
+        if not kwargs.get("session"):
+            adapter = HTTPAdapter(pool_connections=self.workers, pool_maxsize=self.workers)
+            self.session.mount("http://", adapter)
+            self.session.mount("https://", adapter)
+        self.executor = ThreadPoolExecutor(max_workers=self.workers, thread_name_prefix="gallery")
+        self.pending = {}
+        self.results = {}
+        self.stats = {"checked": 0, "cached": 0, "failed": 0, "skipped": 0}
+        self.lock = Lock()
+        self.load()
+
+    def load(self):
+        """
+        Load the results cache, ignoring the results older than the maximum age
+
+        Returns:
+            None
+
+        """
+        if not self.cache_filepath or not os.path.isfile(self.cache_filepath):
+            return
+        with open(self.cache_filepath, encoding="utf-8") as file:
+            results = json.load(file)
+        now = time.time()
+        self.results = {url: result for url, result in results.items() if now - result.get("Checked", 0) < self.max_age}
+
+    def save(self):
+        """
+        Save the results cache, replacing it atomically
+
+        Returns:
+            None
+
+        """
+        if not self.cache_filepath:
+            return
+        with self.lock:
+            results = dict(self.results)
+        directory = os.path.dirname(self.cache_filepath)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        temporary_filepath = "%s.%s.tmp" % (self.cache_filepath, os.getpid())
+        with open(temporary_filepath, "w", encoding="utf-8") as file:
+            json.dump(results, file)
+        os.replace(temporary_filepath, self.cache_filepath)
+
+    def check_url(self, url):
+        """
+        Request the metadata of an image with a HEAD request, or with a streamed GET request if the server does not
+        allow HEAD requests
+
+        Arguments:
+            url {str} -- The image URL
+
+        Returns:
+            result {dict} -- The status code, content type and size of the image, with the time of the check
+
+        """
+        try:
+            response = self.session.head(url, allow_redirects=True, timeout=self.timeout)
+            if response.status_code in (405, 501):
+                response = self.session.get(url, stream=True, timeout=self.timeout)
+                response.close()
+            size = response.headers.get("Content-Length")
+            result = {
+                "Status": response.status_code,
+                "ContentType": response.headers.get("Content-Type"),
+                "Size": int(size) if size and size.isdigit() else None,
+            }
+        except requests.exceptions.RequestException as error:
+            result = {"Status": None, "ContentType": None, "Size": None, "Error": type(error).__name__}
+        result["Checked"] = time.time()
+        with self.lock:
+            self.results[url] = result
+            self.pending.pop(url, None)
+            self.stats["checked"] += 1
+            if result.get("Status") != 200:
+                self.stats["failed"] += 1
+        return result
+
+    def check(self, urls, callback=None):
+        """
+        Check the images of a product without waiting. If some images are not known yet, the callback gets the
+        results by URL once every image is checked; it is not called if a check is skipped.
+
+        Arguments:
+            urls {list} -- The image URLs of the product
+            callback {function} -- The function getting the results by URL
+
+        Returns:
+            {dict} -- The results by URL if every image is already known, or None
+
+        """
+        results = {}
+        futures = {}
+        with self.lock:
+            for url in urls:
+                if url in self.results:
+                    results[url] = self.results[url]
+                    self.stats["cached"] += 1
+                elif url in self.pending:
+                    futures[url] = self.pending[url]
+                elif len(self.pending) >= self.max_pending:
+                    self.stats["skipped"] += 1
+                    return None
+                else:
+                    futures[url] = self.pending[url] = self.executor.submit(self.check_url, url)
+        if not futures:
+            return results
+        if callback is None:
+            return None
+        remaining = [len(futures)]
+
+        def done(url, future):
+            results[url] = future.result()
+            with self.lock:
+                remaining[0] -= 1
+                finished = remaining[0] == 0
+            if finished:
+                try:
+                    callback(results)
+                except Exception as error:
+                    print("Gallery Check Failed: ", error)
+
+        for url, future in futures.items():
+            future.add_done_callback(lambda future, url=url: done(url, future))
+        return None
+
+    def close(self):
+        """
+        Wait for the pending checks and save the results cache
+
+        Returns:
+            stats {dict} -- The checked, cached, failed and skipped URLs
+
+        """
+        with self.lock:
+            futures = list(self.pending.values())
+        wait(futures)
+        self.executor.shutdown(wait=True)
+        self.save()
+        print("Gallery Images Checked: ", self.stats)
+        return self.stats
@@ -0,0 +1,194 @@
+import io
+import time
+import zlib
+import requests
+import urllib3
+
+
+class FeedError(Exception):
+    """
+    The error of a remote feed that can not be read, like an error status or a feed that can not be resumed, which
+    a reconnection would not fix
+    """
+
+
+class HttpStream(io.RawIOBase):
+    """
+    A class used to represent a remote feed read as a binary file while it is downloaded
+    ...
+
+    The body is read in chunks from the connection and decompressed on the fly, so a parser reading from the stream
+    works as the bytes arrive and never needs the whole body in memory. A dropped connection is resumed with an HTTP
+    Range request from the last byte received; a feed that can not be read raises a FeedError without retrying.
+
+    Attributes:
+        url {string} -- The URL of the feed
+        timeout {tuple} -- The connect and read timeouts in seconds
+        max_retries {int} -- The consecutive reconnections allowed before failing
+        backoff {float} -- The seconds to wait before the first reconnection, doubled on each retry
+        chunk_size {int} -- The number of bytes read from the connection at a time
+        compression {string} -- The compression of the body itself, like "gzip" for a .gz feed
+        offset {int} -- The number of raw bytes received
+        validator {string} -- The ETag or Last-Modified value used to resume the same version of the feed
+
+    Methods:
+        connect() -- Open the connection from the current offset
+        create_decompressor(encoding) -- Create the decompressor of the body
+        decompress(raw) -- Decompress a raw chunk
+        next_chunk() -- Get the next decompressed chunk, reconnecting if the connection drops
+        readinto(buffer) -- Read the decompressed content into a buffer
+
+    """
+    CONNECTION_ERRORS = (requests.exceptions.RequestException, urllib3.exceptions.HTTPError, OSError)
+
+    def __init__(self, **kwargs) -> None:
+        """
+        Parameters:
+            url {string} -- The URL of the feed
+            timeout {tuple} -- The connect and read timeouts in seconds
+            max_retries {int} -- The consecutive reconnections allowed before failing
+            backoff {float} -- The seconds to wait before the first reconnection, doubled on each retry
+            chunk_size {int} -- The number of bytes read from the connection at a time
+            compression {string} -- The compression of the body itself, like "gzip" for a .gz feed
+
+        """
+        super().__init__()
+        self.url = kwargs.get("url")
+        self.timeout = kwargs.get("timeout") or (10, 60)
+        self.max_retries = kwargs.get("max_retries", 5)
+        self.backoff = kwargs.get("backoff", 1)
+        self.chunk_size = kwargs.get("chunk_size") or 65536
+        self.compression = kwargs.get("compression") or ("gzip" if self.url.endswith(".gz") else False)
+        self.offset = 0
+        self.validator = None
+        self.response = None
+        self.chunks = None
+        self.decompressor = None
+        self.pending = b""
+        self.finished = False
+
+    def readable(self):
+        return True
+
+    def connect(self):
+        """
+        Open the connection from the current offset, using a Range request when resuming
+
+        Returns:
+            None
+
+        """
+        headers = {"Accept-Encoding": "gzip"}
+        if self.offset:
+            headers["Range"] = "bytes=%s-" % self.offset
+            if self.validator:
+                headers["If-Range"] = self.validator
+        response = requests.get(self.url, headers=headers, stream=True, timeout=self.timeout)
+        if response.status_code not in (200, 206):
+            response.close()
+            raise FeedError("The feed %s answered with the status %s" % (self.url, response.status_code))
+        if self.offset and response.status_code != 206:
+            response.close()
+            raise FeedError("The feed %s changed or does not support ranges, it can not be resumed" % self.url)
+        if not self.offset:
+            self.validator = response.headers.get("ETag") or response.headers.get("Last-Modified")
+            self.decompressor = self.create_decompressor(response.headers.get("Content-Encoding"))
+        self.response = response
+        self.chunks = response.raw.stream(self.chunk_size, decode_content=False)
+
+    def create_decompressor(self, encoding):
+        """
+        Create the decompressor of the body, based on the Content-Encoding header and the compression of the feed
+
+        Arguments:
+            encoding {string} -- The Content-Encoding header of the response
+
+        Returns:
+            {object} -- The zlib decompressor, or None if the body is not compressed
+
+        """
+        encodings = [encoding.strip().lower() for encoding in (encoding or "").split(",") if encoding.strip()]
+        if self.compression == "gzip":
+            encodings.append("gzip")
+        if len(encodings) > 1:
+            raise FeedError("The feed %s has nested compressions %s" % (self.url, encodings))
+        if encodings == ["gzip"]:
+            return zlib.decompressobj(16 + zlib.MAX_WBITS)
+        if encodings == ["deflate"]:
+            return zlib.decompressobj()
+        return None
+
+    def decompress(self, raw):
+        """
+        Decompress a raw chunk, continuing with the next member of a multi-member gzip body
+
+        Arguments:
+            raw {bytes} -- The raw chunk received
+
+        Returns:
+            data {bytes} -- The decompressed content of the chunk
+
+        """
+        if self.decompressor is None:
+            return raw
+        data = self.decompressor.decompress(raw)
+        while self.decompressor.eof and self.decompressor.unused_data:
+            unused_data = self.decompressor.unused_data
+            self.decompressor = zlib.decompressobj(16 + zlib.MAX_WBITS)
+            data += self.decompressor.decompress(unused_data)
+        return data
+
+    def next_chunk(self):
+        """
+        Get the next decompressed chunk, reconnecting from the last byte received if the connection drops
+
+        Returns:
+            {bytes} -- The decompressed chunk, empty at the end of the feed
+
+        """
+        retries = 0
+        while True:
+            try:
+                if self.chunks is None:
+                    self.connect()
+                raw = next(self.chunks, b"")
+                break
+            except self.CONNECTION_ERRORS as error:
+                if self.response is not None:
+                    self.response.close()
+                self.response = None
+                self.chunks = None
+                retries += 1
+                if retries > self.max_retries:
+                    raise
+                print("Feed Connection Dropped: ", self.url, self.offset, error)
+                time.sleep(self.backoff * 2 ** (retries - 1))
+        if not raw:
+            self.finished = True
+            return self.decompressor.flush() if self.decompressor is not None else b""
+        self.offset += len(raw)
+        return self.decompress(raw)
+
+    def readinto(self, buffer):
+        """
+        Read the decompressed content into a buffer
+
+        Arguments:
+            buffer {bytearray} -- The buffer to fill
+
+        Returns:
+            {int} -- The number of bytes read, 0 at the end of the feed
+
+        """
+        while not self.pending and not self.finished:
+            self.pending = self.next_chunk()
+        size = min(len(buffer), len(self.pending))
+        buffer[:size] = self.pending[:size]
+        self.pending = self.pending[size:]
+        return size
+
+    def close(self):
+        if self.response is not None:
+            self.response.close()
+            self.response = None
+        super().close()
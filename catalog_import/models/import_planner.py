@@ -0,0 +1,659 @@
+import bz2
+import datetime
+import gzip
+import io
+import math
+import os
+import time
+import uuid
+import zipfile
+from decimal import Decimal
+from itertools import islice
+import requests
+import urllib3
+from .bulk_loader import to_dynamodb_json
+from .connection import Connection
+from .file_manager import FileManager
+from .http_stream import HttpStream
+from .products import Products
+from .provider import Provider
+from .runner import get_metadata
+from .xml_offset_index import XmlOffsetIndex
+
+
+def value_size(value):
+    """
+    Get the size of a value by the item size rules of DynamoDB
+
+    Arguments:
+        value {object} -- The value
+
+    Returns:
+        {int} -- The size in bytes
+
+    """
+    if value is None or isinstance(value, bool):
+        return 1
+    if isinstance(value, (int, float, Decimal)):
+        digits = len(str(abs(Decimal(str(value)))).replace(".", "").strip("0")) or 1
+        return min((digits + 1) // 2 + 1, 21)
+    if isinstance(value, str):
+        return len(value.encode("utf-8"))
+    if isinstance(value, (bytes, bytearray)):
+        return len(value)
+    if isinstance(value, dict):
+        return 3 + sum(len(str(key).encode("utf-8")) + value_size(entry) + 1 for key, entry in value.items())
+    if isinstance(value, (list, tuple)):
+        return 3 + sum(value_size(entry) + 1 for entry in value)
+    if isinstance(value, (set, frozenset)):
+        return sum(value_size(entry) for entry in value)
+    return len(str(value).encode("utf-8"))
+
+
+def item_size(item):
+    """
+    Get the size of an item by the item size rules of DynamoDB, the size its reads and writes are billed on
+
+    Arguments:
+        item {dict} -- The item
+
+    Returns:
+        {int} -- The size in bytes
+
+    """
+    return sum(len(name.encode("utf-8")) + value_size(value) for name, value in item.items())
+
+
+class CountingReader(io.RawIOBase):
+    """
+    A class used to represent a binary file counting the bytes read from it
+    ...
+
+    Attributes:
+        file {object} -- The binary file object read
+        position {int} -- The number of bytes read
+
+    Methods:
+        readinto(buffer) -- Read into a buffer and count the bytes
+
+    """
+    def __init__(self, file) -> None:
+        """
+        Parameters:
+            file {object} -- The binary file object read
+
+        """
+        super().__init__()
+        self.file = file
+        self.position = 0
+
+    def readable(self):
+        return True
+
+    def readinto(self, buffer):
+        """
+        Read into a buffer and count the bytes
+
+        Arguments:
+            buffer {object} -- The writable buffer
+
+        Returns:
+            {int} -- The number of bytes read
+
+        """
+        count = self.file.readinto(buffer)
+        self.position += count or 0
+        return count
+
+    def close(self):
+        self.file.close()
+        super().close()
+
+
+class SampleItems:
+    """
+    A class used to represent the items of the sampled products, collected in place of the bulk load
+    ...
+
+    Attributes:
+        items {list} -- The items as they would be written
+
+    Methods:
+        add(product) -- Collect an item
+
+    """
+    def __init__(self) -> None:
+        self.items = []
+
+    def add(self, product):
+        """
+        Collect an item
+
+        Arguments:
+            product {dict} -- The product item
+
+        Returns:
+            None
+
+        """
+        self.items.append(product)
+
+
+class ImportPlanner:
+    """
+    A class used to represent the plan of an import run, with its capacity and time estimates
+    ...
+
+    A sample of each provider feed is read and parsed by the products parser into the items it would write, with the
+    map layout and the run stamp of the settings but without reading or writing the table. The records of an
+    uncompressed XML feed are counted by its offset index and sampled across the whole feed; the records of the other
+    files and of remote feeds are sampled from the start and counted from the share of the bytes the sample took; the
+    records of a directory feed are sampled from its first files not processed yet and counted by the records per
+    file; the records of an API provider are its products list, and `sample_requests` of its products are requested
+    to measure the latency of the API.
+
+    A run parses up to the provider's `max_products` records, 10 if it is not set, or every record if it is None, so
+    the products written, read and staged are the records up to that cap, while an API provider still requests its
+    whole products list. The products already in the table are estimated from the sampled MPNs read through the
+    catalog reader, and the sampled MPNs of the providers planned before, since the providers share the table and a
+    product written by a provider is an update for the next ones. Each write
+    costs a WCU per KB of the item, and the lookup of an existing product by the import is a scan of the whole table,
+    billed by the size of the table; the Bloom filter spares the lookups of the new products at the cost of one scan,
+    and the bulk load replaces the reads and writes by the import of the DynamoDB JSON bytes. The wall time of a
+    provider is its requests to the API, spread over `request_concurrency` connections, followed by the processing of
+    its records and its table requests, spread over `write_concurrency` connections, or the time the table capacity
+    allows, whichever is longer. The providers run in parallel and share the table capacity.
+
+    The sizes are of the items without the attribute dictionary and the description storage, so they are upper bounds
+    when those are enabled.
+
+    Attributes:
+        providers_dict {dict} -- The providers to plan, by provider name
+        run_settings {dict} -- The settings of the run
+        db_table {object} -- The products db table, or None to plan for an empty table
+        catalog_reader {object} -- The read API of the table, or None to plan for new products only
+        sample_size {int} -- The number of records sampled from each feed
+        sample_requests {int} -- The number of products requested from each API
+        request_concurrency {int} -- The requests sent to an API at the same time
+        request_latency {float} -- The seconds of an API request when none is sampled
+        write_concurrency {int} -- The table requests sent by a provider at the same time
+        write_latency {float} -- The seconds of a table request
+        write_capacity {float} -- The WCU per second of the table, the provisioned capacity if not set
+        read_capacity {float} -- The RCU per second of the table, the provisioned capacity if not set
+
+    Methods:
+        record_projection(provider_values) -- Get the XML projection relative to the records
+        sample_indexed(provider_values, filepath) -- Sample the records of an uncompressed XML feed
+        sample_stream(file_manager, raw, total) -- Sample the first records of a feed
+        sample_file(provider_values, filepath) -- Sample the records of a file
+        sample_remote(provider_values) -- Sample the records of a remote feed
+        sample_directory(connection) -- Sample the records of a directory feed
+        sample_api(provider_values) -- Sample the products of an API
+        sample(provider_values) -- Sample the records of a provider
+        parse(provider_name, provider_values, records) -- Parse the sampled records into items
+        existing_ratio(items, planned) -- Estimate the share of the products already in the table
+        table_stats() -- Get the size and capacity of the table
+        plan_provider(provider_name, provider_values, table, planned) -- Estimate the import of a provider
+        execute() -- Estimate the import run of every provider
+
+    """
+    def __init__(self, **kwargs) -> None:
+        """
+        Parameters:
+            providers_dict {dict} -- The providers to plan, by provider name
+            run_settings {dict} -- The settings of the run
+            db_table {object} -- The products db table, or None to plan for an empty table
+            catalog_reader {object} -- The read API of the table, or None to plan for new products only
+            sample_size {int} -- The number of records sampled from each feed
+            sample_requests {int} -- The number of products requested from each API
+            request_concurrency {int} -- The requests sent to an API at the same time
+            request_latency {float} -- The seconds of an API request when none is sampled
+            write_concurrency {int} -- The table requests sent by a provider at the same time
+            write_latency {float} -- The seconds of a table request
+            write_capacity {float} -- The WCU per second of the table, the provisioned capacity if not set
+            read_capacity {float} -- The RCU per second of the table, the provisioned capacity if not set
+
+        """
+        self.providers_dict = kwargs.get("providers_dict") or {}
+        self.run_settings = kwargs.get("run_settings") or {}
+        self.db_table = kwargs.get("db_table")
+        self.catalog_reader = kwargs.get("catalog_reader")
+        self.sample_size = kwargs.get("sample_size") or 200
+        self.sample_requests = kwargs.get("sample_requests", 5)
+        self.request_concurrency = kwargs.get("request_concurrency") or 1
+        self.request_latency = kwargs.get("request_latency") or 0.5
+        self.write_concurrency = kwargs.get("write_concurrency") or 1
+        self.write_latency = kwargs.get("write_latency") or 0.01
+        self.write_capacity = kwargs.get("write_capacity") or False
+        self.read_capacity = kwargs.get("read_capacity") or False
+
+    @staticmethod
+    def record_projection(provider_values):
+        """
+        Get the XML projection of the provider relative to its records, the document paths of a provider converting
+        the whole XML losing their root and item elements
+
+        Arguments:
+            provider_values {dict} -- The provider's values
+
+        Returns:
+            {list} -- The element paths relative to the records, or None to build every element
+
+        """
+        if provider_values.get("xml_item_name"):
+            return provider_values.get("xml_projection") or None
+        return FileManager.record_projection(provider_values.get("xml_projection"))
+
+    def sample_indexed(self, provider_values, filepath):
+        """
+        Sample the records of an uncompressed XML feed evenly across the feed, counted by its offset index
+
+        Arguments:
+            provider_values {dict} -- The provider's values
+            filepath {string} -- The filepath of the feed
+
+        Returns:
+            {dict} -- The sampled records, the number of records, how it was counted and the seconds reading the sample
+
+        """
+        offset_index = XmlOffsetIndex(
+            filepath=filepath,
+            index_filepath=provider_values.get("xml_index_filepath"),
+            item_name=provider_values.get("xml_item_name") or "Product",
+        ).open()
+        started = time.monotonic()
+        try:
+            count = len(offset_index)
+            data = offset_index.map()
+            projection = self.record_projection(provider_values)
+            sampled = min(self.sample_size, count)
+            positions = sorted(set(position * count // sampled for position in range(sampled)))
+            records = [
+                offset_index.record(data[offset_index.starts[position]:offset_index.ends[position]], projection)
+                for position in positions
+            ]
+        finally:
+            offset_index.close()
+        return {"records": records, "count": count, "counted": "offset index", "seconds": time.monotonic() - started}
+
+    def sample_stream(self, file_manager, raw, total):
+        """
+        Sample the first records of a feed, counting the records of the feed from the share of its bytes read for the
+        sample
+
+        Arguments:
+            file_manager {object} -- The file manager reading the feed
+            raw {object} -- The source of the feed, with the number of bytes read as `position` or `offset`
+            total {function} -- The function getting the number of bytes of the source, or None if it is unknown
+
+        Returns:
+            {dict} -- The sampled records, the number of records, how it was counted and the seconds reading the sample
+
+        """
+        started = time.monotonic()
+        file_manager.queue_size = 1  # The records parsed ahead would be counted as read
+        response = file_manager.parse_file_response()
+        try:
+            records = list(islice(response, self.sample_size + 1))
+            read = getattr(raw, "position", None) or getattr(raw, "offset", 0)
+            size = total()
+        finally:
+            if hasattr(response, "close"):
+                response.close()
+        sample = {"records": records[:self.sample_size], "seconds": time.monotonic() - started}
+        if len(records) <= self.sample_size:
+            sample.update({"count": len(records), "counted": "complete"})
+        elif not size or not read:
+            sample.update({"count": None, "counted": "unknown"})
+        else:
+            sample.update({"count": max(self.sample_size, round(self.sample_size * size / read)), "counted": "bytes read"})
+        return sample
+
+    def sample_file(self, provider_values, filepath):
+        """
+        Sample the records of a file, through its offset index if it is an uncompressed XML file
+
+        Arguments:
+            provider_values {dict} -- The provider's values
+            filepath {string} -- The filepath of the file
+
+        Returns:
+            {dict} -- The sampled records, the number of records, how it was counted and the seconds reading the sample
+
+        """
+        file_manager = FileManager(
+            filepath=filepath,
+            archive_member=provider_values.get("archive_member"),
+            file_format=provider_values.get("file_format"),
+            csv_delimiter=provider_values.get("csv_delimiter"),
+            csv_list_separator=provider_values.get("csv_list_separator"),
+            xml_item_name=provider_values.get("xml_item_name") or "Product",
+            xml_item_depth=provider_values.get("xml_item_depth"),
+            xml_projection=self.record_projection(provider_values),
+        )
+        file_manager.file_format = file_manager.content_format()
+        compression = file_manager.compression()
+        if file_manager.file_format == "xml" and not compression:
+            return self.sample_indexed(provider_values, filepath)
+        if compression == ".zip":
+            with zipfile.ZipFile(filepath) as archive:
+                member = archive.getinfo(file_manager.member_name(archive))
+                raw = CountingReader(archive.open(member))
+            size = member.file_size
+            file_manager.stream = io.BufferedReader(raw)
+        else:
+            raw = CountingReader(open(filepath, "rb"))
+            size = os.path.getsize(filepath)
+            if compression == ".gz":
+                file_manager.stream = gzip.GzipFile(fileobj=raw)
+            elif compression == ".bz2":
+                file_manager.stream = bz2.BZ2File(raw)
+            else:
+                file_manager.stream = io.BufferedReader(raw)
+        try:
+            return self.sample_stream(file_manager, raw, lambda: size)
+        finally:
+            file_manager.stream.close()
+            raw.close()
+
+    def sample_remote(self, provider_values):
+        """
+        Sample the first records of a remote feed, counted from its Content-Length if the server sends it
+
+        Arguments:
+            provider_values {dict} -- The provider's values
+
+        Returns:
+            {dict} -- The sampled records, the number of records, how it was counted and the seconds reading the sample
+
+        """
+        stream = HttpStream(
+            url=provider_values.get("url"),
+            compression=provider_values.get("compression"),
+            max_retries=provider_values.get("max_retries", 5),
+        )
+        file_manager = FileManager(
+            stream=io.BufferedReader(stream),
+            file_format=provider_values.get("response_type"),
+            csv_delimiter=provider_values.get("csv_delimiter"),
+            csv_list_separator=provider_values.get("csv_list_separator"),
+            xml_item_name=provider_values.get("xml_item_name") or "Product",
+            xml_item_depth=provider_values.get("xml_item_depth"),
+            xml_projection=self.record_projection(provider_values),
+        )
+
+        def content_length():
+            length = stream.response.headers.get("Content-Length") if stream.response is not None else None
+            return int(length) if length and stream.response.status_code == 200 else None
+
+        try:
+            return self.sample_stream(file_manager, stream, content_length)
+        finally:
+            stream.close()
+
+    def sample_directory(self, connection):
+        """
+        Sample the records of the first files of a directory feed not processed yet, counting the records of the feed
+        from the records per file
+
+        Arguments:
+            connection {object} -- The connection of the provider
+
+        Returns:
+            {dict} -- The sampled records, the number of records, how it was counted and the seconds reading the sample
+
+        """
+        started = time.monotonic()
+        directory_feed = connection.create_directory_feed()
+        files = directory_feed.files()
+        records = []
+        read = 0
+        for filepath, _ in files:
+            if len(records) >= self.sample_size:
+                break
+            file_records = directory_feed.file_records(filepath)
+            records.extend(islice(file_records, self.sample_size - len(records)))
+            if hasattr(file_records, "close"):
+                file_records.close()
+            read += 1
+        sample = {"records": records, "seconds": time.monotonic() - started}
+        if read == len(files):
+            sample.update({"count": len(records), "counted": "complete"})
+        else:
+            sample.update({"count": round(len(records) * len(files) / read), "counted": "records per file"})
+        return sample
+
+    def sample_api(self, provider_values):
+        """
+        Sample the products of an API, requesting `sample_requests` products of the products list to measure the
+        latency of the API
+
+        Arguments:
+            provider_values {dict} -- The provider's values
+
+        Returns:
+            {dict} -- The sampled records, the number of products, the request latencies and the failed requests
+
+        """
+        connection = Connection(provider=Provider(provider_values))
+        products_list = connection.connection_products_list()
+        count = len(products_list)
+        sampled = min(self.sample_requests or 0, count)
+        sample = {"records": [], "count": count, "counted": "products list", "seconds": 0, "latencies": [], "failed": 0}
+        for position in sorted(set(position * count // sampled for position in range(sampled))) if sampled else []:
+            started = time.monotonic()
+            try:
+                request_result = connection.request_product(products_list[position])
+            except (requests.exceptions.RequestException, urllib3.exceptions.HTTPError):
+                sample["failed"] += 1
+                continue
+            sample["latencies"].append(time.monotonic() - started)
+            if request_result:
+                sample["records"].append(request_result)
+        return sample
+
+    def sample(self, provider_values):
+        """
+        Sample the records of a provider, by its connection type, from the first locale file of a provider with a file
+        per locale
+
+        Arguments:
+            provider_values {dict} -- The provider's values
+
+        Returns:
+            {dict} -- The sampled records, the number of records, how it was counted and the seconds reading the sample
+
+        """
+        if provider_values.get("connection_type") == "api":
+            return self.sample_api(provider_values)
+        if provider_values.get("connection_type") == "stream":
+            return self.sample_remote(provider_values)
+        connection = Connection(provider=Provider(provider_values))
+        if not provider_values.get("locale_files") and connection.directory_feed():
+            return self.sample_directory(connection)
+        locale_files = provider_values.get("locale_files") or []
+        filepath = locale_files[0].get("filepath") if locale_files else provider_values.get("filepath")
+        return self.sample_file(provider_values, filepath)
+
+    def parse(self, provider_name, provider_values, records):
+        """
+        Parse the sampled records into the items the import would write, without reading or writing the table
+
+        Arguments:
+            provider_name {str} -- The provider's name
+            provider_values {dict} -- The provider's values
+            records {list} -- The sampled records
+
+        Returns:
+            {tuple} -- The items of the records that parsed, and the number of records that failed
+
+        """
+        sample_items = SampleItems()
+        run_stamp = None
+        if self.run_settings.get("stale_sweep", {}).get("enabled"):
+            run_stamp = "%s-%s" % (datetime.datetime.now(datetime.timezone.utc).strftime("%Y%m%d%H%M%S"), uuid.uuid4().hex[:8])
+        products = Products(
+            response=records,
+            metadata=get_metadata(provider_values),
+            map_layout=self.run_settings.get("item_layout", {}).get("maps", False),
+            bulk_loader=sample_items,
+            run_stamp=run_stamp,
+        )
+        parser = (provider_values.get("parser") or provider_name).lower()
+        parse = products.parse_product_icecat if parser.startswith("icecat") else products.parse_product_etilize
+        unparsed = 0
+        for record in records:
+            try:
+                parse(record)
+            except Exception:
+                unparsed += 1
+        return sample_items.items, unparsed
+
+    def existing_ratio(self, items, planned):
+        """
+        Estimate the share of the products already in the table from the sampled MPNs, or written before by the
+        providers planned before
+
+        Arguments:
+            items {list} -- The sampled items
+            planned {set} -- The sampled MPNs of the providers planned before
+
+        Returns:
+            {float} -- The share of the sampled products found in the table or planned before
+
+        """
+        mpns = set(item.get("MPN") for item in items if item.get("MPN"))
+        if not mpns:
+            return 0.0
+        unplanned = [mpn for mpn in mpns if mpn not in planned]
+        found = self.catalog_reader.get_many(unplanned, ["MPN"]) if self.catalog_reader is not None and unplanned else {}
+        return sum(1 for mpn in mpns if mpn in planned or found.get(mpn) is not None) / len(mpns)
+
+    def table_stats(self):
+        """
+        Get the size and capacity of the table, as last reported by DynamoDB about every six hours
+
+        Returns:
+            {dict} -- The items, bytes, and WCU and RCU per second of the table
+
+        """
+        stats = {"items": 0, "bytes": 0, "write_capacity": self.write_capacity, "read_capacity": self.read_capacity}
+        if self.db_table is None:
+            return stats
+        throughput = self.db_table.provisioned_throughput or {}
+        stats["items"] = self.db_table.item_count or 0
+        stats["bytes"] = self.db_table.table_size_bytes or 0
+        stats["write_capacity"] = self.write_capacity or throughput.get("WriteCapacityUnits") or False
+        stats["read_capacity"] = self.read_capacity or throughput.get("ReadCapacityUnits") or False
+        return stats
+
+    def plan_provider(self, provider_name, provider_values, table, planned):
+        """
+        Estimate the import of a provider from a sample of its records, adding its sampled MPNs to the planned MPNs
+
+        Arguments:
+            provider_name {str} -- The provider's name
+            provider_values {dict} -- The provider's values
+            table {dict} -- The size and capacity of the table
+            planned {set} -- The sampled MPNs of the providers planned before
+
+        Returns:
+            plan {dict} -- The records, products, item sizes, capacity units, requests and seconds of the import
+
+        """
+        sample = self.sample(provider_values)
+        records, count, latencies = sample["records"], sample["count"], sample.get("latencies", [])
+        api = provider_values.get("connection_type") == "api"
+        started = time.monotonic()
+        items, unparsed = self.parse(provider_name, provider_values, records)
+        processing = (sample["seconds"] + time.monotonic() - started) / len(records) if records else 0
+        sizes = [item_size(item) for item in items]
+        plan = {
+            "provider": provider_name,
+            "records": count,
+            "counted": sample["counted"],
+            "sampled": len(items),
+            "unparsed": unparsed,
+            "avg_item_bytes": round(sum(sizes) / len(sizes)) if sizes else None,
+            "max_item_bytes": max(sizes) if sizes else None,
+            "avg_attributes": round(sum(
+                len(item.get("Attributes") or item.get("AttributeValues") or []) for item in items
+            ) / len(items), 1) if items else None,
+        }
+        if api:
+            plan["request_latency"] = round(sum(latencies) / len(latencies), 3) if latencies else self.request_latency
+            plan["failed_requests"] = sample["failed"]
+        if count is None or not items:
+            return plan
+        max_products = provider_values.get("max_products", 10)
+        products = count if max_products is None else min(count, max_products)
+        existing = round(products * self.existing_ratio(items, planned))
+        new = products - existing
+        planned.update(item.get("MPN") for item in items if item.get("MPN"))
+        wcu_per_write = sum(math.ceil(size / 1024) for size in sizes) / len(sizes)
+        avg_size = sum(sizes) / len(sizes)
+        bulk = self.run_settings.get("bulk_load", {}).get("enabled")
+        bloom = self.run_settings.get("bloom_filter", {}).get("enabled")
+        # The table grows by the new products during the run, and every lookup scans all of it
+        table_bytes = table["bytes"] + new * avg_size / 2
+        scan_rcu = math.ceil(table_bytes / 4096) / 2
+        scan_pages = max(1, math.ceil(table_bytes / 1048576))
+        lookups = 0 if bulk else (existing if bloom else products)
+        plan.update({
+            "products": products,
+            "existing_products": existing,
+            "new_products": new,
+            "wcu_per_write": round(wcu_per_write, 2),
+            "wcu": 0 if bulk else math.ceil(products * wcu_per_write),
+            "rcu": 0 if bulk else math.ceil(lookups * scan_rcu + (math.ceil(table["bytes"] / 4096) / 2 if bloom else 0)),
+            "api_requests": count if api else 0,
+            "table_requests": 0 if bulk else products + lookups * scan_pages,
+            "import_bytes": sum(len(to_dynamodb_json(item).encode("utf-8")) + 1 for item in items) * products // len(items) if bulk else 0,
+        })
+        seconds = {
+            "requests": plan["api_requests"] * plan.get("request_latency", 0) / self.request_concurrency,
+            "processing": products * processing,
+            "table": plan["table_requests"] * self.write_latency / self.write_concurrency,
+            "capacity": max(
+                plan["wcu"] / table["write_capacity"] if table["write_capacity"] else 0,
+                plan["rcu"] / table["read_capacity"] if table["read_capacity"] else 0,
+            ),
+        }
+        seconds["total"] = seconds["requests"] + max(seconds["processing"] + seconds["table"], seconds["capacity"])
+        plan["seconds"] = {key: round(value, 1) for key, value in seconds.items()}
+        return plan
+
+    def execute(self):
+        """
+        Estimate the import run of every provider
+
+        Returns:
+            {dict} -- The plans of the providers and the totals of the run
+
+        """
+        table = self.table_stats()
+        planned = set()
+        plans = [
+            self.plan_provider(provider_name, provider_values, table, planned)
+            for provider_name, provider_values in self.providers_dict.items()
+        ]
+        totals = {
+            "records": sum(plan.get("records") or 0 for plan in plans),
+            "products": sum(plan.get("products", 0) for plan in plans),
+            "wcu": sum(plan.get("wcu", 0) for plan in plans),
+            "rcu": sum(plan.get("rcu", 0) for plan in plans),
+            "api_requests": sum(plan.get("api_requests", 0) for plan in plans),
+            "table_requests": sum(plan.get("table_requests", 0) for plan in plans),
+            "import_bytes": sum(plan.get("import_bytes", 0) for plan in plans),
+            "table_items": table["items"],
+            "table_bytes": table["bytes"],
+            "write_capacity": table["write_capacity"],
+            "read_capacity": table["read_capacity"],
+        }
+        # The providers run in parallel threads sharing the capacity of the table
+        capacity = max(
+            totals["wcu"] / table["write_capacity"] if table["write_capacity"] else 0,
+            totals["rcu"] / table["read_capacity"] if table["read_capacity"] else 0,
+        )
+        totals["seconds"] = round(max([capacity] + [plan.get("seconds", {}).get("total", 0) for plan in plans]), 1)
+        return {"providers": plans, "totals": totals}
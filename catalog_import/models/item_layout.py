@@ -0,0 +1,223 @@
+from concurrent.futures import ThreadPoolExecutor
+from botocore.exceptions import ClientError
+
+
+def category_map_key(category):
+    """
+    Get the map key of a category: its provider name, as a product keeps one category per provider
+
+    Arguments:
+        category {dict} -- The category values
+
+    Returns:
+        {str} -- The map key
+
+    """
+    return str((category.get("Metadata") or {}).get("name"))
+
+
+def description_map_key(description):
+    """
+    Get the map key of a description: its provider, or its provider name and locale tags, like "Icecat#en_US"
+
+    Arguments:
+        description {dict} -- The description values
+
+    Returns:
+        {str} -- The map key
+
+    """
+    if description.get("Provider"):
+        return str(description.get("Provider"))
+    metadata = description.get("Metadata") or {}
+    return "%s#%s" % (metadata.get("name"), ",".join(metadata.get("i18n") or {}))
+
+
+def attribute_map_key(attribute):
+    """
+    Get the map key of an attribute: its label
+
+    Arguments:
+        attribute {dict} -- The attribute values
+
+    Returns:
+        {str} -- The map key
+
+    """
+    return str(attribute.get("Label"))
+
+
+MAP_FIELDS = {
+    "Categories": category_map_key,
+    "Descriptions": description_map_key,
+    "Attributes": attribute_map_key,
+}
+
+
+def to_map(field, entries):
+    """
+    Convert the list of a field to a map, keeping the first entry of each key
+
+    Arguments:
+        field {str} -- The field name, one of MAP_FIELDS
+        entries {list|dict} -- The entries of the field, returned as they are if they already are a map
+
+    Returns:
+        mapped {dict} -- The entries by map key
+
+    """
+    if isinstance(entries, dict):
+        return entries
+    mapped = {}
+    for entry in entries or []:
+        mapped.setdefault(MAP_FIELDS[field](entry), entry)
+    return mapped
+
+
+def to_map_layout(product):
+    """
+    Convert the categories, descriptions and attributes lists of a product to maps, in place
+
+    Arguments:
+        product {dict} -- The product values
+
+    Returns:
+        product {dict} -- The product values
+
+    """
+    for field in MAP_FIELDS:
+        if isinstance(product.get(field), list):
+            product[field] = to_map(field, product.get(field))
+    return product
+
+
+def to_list_layout(product):
+    """
+    Get a copy of a product with its categories, descriptions and attributes maps converted back to lists
+
+    Arguments:
+        product {dict} -- The product item
+
+    Returns:
+        listed {dict} -- The product with the list layout of the import
+
+    """
+    listed = dict(product)
+    for field in MAP_FIELDS:
+        if isinstance(listed.get(field), dict):
+            listed[field] = list(listed.get(field).values())
+    return listed
+
+
+class LayoutMigration:
+    """
+    A class used to represent the migration of the stored products to the map layout
+    ...
+
+    The table is read with a parallel scan, and every product still holding categories, descriptions or attributes
+    lists gets them replaced by maps. Each write is conditioned on the fields still being lists, so a product updated
+    by an import during the migration is not overwritten.
+
+    Attributes:
+        db_table {object} -- The product's db table
+        segments {int} -- The number of parallel scan segments
+        dry_run {Bool} -- Whether the products are only counted
+        capacity_controller {object} -- The adaptive write rate shared with the imports, if enabled
+
+    Methods:
+        migrate_item(item) -- Convert the lists of a product to maps
+        migrate_segment(segment) -- Migrate the products of a scan segment
+        execute() -- Migrate every product of the table
+
+    """
+    def __init__(self, **kwargs) -> None:
+        """
+        Parameters:
+            db_table {object} -- The product's db table
+            segments {int} -- The number of parallel scan segments
+            dry_run {Bool} -- Whether the products are only counted
+            capacity_controller {object} -- The adaptive write rate shared with the imports, if enabled
+
+        """
+        self.db_table = kwargs.get("db_table")
+        self.segments = kwargs.get("segments") or 4
+        self.dry_run = kwargs.get("dry_run", False)
+        self.capacity_controller = kwargs.get("capacity_controller")
+
+    def migrate_item(self, item):
+        """
+        Convert the categories, descriptions and attributes lists of a product to maps
+
+        Arguments:
+            item {dict} -- The product item
+
+        Returns:
+            {Bool} -- True if the product had lists to convert
+
+        """
+        fields = [field for field in MAP_FIELDS if isinstance(item.get(field), list)]
+        if not fields:
+            return False
+        if self.dry_run:
+            return True
+        update_kwargs = {
+            "Key": {"MPN": item.get("MPN")},
+            "UpdateExpression": "SET " + ", ".join("#f%s = :f%s" % (index, index) for index in range(len(fields))),
+            "ConditionExpression": " AND ".join("attribute_type(#f%s, :list)" % index for index in range(len(fields))),
+            "ExpressionAttributeNames": {"#f%s" % index: field for index, field in enumerate(fields)},
+            "ExpressionAttributeValues": {
+                ":list": "L",
+                **{":f%s" % index: to_map(field, item.get(field)) for index, field in enumerate(fields)},
+            },
+        }
+        try:
+            if self.capacity_controller is not None:
+                self.capacity_controller.execute("migration", self.db_table.update_item, **update_kwargs)
+            else:
+                self.db_table.update_item(**update_kwargs)
+        except ClientError as error:
+            if error.response.get("Error", {}).get("Code") != "ConditionalCheckFailedException":
+                raise
+            return False
+        return True
+
+    def migrate_segment(self, segment):
+        """
+        Migrate the products of a scan segment
+
+        Arguments:
+            segment {int} -- The scan segment number
+
+        Returns:
+            counts {dict} -- The scanned and migrated products
+
+        """
+        counts = {"scanned": 0, "migrated": 0}
+        scan_kwargs = {
+            "ProjectionExpression": "MPN, Categories, Descriptions, Attributes",
+            "Segment": segment,
+            "TotalSegments": self.segments,
+        }
+        while True:
+            response = self.db_table.scan(**scan_kwargs)
+            for item in response.get("Items", []):
+                counts["scanned"] += 1
+                if self.migrate_item(item):
+                    counts["migrated"] += 1
+            if not response.get("LastEvaluatedKey"):
+                return counts
+            scan_kwargs["ExclusiveStartKey"] = response.get("LastEvaluatedKey")
+
+    def execute(self):
+        """
+        Migrate every product of the table with a parallel scan
+
+        Returns:
+            totals {dict} -- The scanned and migrated products
+
+        """
+        with ThreadPoolExecutor(max_workers=self.segments) as executor:
+            segments_counts = list(executor.map(self.migrate_segment, range(self.segments)))
+        totals = {key: sum(counts[key] for counts in segments_counts) for key in ("scanned", "migrated")}
+        print("Products Migrated: " if not self.dry_run else "Products To Migrate: ", totals)
+        return totals
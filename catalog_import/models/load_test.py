@@ -0,0 +1,198 @@
+import json
+import os
+import shutil
+import tempfile
+import time
+from threading import Lock
+from .circuit_breaker import CircuitBreaker, CircuitBreakers
+from .main import Main
+from .mock_provider import MockProviderServer
+from .runner import run_providers
+
+
+class RecordingCircuitBreaker(CircuitBreaker):
+    """
+    A class used to represent a circuit breaker also recording the time of every request
+    ...
+
+    Attributes:
+        requests {list} -- The end time, duration and outcome of each request
+
+    Methods:
+        record(success, duration, timeout) -- Record the outcome of a request
+
+    """
+    def __init__(self, **kwargs) -> None:
+        """
+        Parameters:
+            **kwargs: Keyword arguments of the circuit breaker
+
+        """
+        super().__init__(**kwargs)
+        self.requests = []
+        self.requests_lock = Lock()
+
+    def record(self, success, duration, timeout=False):
+        """
+        Record the outcome of a request, with its end time and duration
+
+        Arguments:
+            success {Bool} -- Whether the API answered, even with a client error
+            duration {float} -- The seconds the request took
+            timeout {Bool} -- Whether the request timed out
+
+        Returns:
+            None
+
+        """
+        with self.requests_lock:
+            self.requests.append((time.monotonic(), duration, success))
+        super().record(success, duration, timeout)
+
+
+def percentile(values, share):
+    """
+    Get a percentile of sorted values, by the nearest rank
+
+    Arguments:
+        values {list} -- The sorted values
+        share {float} -- The percentile, between 0 and 1
+
+    Returns:
+        {float} -- The value, or None if there are no values
+
+    """
+    if not values:
+        return None
+    return values[min(len(values) - 1, max(0, int(round(share * len(values))) - 1))]
+
+
+class LoadTest:
+    """
+    A class used to represent a load test of the API import path against the local stand-in of the Etilize API
+    ...
+
+    The mock provider server is started and `providers` copies of the Etilize provider, each with its own list of
+    `products` synthetic MPNs, are run in parallel threads through the whole `Main.execute` path: the requests, the
+    parsing of the responses and the writes of the products with the components of the run. The requests are timed
+    by the circuit breaker of each provider, which never opens if the circuit breaker is disabled in the settings.
+
+    The report has the requests per second over the request phase, the latency percentiles of the requests, and the
+    products per second from the start of the run to the end of the writes. The products are those staged by the bulk
+    load when it is enabled, and those the server served otherwise.
+
+    Attributes:
+        provider_values {dict} -- The values of the provider copied for the load test
+        components {dict} -- The components shared by the provider threads
+        breaker_settings {dict} -- The settings of the circuit breakers, None if they are disabled
+        server_settings {dict} -- The settings of the mock provider server
+        products {int} -- The number of products requested by each provider
+        providers {int} -- The number of providers run in parallel
+        profiler {object} -- The profiler of the run, if the load test is profiled
+
+    Methods:
+        run_provider(**kwargs) -- Run the import of a provider
+        execute() -- Run the load test
+
+    """
+    def __init__(self, **kwargs) -> None:
+        """
+        Parameters:
+            provider_values {dict} -- The values of the provider copied for the load test
+            components {dict} -- The components shared by the provider threads
+            breaker_settings {dict} -- The settings of the circuit breakers, None if they are disabled
+            server_settings {dict} -- The settings of the mock provider server
+            products {int} -- The number of products requested by each provider
+            providers {int} -- The number of providers run in parallel
+            profiler {object} -- The profiler of the run, if the load test is profiled
+
+        """
+        self.provider_values = kwargs.get("provider_values") or {}
+        self.components = kwargs.get("components") or {}
+        self.breaker_settings = kwargs.get("breaker_settings")
+        self.server_settings = kwargs.get("server_settings") or {}
+        self.products = kwargs.get("products") or 500
+        self.providers = kwargs.get("providers") or 1
+        self.profiler = kwargs.get("profiler")
+
+    @staticmethod
+    def run_provider(**kwargs):
+        """
+        Run the import of a provider
+
+        Arguments:
+            **kwargs: Keyword arguments of the main model
+
+        Returns:
+            None
+
+        """
+        Main(**kwargs).execute()
+
+    def execute(self):
+        """
+        Run the load test and stop the server
+
+        Returns:
+            report {dict} -- The products, requests, requests per second, latency percentiles, products per second
+                and server statistics
+
+        """
+        breaker_settings = self.breaker_settings
+        if breaker_settings is None:
+            breaker_settings = {"error_rate": 2, "slow_rate": 2, "consecutive_timeouts": 0}  # Never reached
+        circuit_breakers = CircuitBreakers(breaker_settings=breaker_settings, breaker_class=RecordingCircuitBreaker)
+        server = MockProviderServer(**self.server_settings).start()
+        directory = tempfile.mkdtemp(prefix="product_catalog_load_test_")
+        try:
+            providers_dict = {}
+            for provider in range(self.providers):
+                provider_name = "LoadTest%s" % provider
+                products_list = os.path.join(directory, "%s.json" % provider_name)
+                with open(products_list, "w") as file:
+                    json.dump(["LT%s-%06d" % (provider, product) for product in range(self.products)], file)
+                providers_dict[provider_name] = dict(
+                    self.provider_values,
+                    name=provider_name,
+                    parser="etilize",
+                    url=server.url(),
+                    products_list=products_list,
+                    max_products=None,
+                )
+            components = dict(self.components, circuit_breakers=circuit_breakers)
+            started = time.monotonic()
+            run_providers(self.run_provider, providers_dict, components, self.profiler)
+            elapsed = time.monotonic() - started
+        finally:
+            server.stop()
+            shutil.rmtree(directory, ignore_errors=True)
+        requests = sorted(
+            (request for breaker in circuit_breakers.breakers.values() for request in breaker.requests),
+            key=lambda request: request[0] - request[1],
+        )
+        durations = sorted(duration for _, duration, _ in requests)
+        request_seconds = max(end for end, _, _ in requests) - requests[0][0] + requests[0][1] if requests else 0
+        bulk_loader = self.components.get("bulk_loader")
+        dynamodb_pool = self.components.get("dynamodb_pool")
+        products = bulk_loader.stats["staged"] if bulk_loader is not None else server.metrics()["served"]
+        return {
+            "providers": self.providers,
+            "products": products,
+            "requests": len(requests),
+            "failed_requests": sum(1 for _, _, success in requests if not success),
+            "requests_per_second": round(len(requests) / request_seconds, 1) if request_seconds else None,
+            "latency": {
+                key: round(value, 4) if value is not None else None
+                for key, value in (
+                    ("p50", percentile(durations, 0.5)),
+                    ("p90", percentile(durations, 0.9)),
+                    ("p99", percentile(durations, 0.99)),
+                    ("max", durations[-1] if durations else None),
+                )
+            },
+            "seconds": round(elapsed, 2),
+            "products_per_second": round(products / elapsed, 1) if elapsed else None,
+            "server": server.metrics(),
+            "circuit_breakers": circuit_breakers.metrics(),
+            "dynamodb_pool": dynamodb_pool.metrics() if dynamodb_pool is not None else None,
+        }
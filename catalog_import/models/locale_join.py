@@ -0,0 +1,145 @@
+class LocaleJoin:
+    """
+    A class used to represent the join of the feeds of several locales of the same provider
+    ...
+
+    The feeds are read together and joined on `join_key`, so each product is emitted once with the records of every
+    locale, as {"Locales": {location_tag: record}}. Sorted feeds are merge-joined holding one record per feed; unsorted
+    feeds are hash-joined holding at most `max_pending` incomplete products, the oldest of which is emitted with the
+    locales found so far when the limit is reached.
+
+    Attributes:
+        sources {dict} -- The iterable of records of each location tag, the first one being the primary locale
+        join_key {string} -- The key of the records to join on, like "@ID" or "MPN"
+        sorted {Bool} -- Whether every feed is sorted by the join key
+        max_pending {int} -- The maximum number of incomplete products held by the hash join
+
+    Methods:
+        key(record) -- Get the join key of a record
+        sort_key(key) -- Get the sortable form of a join key
+        joined(locales) -- Get the joined product of the records of each locale
+        merge_join() -- Join sorted feeds
+        hash_join() -- Join unsorted feeds
+        records() -- Yield the joined products
+
+    """
+    def __init__(self, **kwargs) -> None:
+        """
+        Parameters:
+            sources {dict} -- The iterable of records of each location tag, the first one being the primary locale
+            join_key {string} -- The key of the records to join on
+            sorted {Bool} -- Whether every feed is sorted by the join key
+            max_pending {int} -- The maximum number of incomplete products held by the hash join
+
+        """
+        self.sources = kwargs.get("sources")
+        self.join_key = kwargs.get("join_key") or "@ID"
+        self.sorted = kwargs.get("sorted", False)
+        self.max_pending = kwargs.get("max_pending") or 10000
+
+    def key(self, record):
+        """
+        Get the join key of a record
+
+        Arguments:
+            record {dict} -- The record
+
+        Returns:
+            {str} -- The join key
+
+        """
+        return str(record.get(self.join_key))
+
+    @staticmethod
+    def sort_key(key):
+        """
+        Get the sortable form of a join key, comparing numeric keys as numbers
+
+        Arguments:
+            key {str} -- The join key
+
+        Returns:
+            {tuple} -- The sortable key
+
+        """
+        return (0, int(key), key) if key.isdigit() else (1, 0, key)
+
+    def joined(self, locales):
+        """
+        Get the joined product of the records of each locale, in the order of the sources
+
+        Arguments:
+            locales {dict} -- The record of each location tag found
+
+        Returns:
+            {dict} -- The joined product
+
+        """
+        return {"Locales": {tag: locales[tag] for tag in self.sources if tag in locales}}
+
+    def merge_join(self):
+        """
+        Join feeds sorted by the join key, reading one record of each feed at a time
+
+        Returns:
+            {generator} -- The joined products
+
+        """
+        iterators = {tag: iter(source) for tag, source in self.sources.items()}
+        heads = {}
+        for tag, iterator in iterators.items():
+            record = next(iterator, None)
+            if record is not None:
+                heads[tag] = (self.sort_key(self.key(record)), record)
+        while heads:
+            smallest = min(sort_key for sort_key, record in heads.values())
+            locales = {}
+            for tag in [tag for tag, (sort_key, record) in heads.items() if sort_key == smallest]:
+                locales[tag] = heads.pop(tag)[1]
+                record = next(iterators[tag], None)
+                if record is None:
+                    continue
+                sort_key = self.sort_key(self.key(record))
+                if sort_key < smallest:
+                    raise ValueError("The %s feed is not sorted by %s at %s" % (tag, self.join_key, self.key(record)))
+                heads[tag] = (sort_key, record)
+            yield self.joined(locales)
+
+    def hash_join(self):
+        """
+        Join unsorted feeds, reading the feeds in turns and holding the incomplete products by join key
+
+        Returns:
+            {generator} -- The joined products
+
+        """
+        iterators = {tag: iter(source) for tag, source in self.sources.items()}
+        pending = {}
+        while iterators:
+            for tag in list(iterators):
+                record = next(iterators[tag], None)
+                if record is None:
+                    del iterators[tag]
+                    continue
+                key = self.key(record)
+                locales = pending.setdefault(key, {})
+                if tag in locales:  # The key is repeated in the same feed, emit what was found so far
+                    yield self.joined(pending.pop(key))
+                    locales = pending.setdefault(key, {})
+                locales[tag] = record
+                if len(locales) == len(self.sources):
+                    yield self.joined(pending.pop(key))
+                elif len(pending) > self.max_pending:
+                    yield self.joined(pending.pop(next(iter(pending))))
+        for locales in pending.values():
+            yield self.joined(locales)
+
+    def records(self):
+        """
+        Yield the joined products
+
+        Returns:
+            {generator} -- The joined products
+
+        """
+        return self.merge_join() if self.sorted else self.hash_join()
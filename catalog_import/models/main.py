@@ -13,13 +13,29 @@ class Main:
         provider_values {dict} -- The provider's values
         db_table {object} -- The product's db table
         metadata {dict} -- The metadata of the connection
+        bloom_filter {object} -- The filter of the MPNs already stored in the db table, if enabled
+        attribute_dictionary {object} -- The shared attribute dictionary, if enabled
+        category_taxonomy {object} -- The taxonomy of the provider and canonical categories, if enabled
+        description_storage {object} -- The storage of large descriptions, if enabled
+        capacity_controller {object} -- The adaptive write rate shared by the providers, if enabled
+        circuit_breakers {object} -- The circuit breakers of the provider APIs, if enabled
+        quarantine {object} -- The quarantine of failed products and requests, if enabled
+        change_feed {object} -- The feed of the created and updated products, if enabled
+        search_index {object} -- The local search index of the products, if enabled
+        gallery_checker {object} -- The verification of the gallery images, if enabled
+        map_layout {Bool} -- Whether the categories, descriptions and attributes are stored as maps
+        bulk_loader {object} -- The bulk load writing the products to import files instead of the db table, if enabled
+        run_stamp {str} -- The run ID stamped on the products, if the stale sweep is enabled
 
     Methods:
         create_provider() -- Creates the provider's object
         create_connection() -- Creates the connection's object
         get_provider_response() -- Get the dictionary result of the provider's connection
         create_product() -- Creates the product's object
+        parse_response(response, capped) -- Parses the product data of a provider response
         execute() -- Executes the main execution logic for processing the provider response and parsing the product data
+        replay_records(connection, entries) -- Yields the records of quarantined entries, removing the reprocessed ones
+        replay() -- Reprocesses the quarantined products and requests of the provider
 
     """
     def __init__(self, **kwargs) -> None:
@@ -29,12 +45,39 @@ class Main:
             provider_values {dict} -- The provider's values
             db_table {object} -- The product's db table
             metadata {dict} -- The metadata of the connection
+            bloom_filter {object} -- The filter of the MPNs already stored in the db table, if enabled
+            attribute_dictionary {object} -- The shared attribute dictionary, if enabled
+            category_taxonomy {object} -- The taxonomy of the provider and canonical categories, if enabled
+            description_storage {object} -- The storage of large descriptions, if enabled
+            capacity_controller {object} -- The adaptive write rate shared by the providers, if enabled
+            circuit_breakers {object} -- The circuit breakers of the provider APIs, if enabled
+            quarantine {object} -- The quarantine of failed products and requests, if enabled
+            change_feed {object} -- The feed of the created and updated products, if enabled
+            search_index {object} -- The local search index of the products, if enabled
+            gallery_checker {object} -- The verification of the gallery images, if enabled
+            map_layout {Bool} -- Whether the categories, descriptions and attributes are stored as maps
+            bulk_loader {object} -- The bulk load writing the products to import files instead of the db table, if
+                enabled
+            run_stamp {str} -- The run ID stamped on the products, if the stale sweep is enabled
 
         """
         self.provider_name = kwargs.get("provider_name")
         self.provider_values = kwargs.get("provider_values")
         self.db_table = kwargs.get("db_table")
         self.metadata = kwargs.get("metadata")
+        self.bloom_filter = kwargs.get("bloom_filter")
+        self.attribute_dictionary = kwargs.get("attribute_dictionary")
+        self.category_taxonomy = kwargs.get("category_taxonomy")
+        self.description_storage = kwargs.get("description_storage")
+        self.capacity_controller = kwargs.get("capacity_controller")
+        self.circuit_breakers = kwargs.get("circuit_breakers")
+        self.quarantine = kwargs.get("quarantine")
+        self.change_feed = kwargs.get("change_feed")
+        self.search_index = kwargs.get("search_index")
+        self.gallery_checker = kwargs.get("gallery_checker")
+        self.map_layout = kwargs.get("map_layout", False)
+        self.bulk_loader = kwargs.get("bulk_loader")
+        self.run_stamp = kwargs.get("run_stamp")
 
     def create_provider(self):
         """
@@ -61,7 +104,10 @@ class Main:
 
         """
         provider = self.create_provider()
-        return Connection(provider=provider)
+        circuit_breaker = None
+        if self.circuit_breakers is not None:
+            circuit_breaker = self.circuit_breakers.breaker(self.provider_name)
+        return Connection(provider=provider, quarantine=self.quarantine, circuit_breaker=circuit_breaker)
 
     def get_provider_response(self):
         """
@@ -90,25 +136,106 @@ class Main:
         """
         return Products(**kwargs)
 
-    def execute(self):
+    def parse_response(self, response, capped=True):
         """
-        Executes the main execution logic for processing the provider response and parsing the product data.
+        Parses the product data of a provider response.
 
-        This method retrieves the provider's response using the `get_provider_response` method.
-        It then creates a product object using the retrieved response, the database table object, and the metadata.
-        Depending on the provider name, the method calls the appropriate parsing method to parse the response
-        and update the product data accordingly.
+        The method creates a product object using the response, the database table object, and the metadata, parsing
+        up to the provider's `max_products` products, 10 if it is not set, or every product if not `capped`.
+        Depending on the provider's `parser` value, or the provider name if it is not set, the method calls the
+        appropriate parsing method to parse the response and update the product data accordingly.
+
+        Arguments:
+            response {dict|iterable} -- The provider response.
+            capped {Bool} -- Whether the products are capped at the provider's `max_products`.
 
         Returns:
             None
         """
-        response = self.get_provider_response()
         product = self.create_product(
             response=response,
             db_table=self.db_table,
-            metadata=self.metadata
+            metadata=self.metadata,
+            bloom_filter=self.bloom_filter,
+            attribute_dictionary=self.attribute_dictionary,
+            category_taxonomy=self.category_taxonomy,
+            description_storage=self.description_storage,
+            capacity_controller=self.capacity_controller,
+            quarantine=self.quarantine,
+            change_feed=self.change_feed,
+            search_index=self.search_index,
+            gallery_checker=self.gallery_checker,
+            map_layout=self.map_layout,
+            bulk_loader=self.bulk_loader,
+            run_stamp=self.run_stamp,
+            max_products=self.provider_values.get("max_products", 10) if capped else None,
         )
-        if self.provider_name.startswith("Icecat"):
+        parser = self.provider_values.get("parser") or self.provider_name
+        if parser.lower().startswith("icecat"):
             product.parse_response_icecat()
-        elif self.provider_name.startswith("Etilize"):
+        elif parser.lower().startswith("etilize"):
             product.parse_response_etilize()
+
+    def execute(self):
+        """
+        Executes the main execution logic for processing the provider response and parsing the product data.
+
+        This method retrieves the provider's response using the `get_provider_response` method and parses it with the
+        `parse_response` method.
+
+        Returns:
+            None
+        """
+        response = self.get_provider_response()
+        self.parse_response(response)
+
+    def replay(self):
+        """
+        Reprocesses the quarantined products and requests of the provider.
+
+        Quarantined requests are sent again and quarantined products are parsed again from their raw record, without
+        the `max_products` cap of a run. The entries are removed from the quarantine once they are reprocessed; those
+        failing again are quarantined anew.
+
+        Returns:
+            None
+        """
+        if self.quarantine is None:
+            return
+        entries = self.quarantine.entries(self.metadata.get("name"))
+        if not entries:
+            return
+        self.parse_response(self.replay_records(self.create_connection(), entries), capped=False)
+        print("Products Replayed: ", self.metadata.get("name"), len(entries))
+
+    def replay_records(self, connection, entries):
+        """
+        Yields the records of quarantined entries, sending the quarantined requests again.
+
+        An entry is removed from the quarantine once the record it yielded was processed, when the next record is asked
+        for, in batches of 100 entries and for the last processed entries when the records stop, so the entries of a
+        replay interrupted by an error stay in the quarantine.
+
+        Arguments:
+            connection {object} -- The connection of the provider.
+            entries {list} -- The quarantine entries of the provider.
+
+        Returns:
+            {generator} -- The product records.
+        """
+        processed = []
+        try:
+            for entry in entries:
+                if entry.get("Stage") == "request":
+                    request_result = connection.request_product(entry.get("Payload"))
+                    if request_result:
+                        yield request_result
+                else:
+                    yield entry.get("Payload")
+                processed.append(entry)
+                if len(processed) >= 100:
+                    self.quarantine.remove(processed)
+                    processed = []
+        finally:
+            if processed:
+                self.quarantine.remove(processed)
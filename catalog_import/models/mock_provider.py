@@ -0,0 +1,240 @@
+import gzip
+import random
+import time
+import zlib
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from threading import Lock, Thread
+from urllib.parse import parse_qs, urlparse
+from xml.sax.saxutils import escape, quoteattr
+from .capacity_controller import TokenBucket
+
+
+class MockProviderServer:
+    """
+    A class used to represent a local stand-in of the Etilize API, serving synthetic product responses
+    ...
+
+    The server answers the product requests of the Etilize URL, with the MPN in the `partNumber` query parameter, with
+    a product in the XML layout of Etilize: its identifiers, descriptions, category and a datasheet of `attributes`
+    attributes in groups. The product of an MPN is always the same for the same `seed`. Each response is delayed by
+    `latency` seconds plus a random jitter, a share `error_rate` of the requests fail with a server error, and the
+    requests above `throttle_rate` per second are throttled with a 429 status, so the API path can be measured under
+    reproducible conditions. The bodies are gzip compressed when the client accepts it and `compress` is set.
+
+    Attributes:
+        host {string} -- The address the server listens on
+        port {int} -- The port the server listens on, a free port if 0
+        latency {float} -- The seconds each response is delayed
+        latency_jitter {float} -- The maximum random seconds added to the delay
+        error_rate {float} -- The share of requests failing with a 500 status
+        throttle_rate {float} -- The requests per second above which requests get a 429 status, no limit if not set
+        attributes {int} -- The number of attributes of each product
+        description_size {int} -- The number of characters of the long description of each product
+        compress {Bool} -- Whether the bodies are gzip compressed for the clients accepting it
+        seed {int} -- The seed of the synthetic products and of the failures
+        stats {dict} -- The requests, served products, failed and throttled requests, and bytes sent
+
+    Methods:
+        product_xml(mpn) -- Get the synthetic product of an MPN
+        respond(handler) -- Answer a request
+        url() -- Get the provider URL of the server
+        start() -- Start the server in a background thread
+        stop() -- Stop the server
+        metrics() -- Get the request statistics
+
+    """
+    WORDS = ("compact", "wireless", "display", "battery", "portable", "storage", "memory", "network", "premium", "office")
+    TEMPLATE = (
+        '<?xml version="1.0" encoding="UTF-8"?>'
+        "<Product>"
+        '<skus><sku type="MFGPARTNUMBER" number=%s/><sku type="EAN" number="%013d"/><sku type="UPC" number="%012d"/></skus>'
+        "<descriptions>"
+        '<description type="0">%s</description>'
+        '<description type="1">%s</description>'
+        '<description type="2">%s</description>'
+        '<description type="3">%s</description>'
+        "</descriptions>"
+        '<category id="%s" name=%s/>'
+        "<datasheet>%s</datasheet>"
+        "</Product>"
+    )
+
+    def __init__(self, **kwargs) -> None:
+        """
+        Parameters:
+            host {string} -- The address the server listens on
+            port {int} -- The port the server listens on, a free port if 0
+            latency {float} -- The seconds each response is delayed
+            latency_jitter {float} -- The maximum random seconds added to the delay
+            error_rate {float} -- The share of requests failing with a 500 status
+            throttle_rate {float} -- The requests per second above which requests get a 429 status
+            attributes {int} -- The number of attributes of each product
+            description_size {int} -- The number of characters of the long description of each product
+            compress {Bool} -- Whether the bodies are gzip compressed for the clients accepting it
+            seed {int} -- The seed of the synthetic products and of the failures
+
+        """
+        self.host = kwargs.get("host") or "127.0.0.1"
+        self.port = kwargs.get("port") or 0
+        self.latency = kwargs.get("latency") or 0
+        self.latency_jitter = kwargs.get("latency_jitter") or 0
+        self.error_rate = kwargs.get("error_rate") or 0
+        self.throttle_rate = kwargs.get("throttle_rate") or False
+        self.attributes = kwargs.get("attributes") or 40
+        self.description_size = kwargs.get("description_size") or 1000
+        self.compress = kwargs.get("compress", True)
+        self.seed = kwargs.get("seed") or 0
+        self.stats = {"requests": 0, "served": 0, "failed": 0, "throttled": 0, "bytes": 0}
+        self.random = random.Random(self.seed)
+        self.bucket = TokenBucket(rate=self.throttle_rate) if self.throttle_rate else None
+        self.lock = Lock()
+        self.server = None
+        self.thread = None
+
+    def product_xml(self, mpn):
+        """
+        Get the synthetic product of an MPN, the same on every request
+
+        Arguments:
+            mpn {string} -- The MPN of the product
+
+        Returns:
+            {bytes} -- The XML response of the product
+
+        """
+        product_random = random.Random("%s-%s" % (self.seed, mpn))
+        number = zlib.crc32(mpn.encode("utf-8"))
+        words = [product_random.choice(self.WORDS) for _ in range(max(1, self.description_size // 8))]
+        description = " ".join(words)[:self.description_size]
+        groups = max(2, self.attributes // 10)  # The parser expects a list of groups
+        datasheet = []
+        for group in range(groups):
+            attributes = "".join(
+                "<attribute name=%s>%s %s</attribute>" % (
+                    quoteattr("Attribute %s" % attribute),
+                    product_random.choice(self.WORDS),
+                    product_random.randint(1, 1000),
+                )
+                for attribute in range(group, self.attributes, groups)
+            )
+            datasheet.append("<attributeGroup name=%s>%s</attributeGroup>" % (quoteattr("Group %s" % group), attributes))
+        return (self.TEMPLATE % (
+            quoteattr(mpn),
+            number,
+            number % 10 ** 12,
+            escape(mpn),
+            escape("%s %s" % (mpn, " ".join(words[:3]))),
+            escape(" ".join(words[:20])),
+            escape(description),
+            10000 + number % 500,
+            quoteattr("Category %s" % (number % 500)),
+            "".join(datasheet),
+        )).encode("utf-8")
+
+    def respond(self, handler):
+        """
+        Answer a request, after the latency, with the product of its MPN, a server error or a throttling status
+
+        Arguments:
+            handler {object} -- The request handler
+
+        Returns:
+            None
+
+        """
+        with self.lock:
+            self.stats["requests"] += 1
+            delay = self.latency + self.random.uniform(0, self.latency_jitter)
+            failed = self.random.random() < self.error_rate
+            throttled = False
+            if self.bucket is not None:
+                self.bucket.refill()
+                throttled = self.bucket.tokens < 1
+                if not throttled:
+                    self.bucket.tokens -= 1
+        time.sleep(delay)
+        mpn = (parse_qs(urlparse(handler.path).query).get("partNumber") or [""])[0]
+        if throttled or failed or not mpn:
+            status = 429 if throttled else 500 if failed else 400
+            body = b"<ErrorResponse>%d</ErrorResponse>" % status
+            handler.send_response(status)
+        else:
+            body = self.product_xml(mpn)
+            handler.send_response(200)
+        if self.compress and "gzip" in handler.headers.get("Accept-Encoding", ""):
+            body = gzip.compress(body, compresslevel=1)
+            handler.send_header("Content-Encoding", "gzip")
+        handler.send_header("Content-Type", "application/xml")
+        handler.send_header("Content-Length", str(len(body)))
+        handler.end_headers()
+        handler.wfile.write(body)
+        with self.lock:
+            key = "throttled" if throttled else "failed" if failed or not mpn else "served"
+            self.stats[key] += 1
+            self.stats["bytes"] += len(body)
+
+    def url(self):
+        """
+        Get the provider URL of the server, with the MPN placeholder of the Etilize URL
+
+        Returns:
+            {string} -- The URL
+
+        """
+        return "http://%s:%s/web/etilize/request?method=getProduct&partNumber=%%s" % (self.host, self.server.server_port)
+
+    def start(self):
+        """
+        Start the server in a background thread, one thread per connection
+
+        Returns:
+            {object} -- The server itself
+
+        """
+        mock_provider = self
+
+        class Handler(BaseHTTPRequestHandler):
+            protocol_version = "HTTP/1.1"
+
+            def handle(self):
+                try:
+                    super().handle()
+                except (ConnectionResetError, BrokenPipeError):
+                    pass  # The client dropped its keep-alive connection, which is not an error of the server
+
+            def do_GET(self):
+                mock_provider.respond(self)
+
+            def log_message(self, format, *args):
+                pass
+
+        self.server = ThreadingHTTPServer((self.host, self.port), Handler)
+        self.server.daemon_threads = True
+        self.thread = Thread(target=self.server.serve_forever, daemon=True)
+        self.thread.start()
+        return self
+
+    def stop(self):
+        """
+        Stop the server
+
+        Returns:
+            None
+
+        """
+        if self.server is not None:
+            self.server.shutdown()
+            self.server.server_close()
+            self.thread.join()
+            self.server = None
+
+    def metrics(self):
+        """
+        Get the request statistics
+
+        Returns:
+            {dict} -- The requests, served products, failed and throttled requests, and bytes sent
+
+        """
+        with self.lock:
+            return dict(self.stats)
@@ -1,4 +1,14 @@
+import re
+from itertools import islice
 from boto3.dynamodb.conditions import Attr
+from botocore.exceptions import ClientError
+from .attribute_dictionary import label_from_name
+from .gallery_checker import image_urls
+from .item_layout import MAP_FIELDS, to_map, to_map_layout
+
+# Map entries set one by one by document path in an update, above which the whole map is set instead, so the update
+# expression stays under the 4 KB limit of DynamoDB
+MAX_PATH_ENTRIES = 25
 
 
 class Products:
@@ -10,47 +20,199 @@ class Products:
     information.
 
     Attributes:
-        response {dict} -- The response object containing product information.
+        response {dict|iterable} -- The response object containing product information, or an iterable of product records.
         db_table {object} -- The database table object.
         metadata {dict} -- Additional metadata associated with the product.
+        bloom_filter {object} -- The filter of the MPNs already stored in the database, if enabled.
+        attribute_dictionary {object} -- The shared attribute dictionary, if enabled.
+        category_taxonomy {object} -- The taxonomy of the provider and canonical categories, if enabled.
+        description_storage {object} -- The storage of large descriptions, if enabled.
+        capacity_controller {object} -- The adaptive write rate shared by the providers, if enabled.
+        quarantine {object} -- The quarantine of the products that fail, if enabled.
+        change_feed {object} -- The feed of the created and updated products, if enabled.
+        search_index {object} -- The local search index of the products, if enabled.
+        gallery_checker {object} -- The verification of the gallery images, if enabled.
+        map_layout {Bool} -- Whether the categories, descriptions and attributes are stored as maps.
+        bulk_loader {object} -- The bulk load writing the products to import files instead of the database, if enabled.
+        run_stamp {str} -- The run ID stamped on the products under their provider name, if the stale sweep is enabled.
+        max_products {int} -- The maximum number of products parsed from a response, or None for every product.
 
     Methods:
+        write(operation, **kwargs) -- Runs a database write within the shared write rate
+        emit_change(mpn, operation, fields) -- Sends a product change to the change feed
         create(**kwargs) -- Creates a product entry in the database
+        category_key(category) -- Gets the provider identifying a category
+        description_key(description) -- Gets the provider and locales identifying a description
+        add_assignment(update_expression, assignment) -- Adds an assignment to a SET update expression
         update(**kwargs) -- Updates a product entry in the database with new values
+        index_product(document) -- Adds a product document to the search index
+        gallery_images(urls, results) -- Gets the checked gallery images in the layout of the product item
+        record_gallery(mpn, urls, results) -- Stores the checked gallery images of a stored product
+        check_gallery(product) -- Starts the verification of the gallery images of a product
+        store_gallery(mpn, urls) -- Stores the checked gallery images of a written product once they are checked
+        categorize(product) -- Sets the canonical category IDs of a product
+        compact_attributes(product) -- Replaces the attributes list of a product with a map of attribute IDs to values
         upsert_products(**kwargs) -- Upserts products into the database
+        products_records(container, item) -- Gets the product records of the response
+        locale_metadata(location_tag) -- Gets the metadata of a single locale of the provider
+        description_icecat(product, metadata) -- Extracts the descriptions of an Icecat product
+        process_record(parse, record) -- Parses a product record, quarantining it if it fails
         parse_response_icecat() -- Parses the response from the Icecat file and extracts relevant product information
+        parse_product_icecat(product) -- Parses an Icecat product record and upserts it
         parse_response_etilize() -- Parses the response from the Etilize file and extracts relevant product information
+        parse_product_etilize(product_response) -- Parses an Etilize product response and upserts it
 
     """
     def __init__(self, **kwargs) -> None:
         """
         Parameters:
-            response {dict} -- The response object containing product information.
+            response {dict|iterable} -- The response object containing product information, or an iterable of product
+                records.
             db_table {object} -- The database table object.
             metadata {dict} -- Additional metadata associated with the product.
+            bloom_filter {object} -- The filter of the MPNs already stored in the database, if enabled.
+            attribute_dictionary {object} -- The shared attribute dictionary, if enabled.
+            category_taxonomy {object} -- The taxonomy of the provider and canonical categories, if enabled.
+            description_storage {object} -- The storage of large descriptions, if enabled.
+            capacity_controller {object} -- The adaptive write rate shared by the providers, if enabled.
+            quarantine {object} -- The quarantine of the products that fail, if enabled.
+            change_feed {object} -- The feed of the created and updated products, if enabled.
+            search_index {object} -- The local search index of the products, if enabled.
+            gallery_checker {object} -- The verification of the gallery images, if enabled.
+            map_layout {Bool} -- Whether the categories, descriptions and attributes are stored as maps.
+            bulk_loader {object} -- The bulk load writing the products to import files instead of the database, if
+                enabled.
+            run_stamp {str} -- The run ID stamped on the products under their provider name, if the stale sweep is
+                enabled.
+            max_products {int} -- The maximum number of products parsed from a response, or None for every product.
 
         """
         self.response = kwargs.get("response", False)
         self.db_table = kwargs.get("db_table")
         self.metadata = kwargs.get("metadata")
+        self.bloom_filter = kwargs.get("bloom_filter")
+        self.attribute_dictionary = kwargs.get("attribute_dictionary")
+        self.category_taxonomy = kwargs.get("category_taxonomy")
+        self.description_storage = kwargs.get("description_storage")
+        self.capacity_controller = kwargs.get("capacity_controller")
+        self.quarantine = kwargs.get("quarantine")
+        self.change_feed = kwargs.get("change_feed")
+        self.search_index = kwargs.get("search_index")
+        self.gallery_checker = kwargs.get("gallery_checker")
+        self.map_layout = kwargs.get("map_layout", False)
+        self.bulk_loader = kwargs.get("bulk_loader")
+        self.run_stamp = kwargs.get("run_stamp")
+        self.max_products = kwargs.get("max_products", 10)
+
+    def write(self, operation, **kwargs):
+        """
+        Runs a database write within the write rate shared by the providers, if it is enabled.
+
+        Arguments:
+            operation {function} -- The table write method, like `put_item`.
+            **kwargs: Keyword arguments of the write.
+
+        Returns:
+            {dict} -- The response of the write.
+        """
+        if self.capacity_controller is None:
+            return operation(**kwargs)
+        return self.capacity_controller.execute(self.metadata.get("name"), operation, **kwargs)
+
+    def emit_change(self, mpn, operation, fields):
+        """
+        Sends a product change to the change feed, if it is enabled.
+
+        Arguments:
+            mpn {str} -- The MPN of the changed product.
+            operation {str} -- "create" or "update".
+            fields {list} -- The names of the changed fields.
+
+        Returns:
+            None
+        """
+        if self.change_feed is not None:
+            self.change_feed.emit(self.metadata.get("name"), mpn, operation, fields)
 
     def create(self, **kwargs):
         """
         Creates a product entry in the database.
 
+        When `only_new` is set the write is conditioned on the MPN not existing yet, so a product created concurrently
+        by another provider is not overwritten.
+
         Arguments:
             **kwargs: Keyword arguments containing the product information.
 
         Returns:
             None
         """
+        put_kwargs = {"Item": kwargs.get("product")}
+        if kwargs.get("only_new"):
+            put_kwargs["ConditionExpression"] = Attr("MPN").not_exists()
+        self.write(self.db_table.put_item, **put_kwargs)
         print("Product Created: ", kwargs.get("product").get("MPN"))
-        self.db_table.put_item(Item=kwargs.get("product"))
+        self.emit_change(kwargs.get("product").get("MPN"), "create", list(kwargs.get("product")))
+        if self.bloom_filter is not None:
+            self.bloom_filter.add(kwargs.get("product").get("MPN"))
+
+    @staticmethod
+    def category_key(category):
+        """
+        Gets the provider identifying a category, so a product keeps one category per provider.
+
+        Arguments:
+            category {dict} -- The category values.
+
+        Returns:
+            {str} -- The provider name of the category metadata.
+        """
+        return (category.get("Metadata") or {}).get("name")
+
+    @staticmethod
+    def description_key(description):
+        """
+        Gets the provider and locales identifying a description, so a product keeps one description per provider and
+        locale.
+
+        Arguments:
+            description {dict} -- The description values.
+
+        Returns:
+            {str|tuple} -- The description provider, or the provider name and the locale tags of its metadata.
+        """
+        metadata = description.get("Metadata") or {}
+        return description.get("Provider") or (metadata.get("name"), tuple(metadata.get("i18n") or {}))
+
+    @staticmethod
+    def add_assignment(update_expression, assignment):
+        """
+        Adds an assignment to a SET update expression.
+
+        Arguments:
+            update_expression {str} -- The update expression, like "SET " or "SET EAN = :eans".
+            assignment {str} -- The assignment, like "Attributes.#k0 = :k0".
+
+        Returns:
+            {str} -- The update expression with the assignment.
+        """
+        if update_expression != "SET ":
+            return update_expression + ", " + assignment
+        return update_expression + assignment
 
     def update(self, **kwargs):
         """
         Updates a product entry in the database with new values.
 
+        Categories, descriptions and attributes stored as maps are updated by document path, setting only their new
+        entries, or set whole with the new entries when they are more than `MAX_PATH_ENTRIES`; stored as lists they are
+        replaced by a map with the new entries when the product has the map layout. The attribute values of the attribute
+        dictionary are updated the same way.
+        EANs and canonical category IDs only append the new values, and the run stamp of the provider is set by
+        document path. A product whose only change is its run stamp is not sent to the change feed, and the stale flag
+        of a product imported again is removed. The checked gallery images are replaced by the latest results when the
+        stored gallery has the same images.
+
         Arguments:
             **kwargs: Keyword arguments containing the necessary information for updating the product.
 
@@ -72,71 +234,306 @@ class Products:
             else:
                 new_values_update += "%s = :%s" % (new_value, new_value.lower())
 
+        # Fields stored or written as maps, updated by the map entries block below
+        mapped = {
+            field for field in MAP_FIELDS
+            if isinstance(product.get(field), dict) or isinstance(product_found.get(field), dict)
+        }
+        expression_names = {}
+
         # Update categories
-        categories_found_list = [category.get("Name") for category in product_found.get("Categories")]
-        providers_found_list = [category.get("Metadata").get("name") for category in product_found.get("Categories")]
-        categories = product_found.get("Categories").copy()
-        for category in product.get("Categories"):
-            if not category.get("Name") in categories_found_list and not category.get("Metadata").get("name") in providers_found_list:
-                categories.append(category)
-            elif category.get("Name") in categories_found_list and not category.get("Metadata").get("name") in providers_found_list:
-                categories.append(category)
-        if categories != product_found.get("Categories"):
-            new_values_dict[":categories"] = categories
-            if new_values_update != "SET ":
-                new_values_update += ", Categories = :categories"
-            else:
-                new_values_update += "Categories = :categories"
+        if "Categories" not in mapped:
+            categories_providers = {self.category_key(category) for category in product_found.get("Categories")}
+            categories = product_found.get("Categories").copy()
+            for category in product.get("Categories"):
+                if not self.category_key(category) in categories_providers:
+                    categories.append(category)
+            if categories != product_found.get("Categories"):
+                new_values_dict[":categories"] = categories
+                if new_values_update != "SET ":
+                    new_values_update += ", Categories = :categories"
+                else:
+                    new_values_update += "Categories = :categories"
 
         # Update descriptions
-        descriptions_providers = [description.get("Provider") for description in product_found.get("Descriptions")]
-        descriptions = product_found.get("Descriptions").copy()
-        for description in product.get("Descriptions"):
-            if not description.get("Provider") in descriptions_providers:
-                descriptions.append(description)
-        if descriptions != product_found.get("Descriptions"):
-            new_values_dict[":descriptions"] = descriptions
-            if new_values_update != "SET ":
-                new_values_update += ", Descriptions = :descriptions"
-            else:
-                new_values_update += "Descriptions = :descriptions"
+        if "Descriptions" not in mapped:
+            descriptions_providers = [self.description_key(description) for description in product_found.get("Descriptions")]
+            descriptions = product_found.get("Descriptions").copy()
+            for description in product.get("Descriptions"):
+                if not self.description_key(description) in descriptions_providers:
+                    descriptions.append(description)
+            if descriptions != product_found.get("Descriptions"):
+                new_values_dict[":descriptions"] = descriptions
+                if new_values_update != "SET ":
+                    new_values_update += ", Descriptions = :descriptions"
+                else:
+                    new_values_update += "Descriptions = :descriptions"
 
         # Update attributes
-        attributes_registered = [attribute.get("Label") for attribute in product_found.get("Attributes")]
-        attributes = product_found.get("Attributes").copy()
-        for attribute in product.get("Attributes"):
-            if not attribute.get("Label") in attributes_registered:
-                attributes.append(attribute)
-        if attributes != product_found.get("Attributes"):
-            new_values_dict[":attributes"] = attributes
-            if new_values_update != "SET ":
-                new_values_update += ", Attributes = :attributes"
+        if "Attributes" in product and "Attributes" in product_found and "Attributes" not in mapped:
+            attributes_registered = [attribute.get("Label") for attribute in product_found.get("Attributes")]
+            attributes = product_found.get("Attributes").copy()
+            for attribute in product.get("Attributes"):
+                if not attribute.get("Label") in attributes_registered:
+                    attributes.append(attribute)
+            if attributes != product_found.get("Attributes"):
+                new_values_dict[":attributes"] = attributes
+                if new_values_update != "SET ":
+                    new_values_update += ", Attributes = :attributes"
+                else:
+                    new_values_update += "Attributes = :attributes"
+
+        # Update the entries of categories, descriptions and attributes maps
+        for field in MAP_FIELDS:
+            if field not in mapped or field not in product or field not in product_found:
+                continue
+            entries = to_map(field, product.get(field))
+            new_entries = {
+                key: entry for key, entry in entries.items()
+                if not isinstance(product_found.get(field), dict) or not key in product_found.get(field)
+            }
+            if isinstance(product_found.get(field), dict) and len(new_entries) <= MAX_PATH_ENTRIES:
+                # Set only the new entries, by document path
+                for key, entry in new_entries.items():
+                    placeholder = "k%s" % len(expression_names)
+                    expression_names["#" + placeholder] = key
+                    new_values_dict[":" + placeholder] = entry
+                    new_values_update = self.add_assignment(
+                        new_values_update, "%s.#%s = :%s" % (field, placeholder, placeholder)
+                    )
+            elif isinstance(product_found.get(field), dict):
+                # Set the whole map with the new entries
+                new_values_dict[":" + field.lower()] = {**product_found.get(field), **new_entries}
+                new_values_update = self.add_assignment(new_values_update, "%s = :%s" % (field, field.lower()))
+            else:
+                # Replace the stored list with a map holding the new entries
+                entries_found = to_map(field, product_found.get(field))
+                for key, entry in entries.items():
+                    entries_found.setdefault(key, entry)
+                new_values_dict[":" + field.lower()] = entries_found
+                new_values_update = self.add_assignment(new_values_update, "%s = :%s" % (field, field.lower()))
+
+        # Update attribute values of the shared attribute dictionary, by document path
+        if "AttributeValues" in product and "AttributeValues" in product_found:
+            new_attribute_values = {
+                attribute_id: values for attribute_id, values in product.get("AttributeValues").items()
+                if not attribute_id in product_found.get("AttributeValues")
+            }
+            if len(new_attribute_values) <= MAX_PATH_ENTRIES:
+                for attribute_id, values in new_attribute_values.items():
+                    placeholder = "k%s" % len(expression_names)
+                    expression_names["#" + placeholder] = attribute_id
+                    new_values_dict[":" + placeholder] = values
+                    new_values_update = self.add_assignment(
+                        new_values_update, "AttributeValues.#%s = :%s" % (placeholder, placeholder)
+                    )
             else:
-                new_values_update += "Attributes = :attributes"
+                new_values_dict[":attributevalues"] = {**product_found.get("AttributeValues"), **new_attribute_values}
+                new_values_update = self.add_assignment(new_values_update, "AttributeValues = :attributevalues")
+
+        # Update canonical category IDs, appending the new ones
+        if "CategoryIDs" in product and "CategoryIDs" in product_found:
+            category_ids = [
+                category_id for category_id in dict.fromkeys(product.get("CategoryIDs"))
+                if not category_id in product_found.get("CategoryIDs")
+            ]
+            if category_ids:
+                new_values_dict[":categoryids"] = category_ids
+                new_values_update = self.add_assignment(new_values_update, "CategoryIDs = list_append(CategoryIDs, :categoryids)")
+
+        # Update the run stamps of the providers, by document path
+        if "Runs" in product and "Runs" in product_found:
+            for provider, run_id in product.get("Runs").items():
+                if product_found.get("Runs").get(provider) != run_id:
+                    placeholder = "k%s" % len(expression_names)
+                    expression_names["#" + placeholder] = provider
+                    new_values_dict[":" + placeholder] = run_id
+                    new_values_update = self.add_assignment(
+                        new_values_update, "Runs.#%s = :%s" % (placeholder, placeholder)
+                    )
 
-        # Update EANs
-        eans = product_found.get("EAN").copy()
+        # Update EANs, appending the new ones
+        eans = []
         for ean in product.get("EAN"):
-            if not ean in eans:
+            if not ean in product_found.get("EAN") and not ean in eans:
                 eans.append(ean)
-        if eans != product_found.get("EAN"):
+        if eans:
             new_values_dict[":eans"] = eans
             if new_values_update != "SET ":
-                new_values_update += ", EAN = :eans"
+                new_values_update += ", EAN = list_append(EAN, :eans)"
             else:
-                new_values_update += "EAN = :eans"
-
-        if new_values_dict:
-            print("Product Updated: ", product_found.get("MPN"))
+                new_values_update += "EAN = list_append(EAN, :eans)"
+
+        # Replace the checked gallery images with the latest results of the same gallery
+        if (
+            "GalleryImages" in product and "GalleryImages" in product_found
+            and product.get("GalleryImages") != product_found.get("GalleryImages")
+            and image_urls(product.get("Gallery")) == image_urls(product_found.get("Gallery"))
+        ):
+            new_values_dict[":galleryimages"] = product.get("GalleryImages")
+            new_values_update = self.add_assignment(new_values_update, "GalleryImages = :galleryimages")
+
+        # Clear the stale flag set by a sweep, as the product is imported again
+        remove_values = " REMOVE StaleSince" if "StaleSince" in product_found else ""
+
+        if new_values_dict or remove_values:
+            # A product whose only change is its run stamp is written without being reported as updated
+            changed_fields = [
+                field for field in dict.fromkeys(re.findall(r"(\w+)(?:\.#\w+)? = ", new_values_update))
+                if field != "Runs"
+            ]
+            if changed_fields:
+                print("Product Updated: ", product_found.get("MPN"))
+            update_kwargs = {}
+            if expression_names:
+                update_kwargs["ExpressionAttributeNames"] = expression_names
+            if new_values_dict:
+                update_kwargs["ExpressionAttributeValues"] = new_values_dict
             # Perform the update operation in the database
-            self.db_table.update_item(
+            self.write(
+                self.db_table.update_item,
                 Key={
                     'MPN': product_found.get("MPN"),
                 },
-                UpdateExpression=new_values_update,
-                ExpressionAttributeValues=new_values_dict,
-                ReturnValues="UPDATED_NEW"
+                UpdateExpression=(new_values_update if new_values_dict else "") + remove_values,
+                ReturnValues="UPDATED_NEW",
+                **update_kwargs
+            )
+            if changed_fields:
+                self.emit_change(product_found.get("MPN"), "update", changed_fields)
+
+    def index_product(self, document):
+        """
+        Adds a product document to the search index, if it is enabled.
+
+        Arguments:
+            document {dict} -- The search document of the product, or None if the index is disabled.
+
+        Returns:
+            None
+        """
+        if document is not None:
+            self.search_index.add(document)
+
+    @staticmethod
+    def gallery_images(urls, results):
+        """
+        Gets the checked gallery images in the layout of the product item.
+
+        Arguments:
+            urls {list} -- The image URLs of the product.
+            results {dict} -- The results of the checks by URL.
+
+        Returns:
+            {list} -- The URL, status code, content type and size of each image.
+        """
+        return [
+            {
+                "URL": url,
+                "Status": results.get(url, {}).get("Status"),
+                "ContentType": results.get(url, {}).get("ContentType"),
+                "Size": results.get(url, {}).get("Size"),
+            }
+            for url in urls
+        ]
+
+    def record_gallery(self, mpn, urls, results):
+        """
+        Stores the checked gallery images of a product once their checks finish, on a thread of the gallery checker.
+
+        The write is conditioned on the product existing, so a product whose write failed is not created with only its
+        gallery images; those results stay in the cache of the checker and are stored with the product by a later run.
+
+        Arguments:
+            mpn {str} -- The MPN of the product.
+            urls {list} -- The image URLs of the product.
+            results {dict} -- The results of the checks by URL.
+
+        Returns:
+            None
+        """
+        try:
+            self.write(
+                self.db_table.update_item,
+                Key={"MPN": mpn},
+                UpdateExpression="SET GalleryImages = :galleryimages",
+                ConditionExpression=Attr("MPN").exists(),
+                ExpressionAttributeValues={":galleryimages": self.gallery_images(urls, results)},
             )
+        except ClientError as error:
+            if error.response.get("Error", {}).get("Code") != "ConditionalCheckFailedException":
+                raise
+
+    def check_gallery(self, product):
+        """
+        Starts the verification of the gallery images of a product, if it is enabled, without waiting for it.
+
+        The images already checked by this run or by a recent one are stored with the product; otherwise they are
+        stored by `store_gallery` once the product is written and their checks finish, unless the products are bulk
+        loaded and not in the database yet.
+
+        Arguments:
+            product {dict} -- The product values.
+
+        Returns:
+            {list} -- The image URLs to store once the product is written, or None.
+        """
+        if self.gallery_checker is None:
+            return None
+        urls = image_urls(product.get("Gallery"))
+        if not urls:
+            return None
+        results = self.gallery_checker.check(urls)
+        if results is not None:
+            product["GalleryImages"] = self.gallery_images(urls, results)
+            return None
+        return None if self.bulk_loader is not None else urls
+
+    def store_gallery(self, mpn, urls):
+        """
+        Stores the checked gallery images of a written product, at once if their checks already finished, or once
+        they finish on a thread of the gallery checker.
+
+        Arguments:
+            mpn {str} -- The MPN of the product.
+            urls {list} -- The image URLs of the product, or None if there is nothing to store.
+
+        Returns:
+            None
+        """
+        if not urls:
+            return
+        results = self.gallery_checker.check(urls, lambda results: self.record_gallery(mpn, urls, results))
+        if results is not None:
+            self.record_gallery(mpn, urls, results)
+
+    def categorize(self, product):
+        """
+        Sets the canonical category IDs of a product and of each of its categories, when the category taxonomy is
+        enabled, so the products of every provider can be browsed by the same categories.
+
+        Arguments:
+            product {dict} -- The product values.
+
+        Returns:
+            None
+        """
+        if self.category_taxonomy is not None and product.get("Categories") is not None:
+            product["CategoryIDs"] = self.category_taxonomy.categorize(product.get("Categories"), self.metadata)
+
+    def compact_attributes(self, product):
+        """
+        Replaces the attributes list of a product with a map of attribute IDs to values, when the shared attribute
+        dictionary is enabled. The names and labels are stored once in the dictionary instead of in every product.
+
+        Arguments:
+            product {dict} -- The product values.
+
+        Returns:
+            None
+        """
+        if self.attribute_dictionary is not None and "Attributes" in product:
+            product["AttributeValues"] = self.attribute_dictionary.compact(product.pop("Attributes"), self.metadata)
 
     def upsert_products(self, **kwargs):
         """
@@ -145,12 +542,48 @@ class Products:
         If a product with the specified MPN (Manufacturer Part Number) already exists in the database, it updates the
         existing product with the provided information. Otherwise, it creates a new product entry.
 
+        If the filter of existing MPNs rules the product out, it is created without reading the database. The write is
+        conditional, and falls back to the read and update path if the product was created in the meantime.
+
+        The search document is taken from the record before its attributes are compacted and its descriptions are packed,
+        and it is indexed once the product is written. The gallery images not checked yet are stored once the product is
+        written and their checks finish.
+
+        When the products are bulk loaded, the record is staged for the import files instead, without reading or
+        writing the database. When the stale sweep is enabled, the run ID is stamped on the product under the provider
+        name, so the products the provider stopped sending can be found by their older stamp.
+
         Arguments:
             **kwargs: Keyword arguments containing the necessary information for creating or updating the product.
 
         Returns:
             None
         """
+        document = None
+        if self.search_index is not None:
+            document = self.search_index.document(kwargs.get("product"), self.metadata)
+        gallery_urls = self.check_gallery(kwargs.get("product"))
+        self.categorize(kwargs.get("product"))
+        self.compact_attributes(kwargs.get("product"))
+        if self.description_storage is not None:
+            self.description_storage.pack(kwargs.get("product"))
+        if self.map_layout:
+            to_map_layout(kwargs.get("product"))
+        if self.run_stamp is not None:
+            kwargs.get("product")["Runs"] = {self.metadata.get("name"): self.run_stamp}
+        if self.bulk_loader is not None:
+            self.bulk_loader.add(kwargs.get("product"))
+            self.index_product(document)
+            return
+        if self.bloom_filter is not None and kwargs.get("mpn") not in self.bloom_filter:
+            try:
+                self.create(only_new=True, **kwargs)
+                self.store_gallery(kwargs.get("mpn"), gallery_urls)
+                self.index_product(document)
+                return
+            except ClientError as error:
+                if error.response.get("Error", {}).get("Code") != "ConditionalCheckFailedException":
+                    raise
         response = self.db_table.scan(FilterExpression=Attr("MPN").eq(kwargs.get("mpn")))
         count = response.get("Count")
         if count == 0:
@@ -158,6 +591,85 @@ class Products:
         else:
             kwargs["product_found"] = response.get("Items")[0]
             self.update(**kwargs)
+            if "Gallery" in kwargs["product_found"] and image_urls(kwargs["product_found"].get("Gallery")) != gallery_urls:
+                gallery_urls = None  # The stored gallery is the gallery of another provider
+        self.store_gallery(kwargs.get("mpn"), gallery_urls)
+        self.index_product(document)
+
+    def products_records(self, container=None, item=None):
+        """
+        Gets the product records of the response.
+
+        A dictionary response, like a parsed XML file, holds the records under `container` and `item`; any other
+        response, like the streaming records of a JSON, NDJSON or CSV file, is already an iterable of records.
+
+        Arguments:
+            container {str} -- The key of the products container in a dictionary response.
+            item {str} -- The key of the products inside the container.
+
+        Returns:
+            {iterable} -- The product records.
+        """
+        if not self.response:
+            return []
+        if isinstance(self.response, dict):
+            products = (self.response.get(container) or {}).get(item) or []
+            return [products] if isinstance(products, dict) else products
+        return self.response
+
+    def locale_metadata(self, location_tag):
+        """
+        Gets the metadata of a single locale of the provider.
+
+        Arguments:
+            location_tag {str} -- The location tag, like "en_US".
+
+        Returns:
+            {dict} -- The metadata with only the given locale in `i18n`.
+        """
+        metadata = self.metadata.copy()
+        metadata["i18n"] = {location_tag: (self.metadata.get("i18n") or {}).get(location_tag, location_tag)}
+        return metadata
+
+    def description_icecat(self, product, metadata):
+        """
+        Extracts the descriptions of an Icecat product.
+
+        Arguments:
+            product {dict} -- The Icecat product record.
+            metadata {dict} -- The metadata of the description.
+
+        Returns:
+            {dict} -- The description values.
+        """
+        return {
+            "1": product.get("Description", {}).get("ProductName", False),
+            "2": product.get("Description", {}).get("ShortSummaryDescription", False),
+            "3": product.get("Description", {}).get("ShortDescription", False),
+            "4": product.get("Description", {}).get("LongDescription", False),
+            "Metadata": metadata
+        }
+
+    def process_record(self, parse, record):
+        """
+        Parses a product record and upserts it, isolating its errors.
+
+        If the quarantine is enabled, a record that fails to parse or to be written is stored with the reason and its raw
+        payload, and the run continues with the next record.
+
+        Arguments:
+            parse {function} -- The method parsing and upserting a single record.
+            record {dict} -- The raw product record.
+
+        Returns:
+            None
+        """
+        try:
+            parse(record)
+        except Exception as error:
+            if self.quarantine is None:
+                raise
+            self.quarantine.add(self.metadata.get("name"), "product", error, record)
 
     def parse_response_icecat(self):
         """
@@ -168,63 +680,77 @@ class Products:
         constructs a dictionary containing the extracted information and calls the `upsert_products` method to upsert the
         product into the database.
 
+        A product joined from several locale files, as {"Locales": {location_tag: record}}, is parsed from its first
+        locale and gets one description per locale.
+
         Returns:
             None
         """
-        products_response = self.response["Products"]["Product"] if self.response else []
+        products_response = self.products_records("Products", "Product")
 
         # Iterate over each product in the response
-        for product in products_response[:10]:
-            # Extract EAN values from the product
-            ean_value = product.get("EANS", {}).get("EAN")
-            ean = [ean_value] if isinstance(ean_value, str) else ean_value
-
-            # Extract attribute information from the product
-            attributes_dict = product.get("Attributes", {}).get("Attribute", [])
-
-            # Extract SKU from the product
-            sku = [product.get("SKU", False)] if isinstance(product.get("SKU", False), str) else product.get("SKU", False)
-
-            # Construct a dictionary with the extracted product information
-            product_values = {
-                "MPN": product.get("MPN", False),
-                "EAN": ean if ean else [],
-                "SKU": sku,
-                "Categories": [
-                    {
-                        "ID": product.get("Category", {}).get("CategoryID"),
-                        "Name": product.get("Category", {}).get("CategoryName"),
-                        "Metadata": self.metadata,
-                    }
-                ] if product.get("Category") else [],
-                "Descriptions": [
-                    {
-                        "1": product.get("Description", {}).get("ProductName", False),
-                        "2": product.get("Description", {}).get("ShortSummaryDescription", False),
-                        "3": product.get("Description", {}).get("ShortDescription", False),
-                        "4": product.get("Description", {}).get("LongDescription", False),
-                        "Metadata": self.metadata
-                    }
-                ],
-                "Gallery": [
-                    {
-                        "Value": product.get("Images", {}).get("ImageLink", []),
-                        "Metadata": self.metadata,
-                    }
-                ],
-                "Attributes": [
-                    {
-                        "Name": attribute["Name"],
-                        "Label": attribute["Label"],
-                        "Values": [{"Value": attribute["Value"], "Metadata": self.metadata}],
-                    }
-                    for attribute in attributes_dict
-                ]
-            }
+        for product in islice(products_response, self.max_products):
+            self.process_record(self.parse_product_icecat, product)
 
-            # Upsert the product into the database
-            self.upsert_products(mpn=product_values.get("MPN"), product=product_values)
+    def parse_product_icecat(self, product):
+        """
+        Parses a product record of the Icecat response and upserts it into the database.
 
+        Arguments:
+            product {dict} -- The Icecat product record.
+
+        Returns:
+            None
+        """
+        # Use the primary locale of a product joined from several locale files
+        locales = product.get("Locales", {})
+        if locales:
+            product = next(iter(locales.values()))
+
+        # Extract EAN values from the product
+        ean_value = product.get("EANS", {}).get("EAN")
+        ean = [ean_value] if isinstance(ean_value, str) else ean_value
+
+        # Extract attribute information from the product
+        attributes_dict = product.get("Attributes", {}).get("Attribute", [])
+
+        # Extract SKU from the product
+        sku = [product.get("SKU", False)] if isinstance(product.get("SKU", False), str) else product.get("SKU", False)
+
+        # Construct a dictionary with the extracted product information
+        product_values = {
+            "MPN": product.get("MPN", False),
+            "EAN": ean if ean else [],
+            "SKU": sku,
+            "Categories": [
+                {
+                    "ID": product.get("Category", {}).get("CategoryID") or product.get("Category", {}).get("CategoryId"),
+                    "Name": product.get("Category", {}).get("CategoryName"),
+                    "Metadata": self.metadata,
+                }
+            ] if product.get("Category") else [],
+            "Descriptions": [
+                self.description_icecat(record, self.locale_metadata(location_tag))
+                for location_tag, record in locales.items()
+            ] if locales else [self.description_icecat(product, self.metadata)],
+            "Gallery": [
+                {
+                    "Value": product.get("Images", {}).get("ImageLink", []),
+                    "Metadata": self.metadata,
+                }
+            ],
+            "Attributes": [
+                {
+                    "Name": attribute["Name"],
+                    "Label": attribute["Label"],
+                    "Values": [{"Value": attribute["Value"], "Metadata": self.metadata}],
+                }
+                for attribute in attributes_dict
+            ]
+        }
+
+        # Upsert the product into the database
+        self.upsert_products(mpn=product_values.get("MPN"), product=product_values)
 
     def parse_response_etilize(self):
         """
@@ -234,6 +760,19 @@ class Products:
         descriptions, categories, and attributes. It constructs a dictionary containing the extracted information and calls the
         `upsert_products` method to upsert the product into the database.
 
+        Returns:
+            None
+        """
+        for product_response in islice(self.products_records(), self.max_products):
+            self.process_record(self.parse_product_etilize, product_response)
+
+    def parse_product_etilize(self, product_response):
+        """
+        Parses a product response of Etilize and upserts the product into the database.
+
+        Arguments:
+            product_response {dict} -- The Etilize product response.
+
         Returns:
             None
         """
@@ -243,82 +782,81 @@ class Products:
             "UPC",
             "GTIN"
         ]
-        for product_response in self.response[:10]:
-            product_values = dict()
-            descriptions = dict()
-            attributes_list = list()
-            product = product_response.get("Product")
-
-            # Extract identifiers from the product
-            identifiers_list = product.get("skus", {}).get("sku", [])
-            identifiers_metadata = self.metadata.copy()
-            identifiers_metadata.pop("i18n", None)
-            for identifier in identifiers_list:
-                identifier_name = identifier.get("@type")
-                identifier_value = identifier.get("@number")
-
-                # Check if the identifier is valid
-                if identifier_name in valid_identifiers:
-                    identifier_name = "MPN" if identifier_name == "MFGPARTNUMBER" else identifier_name
-                    main_identifiers = ["EAN", "GTIN", "UPC"]
-
-                    # Handle main identifiers (EAN, GTIN, UPC)
-                    if identifier_name in main_identifiers:
-                        identifier_value = (
-                            [identifier_value] if isinstance(identifier_value, str) else identifier_value
-                        )
-                        product_values[identifier_name] = identifier_value
-                    else:
-                        product_values[identifier_name] = {
-                            "Value": identifier_value,
-                            "Metadata": identifiers_metadata,
-                        } if identifier_name != "MPN" else identifier_value
-
-            # Extract descriptions from the product
-            descriptions_dict = product.get("descriptions", {})
-            descriptions_list = descriptions_dict.get("description", [])[1:]
-            for description in descriptions_list:
-                description_name = description.get("@type")
-                description_value = description.get("#text")
-                descriptions[description_name] = description_value
-
-            descriptions["Metadata"] = self.metadata
-
-            # Extract category and attribute information from the product
-            category_values = product.get("category", {})
-            datasheet = product.get("datasheet", {}).get("attributeGroup", [])
-            for group in datasheet:
-                attributes = group.get("attribute", [])
-                if not isinstance(attributes, list):
-                    attributes = [attributes]
-                for attribute in attributes:
-                    attribute_name = attribute.get("@name")
-                    attribute_label = attribute_name.lower().replace(" ", "_")
-                    attribute_value = attribute.get("#text")
-                    attributes_list.append(
-                        {
-                            "Name": attribute_name,
-                            "Label": attribute_label,
-                            "Values": [{"Value": attribute_value, "Metadata": self.metadata}],
-                        }
+        product_values = dict()
+        descriptions = dict()
+        attributes_list = list()
+        product = product_response.get("Product")
+
+        # Extract identifiers from the product
+        identifiers_list = product.get("skus", {}).get("sku", [])
+        identifiers_metadata = self.metadata.copy()
+        identifiers_metadata.pop("i18n", None)
+        for identifier in identifiers_list:
+            identifier_name = identifier.get("@type")
+            identifier_value = identifier.get("@number")
+
+            # Check if the identifier is valid
+            if identifier_name in valid_identifiers:
+                identifier_name = "MPN" if identifier_name == "MFGPARTNUMBER" else identifier_name
+                main_identifiers = ["EAN", "GTIN", "UPC"]
+
+                # Handle main identifiers (EAN, GTIN, UPC)
+                if identifier_name in main_identifiers:
+                    identifier_value = (
+                        [identifier_value] if isinstance(identifier_value, str) else identifier_value
                     )
+                    product_values[identifier_name] = identifier_value
+                else:
+                    product_values[identifier_name] = {
+                        "Value": identifier_value,
+                        "Metadata": identifiers_metadata,
+                    } if identifier_name != "MPN" else identifier_value
+
+        # Extract descriptions from the product
+        descriptions_dict = product.get("descriptions", {})
+        descriptions_list = descriptions_dict.get("description", [])[1:]
+        for description in descriptions_list:
+            description_name = description.get("@type")
+            description_value = description.get("#text")
+            descriptions[description_name] = description_value
+
+        descriptions["Metadata"] = self.metadata
+
+        # Extract category and attribute information from the product
+        category_values = product.get("category", {})
+        datasheet = product.get("datasheet", {}).get("attributeGroup", [])
+        for group in datasheet:
+            attributes = group.get("attribute", [])
+            if not isinstance(attributes, list):
+                attributes = [attributes]
+            for attribute in attributes:
+                attribute_name = attribute.get("@name")
+                attribute_label = label_from_name(attribute_name)
+                attribute_value = attribute.get("#text")
+                attributes_list.append(
+                    {
+                        "Name": attribute_name,
+                        "Label": attribute_label,
+                        "Values": [{"Value": attribute_value, "Metadata": self.metadata}],
+                    }
+                )
 
-            # Construct the product dictionary with all extracted information
-            product_values.update(
-                {
-                    "Categories": [
-                        {
-                            "ID": category_values.get("@id"),
-                            "Name": category_values.get("@name"),
-                            "Metadata": self.metadata,
-                        }
-                    ],
-                    "Descriptions": [
-                        descriptions
-                    ],
-                    "Attributes": attributes_list
-                }
-            )
+        # Construct the product dictionary with all extracted information
+        product_values.update(
+            {
+                "Categories": [
+                    {
+                        "ID": category_values.get("@id"),
+                        "Name": category_values.get("@name"),
+                        "Metadata": self.metadata,
+                    }
+                ],
+                "Descriptions": [
+                    descriptions
+                ],
+                "Attributes": attributes_list
+            }
+        )
 
-            # Upsert the product into the database
-            self.upsert_products(mpn=product_values.get("MPN"), product=product_values)
+        # Upsert the product into the database
+        self.upsert_products(mpn=product_values.get("MPN"), product=product_values)
@@ -0,0 +1,299 @@
+import cProfile
+import fnmatch
+import io
+import json
+import os
+import pstats
+import resource
+import sys
+import time
+import tracemalloc
+from threading import Event, Lock, Thread, get_ident
+
+
+class Profiler:
+    """
+    A class used to represent the profiling of an import run
+    ...
+
+    Every provider thread runs under its own cProfile profiler, except on Python 3.12 and later where a single cProfile
+    profiler can be active in the process, so only the first provider thread is profiled. A sampler thread collects
+    the stacks of the provider threads and the resident memory of the process, keeping a tracemalloc snapshot of the
+    moment with the most traced memory. When the run stops, the profiler writes per provider a cProfile dump, a
+    cProfile report and a collapsed-stack file for flamegraph tools, and for the whole process the top allocations of
+    each stage at the memory peak and a summary with the peak RSS. The collapsed stacks cover every provider, profiled
+    with cProfile or not.
+
+    Attributes:
+        directory {string} -- The directory of the profiling files
+        interval {float} -- The seconds between stack samples
+        snapshot_interval {float} -- The minimum seconds between tracemalloc snapshots
+        top {int} -- The number of entries of each report
+        frames {int} -- The number of frames stored by tracemalloc for each allocation
+        threads {dict} -- The provider name of each profiled thread
+        samples {dict} -- The count of each collapsed stack by provider name
+        peak_rss {int} -- The peak resident memory sampled, in bytes
+        peak_snapshot {object} -- The tracemalloc snapshot with the most traced memory
+
+    Methods:
+        start() -- Start tracing allocations and sampling stacks
+        sample() -- Collect the stacks of the provider threads and the resident memory once
+        snapshot() -- Keep a tracemalloc snapshot if the traced memory is the highest seen
+        sampler() -- Sample until the profiler stops
+        wrap(target, name) -- Wrap a thread target to profile it
+        frame_label(frame) -- Get the flamegraph label of a frame
+        stage(traceback) -- Get the stage of an allocation traceback
+        write_collapsed(name) -- Write the collapsed stacks of a provider
+        write_allocations(snapshot) -- Write the top allocations of each stage
+        stop() -- Stop profiling and write the summary
+
+    """
+    STAGES = {
+        "parse": ["*/file_manager.py", "*/xmltodict.py", "*/http_stream.py", "*/locale_join.py", "*/connection.py"],
+        "db": ["*/boto3/*", "*/botocore/*", "*/urllib3/*", "*/capacity_controller.py"],
+        "transform": [
+            "*/products.py",
+            "*/attribute_dictionary.py",
+            "*/description_storage.py",
+            "*/bloom_filter.py",
+        ],
+    }
+
+    def __init__(self, **kwargs) -> None:
+        """
+        Parameters:
+            directory {string} -- The directory of the profiling files
+            interval {float} -- The seconds between stack samples
+            snapshot_interval {float} -- The minimum seconds between tracemalloc snapshots
+            top {int} -- The number of entries of each report
+            frames {int} -- The number of frames stored by tracemalloc for each allocation
+
+        """
+        self.directory = kwargs.get("directory") or "/tmp/product_catalog_profile"
+        self.interval = kwargs.get("interval") or 0.005
+        self.snapshot_interval = kwargs.get("snapshot_interval") or 1
+        self.top = kwargs.get("top") or 25
+        self.frames = kwargs.get("frames") or 25
+        self.threads = {}
+        self.samples = {}
+        self.peak_rss = 0
+        self.peak_snapshot = None
+        self.peak_traced = 0
+        self.snapshot_time = 0
+        self.started = None
+        self.stopped = Event()
+        self.lock = Lock()
+        self.sampler_thread = None
+
+    def start(self):
+        """
+        Start tracing allocations and sampling stacks
+
+        Returns:
+            None
+
+        """
+        os.makedirs(self.directory, exist_ok=True)
+        self.started = time.time()
+        tracemalloc.start(self.frames)
+        self.sampler_thread = Thread(target=self.sampler, daemon=True)
+        self.sampler_thread.start()
+
+    def sample(self):
+        """
+        Collect the stacks of the provider threads and the resident memory of the process once
+
+        Returns:
+            None
+
+        """
+        frames = sys._current_frames()
+        with self.lock:
+            for ident, name in self.threads.items():
+                frame = frames.get(ident)
+                stack = []
+                while frame is not None:
+                    stack.append(self.frame_label(frame))
+                    frame = frame.f_back
+                if stack:
+                    collapsed = ";".join([name] + stack[::-1])
+                    counts = self.samples.setdefault(name, {})
+                    counts[collapsed] = counts.get(collapsed, 0) + 1
+        try:
+            with open("/proc/self/statm") as file:
+                rss = int(file.read().split()[1]) * resource.getpagesize()
+            self.peak_rss = max(self.peak_rss, rss)
+        except (OSError, IndexError, ValueError):  # Not a Linux /proc filesystem
+            pass
+
+    def snapshot(self):
+        """
+        Keep a tracemalloc snapshot if the traced memory is the highest seen, at most once per snapshot interval
+
+        Returns:
+            None
+
+        """
+        if time.time() - self.snapshot_time < self.snapshot_interval:
+            return
+        current, peak = tracemalloc.get_traced_memory()
+        if current > self.peak_traced:
+            self.peak_traced = current
+            self.peak_snapshot = tracemalloc.take_snapshot()
+            self.snapshot_time = time.time()
+
+    def sampler(self):
+        """
+        Sample the provider threads until the profiler stops
+
+        Returns:
+            None
+
+        """
+        while not self.stopped.wait(self.interval):
+            self.sample()
+            self.snapshot()
+
+    def wrap(self, target, name):
+        """
+        Wrap a thread target to run it under cProfile, if no other profiler is active in the process, and register its
+        thread for the stack samples
+
+        Arguments:
+            target {function} -- The thread target
+            name {str} -- The provider name
+
+        Returns:
+            profiled_target {function} -- The wrapped target
+
+        """
+        def profiled_target(**kwargs):
+            profile = cProfile.Profile()
+            with self.lock:
+                self.threads[get_ident()] = name
+            try:
+                profile.enable()
+            except ValueError as error:  # Another profiler is active, as cProfile runs once per process on Python 3.12+
+                print("Provider Not Profiled With cProfile: ", name, error)
+                profile = None
+            try:
+                return target(**kwargs)
+            finally:
+                with self.lock:
+                    self.threads.pop(get_ident(), None)
+                if profile is not None:
+                    profile.disable()
+                    profile.dump_stats(os.path.join(self.directory, "%s.pstats" % name))
+                    report = io.StringIO()
+                    pstats.Stats(profile, stream=report).sort_stats("cumulative").print_stats(self.top)
+                    with open(os.path.join(self.directory, "%s.cprofile.txt" % name), "w") as file:
+                        file.write(report.getvalue())
+                self.write_collapsed(name)
+        return profiled_target
+
+    @staticmethod
+    def frame_label(frame):
+        """
+        Get the flamegraph label of a frame, like "parse_response_icecat (products.py)"
+
+        Arguments:
+            frame {object} -- The stack frame
+
+        Returns:
+            {str} -- The frame label
+
+        """
+        return "%s (%s)" % (frame.f_code.co_name, os.path.basename(frame.f_code.co_filename))
+
+    def stage(self, traceback):
+        """
+        Get the stage of an allocation, from the most recent frame of its traceback that belongs to a stage
+
+        Arguments:
+            traceback {object} -- The tracemalloc traceback of the allocation, from the oldest frame
+
+        Returns:
+            {str} -- The stage name, or "other"
+
+        """
+        for frame in reversed(traceback):
+            for stage, patterns in self.STAGES.items():
+                if any(fnmatch.fnmatch(frame.filename, pattern) for pattern in patterns):
+                    return stage
+        return "other"
+
+    def write_collapsed(self, name):
+        """
+        Write the collapsed stacks of a provider, one "frame;frame;frame count" line per stack
+
+        Arguments:
+            name {str} -- The provider name
+
+        Returns:
+            None
+
+        """
+        with self.lock:
+            counts = dict(self.samples.get(name, {}))
+        with open(os.path.join(self.directory, "%s.collapsed" % name), "w") as file:
+            for stack, count in sorted(counts.items()):
+                file.write("%s %s\n" % (stack, count))
+
+    def write_allocations(self, snapshot):
+        """
+        Write the top allocations of a snapshot for each stage, by source line
+
+        Arguments:
+            snapshot {object} -- The tracemalloc snapshot
+
+        Returns:
+            totals {dict} -- The allocated bytes of each stage
+
+        """
+        stages = {}
+        for trace in snapshot.traces:
+            lines = stages.setdefault(self.stage(trace.traceback), {})
+            frame = trace.traceback[-1]
+            key = "%s:%s" % (frame.filename, frame.lineno)
+            size, count = lines.get(key, (0, 0))
+            lines[key] = (size + trace.size, count + 1)
+        totals = {}
+        with open(os.path.join(self.directory, "allocations.txt"), "w") as file:
+            for stage, lines in sorted(stages.items()):
+                totals[stage] = sum(size for size, count in lines.values())
+                file.write("[%s] %.1f KiB\n" % (stage, totals[stage] / 1024))
+                for key, (size, count) in sorted(lines.items(), key=lambda item: -item[1][0])[:self.top]:
+                    file.write("  %10.1f KiB %8d blocks  %s\n" % (size / 1024, count, key))
+                file.write("\n")
+        return totals
+
+    def stop(self):
+        """
+        Stop profiling and write the allocations report and the summary of the run
+
+        Returns:
+            summary {dict} -- The summary of the run
+
+        """
+        self.stopped.set()
+        if self.sampler_thread is not None:
+            self.sampler_thread.join()
+        self.sample()
+        self.snapshot_time = 0
+        self.snapshot()
+        current, peak = tracemalloc.get_traced_memory()
+        snapshot = self.peak_snapshot or tracemalloc.take_snapshot()
+        tracemalloc.stop()
+        summary = {
+            "seconds": round(time.time() - self.started, 3),
+            "peak_rss_bytes": max(self.peak_rss, resource.getrusage(resource.RUSAGE_SELF).ru_maxrss * 1024),
+            "traced_peak_bytes": peak,
+            "traced_current_bytes": current,
+            "snapshot_bytes": self.peak_traced,
+            "stage_bytes": self.write_allocations(snapshot),
+            "samples": {name: sum(counts.values()) for name, counts in self.samples.items()},
+        }
+        with open(os.path.join(self.directory, "summary.json"), "w") as file:
+            json.dump(summary, file, indent=4)
+        print("Profile Written: ", self.directory)
+        return summary
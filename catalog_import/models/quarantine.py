@@ -0,0 +1,242 @@
+import datetime
+import json
+import os
+import traceback
+import uuid
+from threading import Lock
+import boto3
+
+
+def quarantine_entry(provider, stage, error, payload):
+    """
+    Create a quarantine entry
+
+    Arguments:
+        provider {str} -- The provider name
+        stage {str} -- The stage that failed: "product" for a record, "request" for an API request
+        error {object|str} -- The exception or the reason of the failure
+        payload {object} -- The raw record, or the product identifier of the request
+
+    Returns:
+        {dict} -- The quarantine entry
+
+    """
+    if isinstance(error, Exception):
+        reason = "".join(traceback.format_exception_only(type(error), error)).strip()
+    else:
+        reason = str(error)
+    return {
+        "ID": uuid.uuid4().hex,
+        "Provider": provider,
+        "Stage": stage,
+        "Reason": reason,
+        "Datetime": datetime.datetime.now().strftime("%m-%d-%Y, %H:%M:%S"),
+        "Payload": payload,
+    }
+
+
+class LocalQuarantine:
+    """
+    A class used to represent a quarantine of failed products and requests in a local NDJSON file
+    ...
+
+    Attributes:
+        filepath {string} -- The filepath of the NDJSON file
+
+    Methods:
+        add(provider, stage, error, payload) -- Store a failed product or request
+        entries(provider) -- Get the stored entries of a provider
+        remove(entries) -- Remove replayed entries
+
+    """
+    def __init__(self, **kwargs) -> None:
+        """
+        Parameters:
+            filepath {string} -- The filepath of the NDJSON file
+
+        """
+        self.filepath = kwargs.get("filepath") or "/tmp/product_catalog_quarantine.ndjson"
+        self.lock = Lock()
+
+    def add(self, provider, stage, error, payload):
+        """
+        Store a failed product or request
+
+        Arguments:
+            provider {str} -- The provider name
+            stage {str} -- The stage that failed
+            error {object|str} -- The exception or the reason of the failure
+            payload {object} -- The raw record, or the product identifier of the request
+
+        Returns:
+            None
+
+        """
+        entry = quarantine_entry(provider, stage, error, payload)
+        print("Product Quarantined: ", provider, stage, entry.get("Reason"))
+        line = json.dumps(entry, default=str) + "\n"
+        with self.lock:
+            with open(self.filepath, "a", encoding="utf-8") as file:
+                file.write(line)
+
+    def entries(self, provider=None):
+        """
+        Get the stored entries, of every provider or of a single one
+
+        Arguments:
+            provider {str} -- The provider name, or None for every provider
+
+        Returns:
+            {list} -- The quarantine entries
+
+        """
+        with self.lock:
+            if not os.path.isfile(self.filepath):
+                return []
+            with open(self.filepath, encoding="utf-8") as file:
+                entries = [json.loads(line) for line in file if line.strip()]
+        return [entry for entry in entries if provider is None or entry.get("Provider") == provider]
+
+    def remove(self, entries):
+        """
+        Remove replayed entries
+
+        Arguments:
+            entries {list} -- The entries to remove
+
+        Returns:
+            None
+
+        """
+        ids = {entry.get("ID") for entry in entries}
+        with self.lock:
+            if not os.path.isfile(self.filepath):
+                return
+            temporary_filepath = "%s.%s.tmp" % (self.filepath, os.getpid())
+            with open(self.filepath, encoding="utf-8") as file, open(temporary_filepath, "w", encoding="utf-8") as output:
+                for line in file:
+                    if line.strip() and json.loads(line).get("ID") not in ids:
+                        output.write(line)
+            os.replace(temporary_filepath, self.filepath)
+
+
+class SqsQuarantine:
+    """
+    A class used to represent a quarantine of failed products and requests in an SQS-compatible queue
+    ...
+
+    The queue is read once, by the first provider asking for its entries, and the entries are routed by provider, so
+    the replay threads of the providers do not hide the entries of each other. Replayed entries are deleted from the
+    queue; entries that are read but not removed, like those of the providers not replayed, reappear after the
+    visibility timeout of the queue.
+
+    Attributes:
+        queue_url {string} -- The URL of the queue
+        client {object} -- The SQS client
+        received {dict} -- The entries read from the queue and not yet taken, by provider, None before the queue is read
+
+    Methods:
+        add(provider, stage, error, payload) -- Store a failed product or request
+        entries(provider) -- Get the stored entries of a provider
+        remove(entries) -- Remove replayed entries
+
+    """
+    def __init__(self, **kwargs) -> None:
+        """
+        Parameters:
+            queue_url {string} -- The URL of the queue
+            client {object} -- The SQS client, created from the default session if not given
+            endpoint_url {string} -- The endpoint of an SQS-compatible service, if the client is not given
+
+        """
+        self.queue_url = kwargs.get("queue_url")
+        self.client = kwargs.get("client") or boto3.client("sqs", endpoint_url=kwargs.get("endpoint_url") or None)
+        self.received = None
+        self.lock = Lock()
+
+    def add(self, provider, stage, error, payload):
+        """
+        Store a failed product or request
+
+        Arguments:
+            provider {str} -- The provider name
+            stage {str} -- The stage that failed
+            error {object|str} -- The exception or the reason of the failure
+            payload {object} -- The raw record, or the product identifier of the request
+
+        Returns:
+            None
+
+        """
+        entry = quarantine_entry(provider, stage, error, payload)
+        print("Product Quarantined: ", provider, stage, entry.get("Reason"))
+        self.client.send_message(QueueUrl=self.queue_url, MessageBody=json.dumps(entry, default=str))
+
+    def entries(self, provider=None):
+        """
+        Get the entries available in the queue, of every provider or of a single one. The queue is read on the first
+        call, and each entry is returned once.
+
+        Arguments:
+            provider {str} -- The provider name, or None for every provider
+
+        Returns:
+            entries {list} -- The quarantine entries
+
+        """
+        with self.lock:
+            if self.received is None:
+                self.received = {}
+                while True:
+                    response = self.client.receive_message(QueueUrl=self.queue_url, MaxNumberOfMessages=10, WaitTimeSeconds=1)
+                    messages = response.get("Messages", [])
+                    if not messages:
+                        break
+                    for message in messages:
+                        entry = json.loads(message.get("Body"))
+                        entry["ReceiptHandle"] = message.get("ReceiptHandle")
+                        self.received.setdefault(entry.get("Provider"), []).append(entry)
+            if provider is not None:
+                return self.received.pop(provider, [])
+            entries = [entry for provider_entries in self.received.values() for entry in provider_entries]
+            self.received.clear()
+            return entries
+
+    def remove(self, entries):
+        """
+        Remove replayed entries
+
+        Arguments:
+            entries {list} -- The entries to remove, as returned by `entries`
+
+        Returns:
+            None
+
+        """
+        for start in range(0, len(entries), 10):
+            self.client.delete_message_batch(
+                QueueUrl=self.queue_url,
+                Entries=[
+                    {"Id": str(index), "ReceiptHandle": entry.get("ReceiptHandle")}
+                    for index, entry in enumerate(entries[start:start + 10])
+                ],
+            )
+
+
+def create_quarantine(quarantine_settings):
+    """
+    Create the quarantine described by the settings
+
+    Arguments:
+        quarantine_settings {dict} -- The settings of the quarantine, with a "type" of "sqs" or "local"
+
+    Returns:
+        {object} -- The quarantine
+
+    """
+    if quarantine_settings.get("type") == "sqs":
+        return SqsQuarantine(
+            queue_url=quarantine_settings.get("queue_url"),
+            endpoint_url=quarantine_settings.get("endpoint_url"),
+        )
+    return LocalQuarantine(filepath=quarantine_settings.get("filepath"))
@@ -0,0 +1,412 @@
+from catalog_import.data import settings
+from catalog_import.models.attribute_dictionary import AttributeDictionary
+from catalog_import.models.blob_store import create_blob_store
+from catalog_import.models.bloom_filter import ExistingProductsFilter
+from catalog_import.models.bulk_loader import BulkLoader
+from catalog_import.models.capacity_controller import CapacityController
+from catalog_import.models.category_taxonomy import CategoryTaxonomy
+from catalog_import.models.catalog_reader import CatalogReader, ProductCache
+from catalog_import.models.change_feed import ChangeFeed, create_change_sink
+from catalog_import.models.circuit_breaker import CircuitBreakers
+from catalog_import.models.description_storage import DescriptionStorage
+from catalog_import.models.dynamodb_pool import DynamoDBPool
+from catalog_import.models.gallery_checker import GalleryChecker
+from catalog_import.models.profiler import Profiler
+from catalog_import.models.quarantine import create_quarantine
+from catalog_import.models.search_index import SearchIndex
+from threading import Thread
+import datetime
+import uuid
+
+
+def get_metadata(provider_values):
+    """
+    Retrieves metadata from a provider_values dictionary and constructs a metadata dictionary.
+
+    Arguments:
+        provider_values {dict} -- A dictionary containing provider values.
+
+    Returns:
+        metadata {dict} -- A dictionary containing the retrieved metadata.
+    """
+    locations = provider_values.get("locations")
+    metadata = {
+        "name": provider_values.get("name"),
+        "datetime": datetime.datetime.now().strftime("%m-%d-%Y, %H:%M:%S"),
+        "i18n": {location.get("location_tag"): location.get("location_label") for location in locations},
+    }
+    return metadata
+
+def get_settings(event):
+    """
+    Merges the default run settings with the settings overridden in the event.
+
+    Arguments:
+        event {dict} -- The event dict passed to the function, optionally with a "settings" dict.
+
+    Returns:
+        run_settings {dict} -- The settings of the run.
+    """
+    run_settings = {key: dict(values) for key, values in settings.settings.items()}
+    for key, values in ((event or {}).get("settings") or {}).items():
+        run_settings.setdefault(key, {}).update(values)
+    return run_settings
+
+def get_dynamodb(dynamodb_settings):
+    """
+    Creates the pool of DynamoDB clients of the run, used like the DynamoDB resource by every thread.
+
+    Arguments:
+        dynamodb_settings {dict} -- The settings of the DynamoDB clients.
+
+    Returns:
+        {object} -- The DynamoDB pool.
+    """
+    return DynamoDBPool(
+        region_name=dynamodb_settings.get("region_name"),
+        endpoint_url=dynamodb_settings.get("endpoint_url"),
+        max_pool_connections=dynamodb_settings.get("max_pool_connections"),
+        tcp_keepalive=dynamodb_settings.get("tcp_keepalive"),
+        retry_mode=dynamodb_settings.get("retry_mode"),
+        max_attempts=dynamodb_settings.get("max_attempts"),
+        connect_timeout=dynamodb_settings.get("connect_timeout"),
+        read_timeout=dynamodb_settings.get("read_timeout"),
+    )
+
+def get_bloom_filter(db_table, bloom_settings):
+    """
+    Gets the filter of the MPNs already stored in the db table, if it is enabled.
+
+    Arguments:
+        db_table {object} -- The product's db table.
+        bloom_settings {dict} -- The settings of the filter.
+
+    Returns:
+        {object} -- The filter of existing MPNs, or None if it is disabled.
+    """
+    if not bloom_settings.get("enabled"):
+        return None
+    existing_products_filter = ExistingProductsFilter(
+        db_table=db_table,
+        filepath=bloom_settings.get("filepath"),
+        max_age=bloom_settings.get("max_age"),
+        segments=bloom_settings.get("segments"),
+        error_rate=bloom_settings.get("error_rate"),
+        headroom=bloom_settings.get("headroom"),
+    )
+    return existing_products_filter.get_filter()
+
+def get_attribute_dictionary(dynamodb, dictionary_settings):
+    """
+    Gets the shared attribute dictionary loaded from its table, if it is enabled.
+
+    Arguments:
+        dynamodb {object} -- The DynamoDB resource.
+        dictionary_settings {dict} -- The settings of the attribute dictionary.
+
+    Returns:
+        {object} -- The attribute dictionary, or None if it is disabled.
+    """
+    if not dictionary_settings.get("enabled"):
+        return None
+    attribute_dictionary = AttributeDictionary(
+        db_table=dynamodb.Table(dictionary_settings.get("table_name")),
+    )
+    return attribute_dictionary.load()
+
+def get_category_taxonomy(dynamodb, taxonomy_settings):
+    """
+    Gets the taxonomy of the provider and canonical categories loaded from its table, if it is enabled.
+
+    Arguments:
+        dynamodb {object} -- The DynamoDB resource.
+        taxonomy_settings {dict} -- The settings of the category taxonomy.
+
+    Returns:
+        {object} -- The category taxonomy, or None if it is disabled.
+    """
+    if not taxonomy_settings.get("enabled"):
+        return None
+    category_taxonomy = CategoryTaxonomy(
+        db_table=dynamodb.Table(taxonomy_settings.get("table_name")),
+    )
+    return category_taxonomy.load()
+
+def get_description_storage(storage_settings):
+    """
+    Gets the storage of large descriptions, if it is enabled.
+
+    Arguments:
+        storage_settings {dict} -- The settings of the description storage.
+
+    Returns:
+        {object} -- The description storage, or None if it is disabled.
+    """
+    if not storage_settings.get("enabled"):
+        return None
+    return DescriptionStorage(
+        compress_threshold=storage_settings.get("compress_threshold"),
+        offload_threshold=storage_settings.get("offload_threshold"),
+        blob_store=create_blob_store(storage_settings.get("blob_store") or {}),
+    )
+
+def get_capacity_controller(db_table, controller_settings):
+    """
+    Gets the adaptive write rate shared by the provider threads, if it is enabled.
+
+    The maximum rate is the configured table capacity, or the provisioned write capacity of the table.
+
+    Arguments:
+        db_table {object} -- The product's db table.
+        controller_settings {dict} -- The settings of the capacity controller.
+
+    Returns:
+        {object} -- The capacity controller, or None if it is disabled.
+    """
+    if not controller_settings.get("enabled"):
+        return None
+    table_capacity = controller_settings.get("table_capacity") or db_table.provisioned_throughput.get("WriteCapacityUnits")
+    if not table_capacity:
+        raise ValueError("The capacity controller needs a table_capacity for an on-demand table")
+    return CapacityController(
+        table_capacity=table_capacity,
+        min_rate=controller_settings.get("min_rate"),
+        increase_rate=controller_settings.get("increase_rate"),
+        decrease_factor=controller_settings.get("decrease_factor"),
+        shares=controller_settings.get("shares"),
+        max_retries=controller_settings.get("max_retries"),
+    )
+
+def get_circuit_breakers(breaker_settings):
+    """
+    Gets the circuit breakers of the provider APIs, if they are enabled.
+
+    Arguments:
+        breaker_settings {dict} -- The settings of the circuit breakers.
+
+    Returns:
+        {object} -- The circuit breakers, or None if they are disabled.
+    """
+    if not breaker_settings.get("enabled"):
+        return None
+    return CircuitBreakers(breaker_settings=breaker_settings)
+
+def get_quarantine(quarantine_settings):
+    """
+    Gets the quarantine of failed products and requests, if it is enabled.
+
+    Arguments:
+        quarantine_settings {dict} -- The settings of the quarantine.
+
+    Returns:
+        {object} -- The quarantine, or None if it is disabled.
+    """
+    if not quarantine_settings.get("enabled"):
+        return None
+    return create_quarantine(quarantine_settings)
+
+def get_change_feed(feed_settings, run_id):
+    """
+    Gets the feed of the products created and updated by the run, if it is enabled.
+
+    Arguments:
+        feed_settings {dict} -- The settings of the change feed.
+        run_id {str} -- The identifier of the run.
+
+    Returns:
+        {object} -- The change feed, or None if it is disabled.
+    """
+    if not feed_settings.get("enabled"):
+        return None
+    return ChangeFeed(
+        run_id=run_id,
+        sink=create_change_sink(feed_settings),
+        batch_size=feed_settings.get("batch_size"),
+        flush_interval=feed_settings.get("flush_interval"),
+        max_pending=feed_settings.get("max_pending"),
+        max_retries=feed_settings.get("max_retries"),
+        backoff=feed_settings.get("backoff"),
+    )
+
+def get_search_index(index_settings):
+    """
+    Gets the local search index of the products, if it is enabled.
+
+    Arguments:
+        index_settings {dict} -- The settings of the search index.
+
+    Returns:
+        {object} -- The search index, or None if it is disabled.
+    """
+    if not index_settings.get("enabled"):
+        return None
+    return SearchIndex(
+        filepath=index_settings.get("filepath"),
+        commit_every=index_settings.get("commit_every"),
+    )
+
+def get_gallery_checker(checker_settings):
+    """
+    Gets the verification of the gallery images, if it is enabled.
+
+    Arguments:
+        checker_settings {dict} -- The settings of the gallery checker.
+
+    Returns:
+        {object} -- The gallery checker, or None if it is disabled.
+    """
+    if not checker_settings.get("enabled"):
+        return None
+    return GalleryChecker(
+        workers=checker_settings.get("workers"),
+        timeout=checker_settings.get("timeout"),
+        max_pending=checker_settings.get("max_pending"),
+        cache_filepath=checker_settings.get("cache_filepath"),
+        max_age=checker_settings.get("max_age"),
+    )
+
+def get_bulk_loader(load_settings, run_id):
+    """
+    Gets the bulk load of the products as DynamoDB import files, if it is enabled.
+
+    Arguments:
+        load_settings {dict} -- The settings of the bulk load.
+        run_id {str} -- The identifier of the run.
+
+    Returns:
+        {object} -- The bulk loader, or None if it is disabled.
+    """
+    if not load_settings.get("enabled"):
+        return None
+    return BulkLoader(
+        run_id=run_id,
+        blob_store=create_blob_store(load_settings.get("blob_store", {})),
+        staging_directory=load_settings.get("staging_directory"),
+        partitions=load_settings.get("partitions"),
+        max_file_size=load_settings.get("max_file_size"),
+        samples=load_settings.get("samples"),
+    )
+
+def get_profiler(profiling_settings):
+    """
+    Gets the profiler of the run, if it is enabled.
+
+    Arguments:
+        profiling_settings {dict} -- The settings of the profiler.
+
+    Returns:
+        {object} -- The profiler, or None if it is disabled.
+    """
+    if not profiling_settings.get("enabled"):
+        return None
+    return Profiler(
+        directory=profiling_settings.get("directory"),
+        interval=profiling_settings.get("interval"),
+        snapshot_interval=profiling_settings.get("snapshot_interval"),
+        top=profiling_settings.get("top"),
+        frames=profiling_settings.get("frames"),
+    )
+
+def get_components(dynamodb, db_table, run_settings):
+    """
+    Creates the components shared by every provider thread of a run.
+
+    Arguments:
+        dynamodb {object} -- The DynamoDB resource.
+        db_table {object} -- The product's db table.
+        run_settings {dict} -- The settings of the run.
+
+    Returns:
+        {dict} -- The shared components, as keyword arguments of the main model.
+    """
+    # The run IDs are compared as strings, so they are in UTC to keep their order across time zones and DST changes
+    run_id = "%s-%s" % (datetime.datetime.now(datetime.timezone.utc).strftime("%Y%m%d%H%M%S"), uuid.uuid4().hex[:8])
+    return {
+        "db_table": db_table,
+        "bloom_filter": get_bloom_filter(db_table, run_settings.get("bloom_filter", {})),
+        "attribute_dictionary": get_attribute_dictionary(dynamodb, run_settings.get("attribute_dictionary", {})),
+        "category_taxonomy": get_category_taxonomy(dynamodb, run_settings.get("category_taxonomy", {})),
+        "description_storage": get_description_storage(run_settings.get("description_storage", {})),
+        "capacity_controller": get_capacity_controller(db_table, run_settings.get("capacity_controller", {})),
+        "circuit_breakers": get_circuit_breakers(run_settings.get("circuit_breaker", {})),
+        "quarantine": get_quarantine(run_settings.get("quarantine", {})),
+        "change_feed": get_change_feed(run_settings.get("change_feed", {}), run_id),
+        "search_index": get_search_index(run_settings.get("search_index", {})),
+        "gallery_checker": get_gallery_checker(run_settings.get("gallery_checker", {})),
+        "map_layout": run_settings.get("item_layout", {}).get("maps", False),
+        "bulk_loader": get_bulk_loader(run_settings.get("bulk_load", {}), run_id),
+        "run_stamp": run_id if run_settings.get("stale_sweep", {}).get("enabled") else None,
+        "dynamodb_pool": dynamodb if isinstance(dynamodb, DynamoDBPool) else None,
+    }
+
+def get_catalog_reader(dynamodb, db_table, run_settings):
+    """
+    Creates the read API of the products db table, decoding the products with the attribute dictionary and the
+    description storage of the settings.
+
+    Arguments:
+        dynamodb {object} -- The DynamoDB resource.
+        db_table {object} -- The product's db table.
+        run_settings {dict} -- The settings of the run.
+
+    Returns:
+        {object} -- The catalog reader.
+    """
+    reader_settings = run_settings.get("catalog_reader", {})
+    cache = None
+    if reader_settings.get("cache_enabled"):
+        cache = ProductCache(max_entries=reader_settings.get("cache_entries"), ttl=reader_settings.get("cache_ttl"))
+    return CatalogReader(
+        dynamodb=dynamodb,
+        db_table=db_table,
+        attribute_dictionary=get_attribute_dictionary(dynamodb, run_settings.get("attribute_dictionary", {})),
+        description_storage=get_description_storage(run_settings.get("description_storage", {})),
+        cache=cache,
+        max_retries=reader_settings.get("max_retries"),
+    )
+
+def run_providers(target, providers_dict, components, profiler=None):
+    """
+    Executes a thread per provider and waits for all of them.
+
+    Arguments:
+        target {function} -- The function executed by each thread with the provider keyword arguments.
+        providers_dict {dict} -- The providers to execute, by provider name.
+        components {dict} -- The components shared by every provider thread.
+        profiler {object} -- The profiler of the run, if the run is profiled.
+
+    Returns:
+        None
+    """
+    if profiler is not None:
+        profiler.start()
+    threads = []
+    for provider_name, provider_values in providers_dict.items():
+        provider = {
+            "provider_name": provider_name,
+            "provider_values": provider_values,
+            "metadata": get_metadata(provider_values),
+            **components,
+        }
+        x = Thread(target=profiler.wrap(target, provider_name) if profiler else target, kwargs=provider)
+        threads.append(x)
+        x.start()
+
+    for thread in threads:
+        thread.join()
+    if components.get("bloom_filter") is not None:
+        components["bloom_filter"].close()
+    if components.get("gallery_checker") is not None:
+        components["gallery_checker"].close()
+    if components.get("change_feed") is not None:
+        components["change_feed"].close()
+    if components.get("search_index") is not None:
+        components["search_index"].close()
+    if components.get("bulk_loader") is not None:
+        components["bulk_loader"].close()
+    if components.get("run_stamp") is not None:
+        print("Products Stamped With Run: ", components["run_stamp"], list(providers_dict))
+    if components.get("dynamodb_pool") is not None:
+        print("DynamoDB Pool: ", components["dynamodb_pool"].metrics())
+    if profiler is not None:
+        profiler.stop()
@@ -0,0 +1,284 @@
+import os
+import sqlite3
+from threading import Lock
+
+
+class SearchIndex:
+    """
+    A class used to represent a local full-text and attribute index of the imported products
+    ...
+
+    The index is a SQLite database with an FTS5 table over the names, descriptions and attribute label/value pairs of
+    the products, and plain tables of their categories and attributes for exact filters. It holds one document per MPN
+    and provider, replaced by every record of that provider, so it is updated incrementally from the records that the
+    import writes.
+
+    Attributes:
+        filepath {string} -- The filepath of the SQLite database
+        commit_every {int} -- The number of indexed documents between commits
+        pending {int} -- The number of documents indexed since the last commit
+
+    Methods:
+        create_schema() -- Create the tables of the index
+        document(product, metadata) -- Get the document of a product record
+        add(document) -- Index a document, replacing the previous one of its MPN and provider
+        commit() -- Commit the indexed documents
+        match_query(text) -- Get the FTS5 query of a text
+        search(text, category, providers, attribute, limit) -- Find documents
+        close() -- Commit and close the index
+
+    """
+    def __init__(self, **kwargs) -> None:
+        """
+        Parameters:
+            filepath {string} -- The filepath of the SQLite database
+            commit_every {int} -- The number of indexed documents between commits
+
+        """
+        self.filepath = kwargs.get("filepath") or "/tmp/product_catalog_search.sqlite"
+        self.commit_every = kwargs.get("commit_every") or 500
+        self.pending = 0
+        self.lock = Lock()
+        directory = os.path.dirname(self.filepath)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        self.connection = sqlite3.connect(self.filepath, check_same_thread=False)
+        self.connection.row_factory = sqlite3.Row
+        self.create_schema()
+
+    def create_schema(self):
+        """
+        Create the tables of the index, if they do not exist
+
+        Returns:
+            None
+
+        """
+        with self.lock:
+            self.connection.execute("PRAGMA journal_mode=WAL")
+            self.connection.executescript(
+                """
+                CREATE TABLE IF NOT EXISTS documents (
+                    id INTEGER PRIMARY KEY,
+                    mpn TEXT NOT NULL,
+                    provider TEXT NOT NULL,
+                    name TEXT,
+                    updated TEXT,
+                    UNIQUE (mpn, provider)
+                );
+                CREATE TABLE IF NOT EXISTS categories (
+                    document_id INTEGER NOT NULL,
+                    name TEXT NOT NULL
+                );
+                CREATE INDEX IF NOT EXISTS categories_name ON categories (name, document_id);
+                CREATE INDEX IF NOT EXISTS categories_document ON categories (document_id);
+                CREATE TABLE IF NOT EXISTS attributes (
+                    document_id INTEGER NOT NULL,
+                    label TEXT NOT NULL,
+                    value TEXT
+                );
+                CREATE INDEX IF NOT EXISTS attributes_label ON attributes (label, value, document_id);
+                CREATE INDEX IF NOT EXISTS attributes_document ON attributes (document_id);
+                CREATE VIRTUAL TABLE IF NOT EXISTS documents_text USING fts5 (name, description, attributes);
+                """
+            )
+            self.connection.commit()
+
+    @staticmethod
+    def document(product, metadata):
+        """
+        Get the document of a product record, before its attributes are compacted and its descriptions are packed
+
+        Arguments:
+            product {dict} -- The product values
+            metadata {dict} -- The metadata of the provider run
+
+        Returns:
+            {dict} -- The document, with the MPN, provider, name, descriptions, categories and attributes
+
+        """
+        descriptions = []
+        name = None
+        for description in product.get("Descriptions") or []:
+            for key, value in description.items():
+                if key in ("Metadata", "Provider") or not isinstance(value, str) or not value:
+                    continue
+                if name is None and key in ("1", "ProductName", "Name"):
+                    name = value
+                descriptions.append(value)
+        attributes = [
+            (attribute.get("Label"), str(value.get("Value")))
+            for attribute in product.get("Attributes") or []
+            for value in attribute.get("Values") or []
+            if attribute.get("Label") and value.get("Value") is not None
+        ]
+        return {
+            "MPN": product.get("MPN"),
+            "Provider": metadata.get("name"),
+            "Name": name,
+            "Description": "\n".join(descriptions),
+            "Categories": [category.get("Name") for category in product.get("Categories") or [] if category.get("Name")],
+            "Attributes": attributes,
+            "Updated": metadata.get("datetime"),
+        }
+
+    def add(self, document):
+        """
+        Index a document, replacing the previous one of its MPN and provider
+
+        Arguments:
+            document {dict} -- The document, as returned by `document`
+
+        Returns:
+            None
+
+        """
+        if not document.get("MPN"):
+            return
+        with self.lock:
+            cursor = self.connection.cursor()
+            cursor.execute(
+                "INSERT INTO documents (mpn, provider, name, updated) VALUES (?, ?, ?, ?) "
+                "ON CONFLICT (mpn, provider) DO UPDATE SET name = excluded.name, updated = excluded.updated",
+                (document.get("MPN"), document.get("Provider") or "", document.get("Name"), document.get("Updated")),
+            )
+            document_id = cursor.execute(
+                "SELECT id FROM documents WHERE mpn = ? AND provider = ?",
+                (document.get("MPN"), document.get("Provider") or ""),
+            ).fetchone()[0]
+            cursor.execute("DELETE FROM documents_text WHERE rowid = ?", (document_id,))
+            cursor.execute("DELETE FROM categories WHERE document_id = ?", (document_id,))
+            cursor.execute("DELETE FROM attributes WHERE document_id = ?", (document_id,))
+            cursor.execute(
+                "INSERT INTO documents_text (rowid, name, description, attributes) VALUES (?, ?, ?, ?)",
+                (
+                    document_id,
+                    document.get("Name") or "",
+                    document.get("Description") or "",
+                    "\n".join("%s: %s" % (label, value) for label, value in document.get("Attributes")),
+                ),
+            )
+            cursor.executemany(
+                "INSERT INTO categories (document_id, name) VALUES (?, ?)",
+                [(document_id, category) for category in document.get("Categories")],
+            )
+            cursor.executemany(
+                "INSERT INTO attributes (document_id, label, value) VALUES (?, ?, ?)",
+                [(document_id, label, value) for label, value in document.get("Attributes")],
+            )
+            self.pending += 1
+            if self.pending >= self.commit_every:
+                self.connection.commit()
+                self.pending = 0
+
+    def commit(self):
+        """
+        Commit the indexed documents
+
+        Returns:
+            None
+
+        """
+        with self.lock:
+            self.connection.commit()
+            self.pending = 0
+
+    @staticmethod
+    def match_query(text):
+        """
+        Get the FTS5 query of a text, each term quoted as an FTS5 string so its punctuation, like the quote of 12", is
+        searched instead of being parsed as query syntax, keeping the AND, OR and NOT operators and the prefix stars
+
+        Arguments:
+            text {str} -- The text of the query
+
+        Returns:
+            {str} -- The FTS5 query
+
+        """
+        terms = []
+        for term in text.split():
+            if term in ("AND", "OR", "NOT"):
+                terms.append(term)
+                continue
+            prefix = len(term) > 1 and term.endswith("*")
+            if prefix:
+                term = term[:-1]
+            terms.append('"%s"%s' % (term.replace('"', '""'), "*" if prefix else ""))
+        return " ".join(terms)
+
+    def search(self, text=None, category=None, providers=None, attribute=None, limit=20):
+        """
+        Find documents by full-text query, category, providers and attribute value
+
+        Arguments:
+            text {str} -- A query over the names, descriptions and attributes, like "laptop AND 16GB", its terms quoted
+                by `match_query`
+            category {str} -- The category name
+            providers {list} -- The provider names
+            attribute {tuple} -- The attribute label and value
+            limit {int} -- The maximum number of documents
+
+        Returns:
+            {list} -- The documents found, by relevance if there is a text query, with the MPN, provider, name,
+                categories and a snippet of the matched text
+
+        """
+        query = "SELECT documents.id, documents.mpn, documents.provider, documents.name, documents.updated"
+        conditions = []
+        parameters = []
+        if text:
+            query += (
+                ", snippet(documents_text, -1, '[', ']', '...', 12) AS snippet "
+                "FROM documents_text JOIN documents ON documents.id = documents_text.rowid"
+            )
+            conditions.append("documents_text MATCH ?")
+            parameters.append(self.match_query(text))
+        else:
+            query += ", NULL AS snippet FROM documents"
+        if category:
+            conditions.append("documents.id IN (SELECT document_id FROM categories WHERE name = ?)")
+            parameters.append(category)
+        if providers:
+            conditions.append("documents.provider IN (%s)" % ", ".join("?" * len(providers)))
+            parameters.extend(providers)
+        if attribute:
+            conditions.append("documents.id IN (SELECT document_id FROM attributes WHERE label = ? AND value = ?)")
+            parameters.extend(attribute)
+        if conditions:
+            query += " WHERE " + " AND ".join(conditions)
+        query += " ORDER BY %s LIMIT ?" % ("documents_text.rank" if text else "documents.mpn")
+        parameters.append(limit)
+        with self.lock:
+            rows = self.connection.execute(query, parameters).fetchall()
+            categories = {}
+            for row in rows:
+                categories[row["id"]] = [
+                    category[0]
+                    for category in self.connection.execute(
+                        "SELECT name FROM categories WHERE document_id = ?", (row["id"],)
+                    )
+                ]
+        return [
+            {
+                "MPN": row["mpn"],
+                "Provider": row["provider"],
+                "Name": row["name"],
+                "Categories": categories.get(row["id"]),
+                "Snippet": row["snippet"],
+                "Updated": row["updated"],
+            }
+            for row in rows
+        ]
+
+    def close(self):
+        """
+        Commit and close the index
+
+        Returns:
+            None
+
+        """
+        self.commit()
+        with self.lock:
+            self.connection.close()
@@ -0,0 +1,206 @@
+from concurrent.futures import ThreadPoolExecutor
+from botocore.exceptions import ClientError
+
+
+def product_providers(item):
+    """
+    Get the providers of a product: the providers stamping it in its "Runs" map, and the providers of its categories
+    and descriptions, which every provider writes whether it stamps its runs or not
+
+    Arguments:
+        item {dict} -- The product item, with its runs, categories and descriptions in the list or the map layout
+
+    Returns:
+        providers {set} -- The provider names
+
+    """
+    providers = set(item.get("Runs") or {})
+    for field in ("Categories", "Descriptions"):
+        entries = item.get(field) or []
+        for entry in entries.values() if isinstance(entries, dict) else entries:
+            name = (entry.get("Metadata") or {}).get("name") if isinstance(entry, dict) else None
+            if name:
+                providers.add(name)
+    return providers
+
+
+class StaleSweep:
+    """
+    A class used to represent the sweep of the products a provider stopped sending
+    ...
+
+    Every product written by a run with the stale sweep enabled holds the run ID under the provider name in its "Runs"
+    map. Run IDs start with the run time, so a product stamped by the provider with an older run ID than a complete run
+    was not in that run. The table is read with a parallel scan projected to the MPNs and stamps, the stale products are
+    collected, and the sweep only acts if the run is found on some products and the stale share is under
+    `max_stale_ratio`, so a wrong run ID or a partial run does not sweep the whole provider.
+
+    A stale product of another provider, stamped by it or holding its categories or descriptions, only loses the stamp
+    of the provider. A product left without other providers is flagged with "StaleSince", cleared when the product is imported again, or deleted in batches of 25.
+    The stamp removals and flags are conditioned on the stamp not having changed since the scan; the batch deletes are
+    not, so the sweep must not run during an import of the provider.
+
+    Attributes:
+        db_table {object} -- The product's db table
+        provider {str} -- The provider name
+        run_id {str} -- The ID of a complete run of the provider
+        action {str} -- "flag" or "delete" for the products without other providers
+        segments {int} -- The number of parallel scan segments
+        max_stale_ratio {float} -- The maximum share of stale products of the provider for the sweep to act
+        dry_run {Bool} -- Whether the products are only counted
+        capacity_controller {object} -- The adaptive write rate shared with the imports, if enabled
+
+    Methods:
+        scan_segment(segment) -- Collect the stale products of a scan segment
+        write(operation, **kwargs) -- Run a conditional write within the shared write rate
+        sweep_segment(stale) -- Unstamp, flag or delete stale products
+        execute() -- Sweep the stale products of the provider
+
+    """
+    def __init__(self, **kwargs) -> None:
+        """
+        Parameters:
+            db_table {object} -- The product's db table
+            provider {str} -- The provider name
+            run_id {str} -- The ID of a complete run of the provider
+            action {str} -- "flag" or "delete" for the products without other providers
+            segments {int} -- The number of parallel scan segments
+            max_stale_ratio {float} -- The maximum share of stale products of the provider for the sweep to act
+            dry_run {Bool} -- Whether the products are only counted
+            capacity_controller {object} -- The adaptive write rate shared with the imports, if enabled
+
+        """
+        self.db_table = kwargs.get("db_table")
+        self.provider = kwargs.get("provider")
+        self.run_id = kwargs.get("run_id")
+        self.action = kwargs.get("action") or "flag"
+        self.segments = kwargs.get("segments") or 4
+        self.max_stale_ratio = kwargs.get("max_stale_ratio") or 0.5
+        self.dry_run = kwargs.get("dry_run", False)
+        self.capacity_controller = kwargs.get("capacity_controller")
+        if self.action not in ("flag", "delete"):
+            raise ValueError("The sweep action must be flag or delete, not %s" % self.action)
+
+    def scan_segment(self, segment):
+        """
+        Collect the stale products of a scan segment, among the products stamped by the provider
+
+        Arguments:
+            segment {int} -- The scan segment number
+
+        Returns:
+            {tuple} -- The number of fresh products, and the MPN, stamp, other providers and flag of each stale product
+
+        """
+        fresh = 0
+        stale = []
+        scan_kwargs = {
+            "ProjectionExpression": "MPN, Runs, StaleSince, Categories, Descriptions",
+            "FilterExpression": "attribute_exists(Runs.#provider)",
+            "ExpressionAttributeNames": {"#provider": self.provider},
+            "Segment": segment,
+            "TotalSegments": self.segments,
+        }
+        while True:
+            response = self.db_table.scan(**scan_kwargs)
+            for item in response.get("Items", []):
+                runs = item.get("Runs")
+                if runs.get(self.provider) >= self.run_id:
+                    fresh += 1
+                else:
+                    shared = bool(product_providers(item) - {self.provider})
+                    stale.append((item.get("MPN"), runs.get(self.provider), shared, "StaleSince" in item))
+            if not response.get("LastEvaluatedKey"):
+                return fresh, stale
+            scan_kwargs["ExclusiveStartKey"] = response.get("LastEvaluatedKey")
+
+    def write(self, operation, **kwargs):
+        """
+        Run a conditional write within the write rate shared with the imports, if it is enabled
+
+        Arguments:
+            operation {function} -- The table write method
+            **kwargs: Keyword arguments of the write
+
+        Returns:
+            {Bool} -- False if the condition failed because the product changed since the scan
+
+        """
+        try:
+            if self.capacity_controller is not None:
+                self.capacity_controller.execute("sweep", operation, **kwargs)
+            else:
+                operation(**kwargs)
+        except ClientError as error:
+            if error.response.get("Error", {}).get("Code") != "ConditionalCheckFailedException":
+                raise
+            return False
+        return True
+
+    def sweep_segment(self, stale):
+        """
+        Remove the stamp of the provider from the stale products of other providers, and flag or delete the others
+
+        Arguments:
+            stale {list} -- The MPN, stamp, other providers and flag of each stale product
+
+        Returns:
+            counts {dict} -- The unstamped, flagged and deleted products
+
+        """
+        counts = {"unstamped": 0, "flagged": 0, "deleted": 0}
+        deleted = []
+        for mpn, stamp, shared, flagged in stale:
+            condition = {
+                "ConditionExpression": "Runs.#provider = :stamp",
+                "ExpressionAttributeNames": {"#provider": self.provider},
+                "ExpressionAttributeValues": {":stamp": stamp},
+            }
+            if shared:
+                if self.write(self.db_table.update_item, Key={"MPN": mpn}, UpdateExpression="REMOVE Runs.#provider", **condition):
+                    counts["unstamped"] += 1
+            elif self.action == "flag" and flagged:
+                continue  # Flagged by a previous sweep
+            elif self.action == "flag":
+                condition["ExpressionAttributeValues"][":run_id"] = self.run_id
+                if self.write(self.db_table.update_item, Key={"MPN": mpn}, UpdateExpression="SET StaleSince = :run_id", **condition):
+                    counts["flagged"] += 1
+            else:
+                deleted.append(mpn)
+        with self.db_table.batch_writer() as batch:
+            for mpn in deleted:
+                batch.delete_item(Key={"MPN": mpn})
+                counts["deleted"] += 1
+        return counts
+
+    def execute(self):
+        """
+        Sweep the stale products of the provider with a parallel scan
+
+        Returns:
+            report {dict} -- The fresh and stale products, and the unstamped, flagged and deleted products
+
+        """
+        with ThreadPoolExecutor(max_workers=self.segments) as executor:
+            segments_results = list(executor.map(self.scan_segment, range(self.segments)))
+        report = {
+            "provider": self.provider,
+            "run_id": self.run_id,
+            "fresh": sum(fresh for fresh, _ in segments_results),
+            "stale": sum(len(stale) for _, stale in segments_results),
+            "unstamped": 0,
+            "flagged": 0,
+            "deleted": 0,
+        }
+        if report["stale"] and not report["fresh"]:
+            raise ValueError("No product of %s is stamped with the run %s" % (self.provider, self.run_id))
+        if report["stale"] > self.max_stale_ratio * (report["fresh"] + report["stale"]):
+            raise ValueError("%s stale products of %s out of %s, over the maximum stale ratio of %s" % (
+                report["stale"], self.provider, report["fresh"] + report["stale"], self.max_stale_ratio))
+        if not self.dry_run:
+            with ThreadPoolExecutor(max_workers=self.segments) as executor:
+                for counts in executor.map(self.sweep_segment, [stale for _, stale in segments_results]):
+                    for key, count in counts.items():
+                        report[key] += count
+        print("Stale Products To Sweep: " if self.dry_run else "Stale Products Swept: ", report)
+        return report
@@ -0,0 +1,326 @@
+import mmap
+import os
+import re
+import struct
+from array import array
+from xml.sax.saxutils import unescape
+import xmltodict
+
+
+class XmlOffsetIndex:
+    """
+    A class used to represent a sidecar index of the byte offsets of the records of an XML feed
+    ...
+
+    The index is built in one pass over a memory map of the uncompressed feed, matching the start and end tags of the
+    `item_name` elements while skipping comments and CDATA sections, and records the byte range and the MPN of every
+    record. It is stored in a compact binary sidecar file next to the feed, with the size and modification time of the
+    feed, and rebuilt when the feed changes. Any range of records is then parsed directly from the memory map, so a feed
+    can be split between workers or resumed at a record without reading what comes before it. The namespace
+    declarations of the document root are lost by a record parsed on its own, so a record of a feed declaring
+    namespaces on its root is parsed inside an element with the name and the declarations of the root.
+
+    Attributes:
+        filepath {string} -- The filepath of the XML feed
+        index_filepath {string} -- The filepath of the sidecar index
+        item_name {string} -- The XML element indexed as a record
+        mpn_element {string} -- The child element holding the MPN of a record
+        starts {object} -- The byte offset of each record
+        ends {object} -- The byte offset following each record
+        mpns {list} -- The MPN of each record, or an empty string if it has none
+        encoding {string} -- The encoding declared by the feed, if any
+        root_name {bytes} -- The name of the root element of the feed
+        namespaces {bytes} -- The namespace declarations of the root element, as attributes, if any
+
+    Methods:
+        stat() -- Get the size and modification time of the feed
+        load() -- Load the sidecar index if it matches the feed
+        build() -- Index the records of the feed and store the sidecar index
+        map() -- Get the memory map of the feed
+        open() -- Load or build the index
+        mpn(data) -- Get the MPN of a record
+        split(parts) -- Split the records in ranges of about the same size
+        position(mpn) -- Get the position of the record of an MPN
+        record(data, projection) -- Parse a record
+        records(start, stop, projection) -- Yield the records of a range
+        close() -- Close the memory map of the feed
+
+    """
+    MAGIC = b"XMLOFIX1"
+    HEADER = struct.Struct("<8sQqQ")
+
+    def __init__(self, **kwargs) -> None:
+        """
+        Parameters:
+            filepath {string} -- The filepath of the uncompressed XML feed
+            index_filepath {string} -- The filepath of the sidecar index, the feed filepath with ".idx" if not set
+            item_name {string} -- The XML element indexed as a record
+            mpn_element {string} -- The child element holding the MPN of a record
+
+        """
+        self.filepath = kwargs.get("filepath")
+        self.index_filepath = kwargs.get("index_filepath") or self.filepath + ".idx"
+        self.item_name = kwargs.get("item_name") or "Product"
+        self.mpn_element = kwargs.get("mpn_element") or "MPN"
+        self.starts = array("Q")
+        self.ends = array("Q")
+        self.mpns = []
+        self.positions = None
+        self.encoding = None
+        self.root_name = None
+        self.namespaces = b""
+        self.file = None
+        self.memory_map = None
+        name = re.escape(self.item_name.encode("utf-8"))
+        self.tags = re.compile(
+            rb"<!--.*?-->|<!\[CDATA\[.*?\]\]>|<(/?)" + name + rb"(?=[\s/>])[^>]*?(/?)>",
+            re.DOTALL,
+        )
+        self.root_pattern = re.compile(
+            rb"<!--.*?-->|<\?.*?\?>|<!DOCTYPE(?:[^\[>]|\[.*?\])*>|<([^\s/>!?]+)((?:[^>\"']|\"[^\"]*\"|'[^']*')*)>",
+            re.DOTALL,
+        )
+        mpn = re.escape(self.mpn_element.encode("utf-8"))
+        self.mpn_pattern = re.compile(
+            rb"<" + mpn + rb"(?:\s[^>]*)?>\s*(?:<!\[CDATA\[(.*?)\]\]>|([^<]*))\s*</" + mpn + rb">",
+            re.DOTALL,
+        )
+
+    def stat(self):
+        """
+        Get the size and modification time of the feed, which the sidecar index must match
+
+        Returns:
+            {tuple} -- The size in bytes and the modification time in nanoseconds
+
+        """
+        stat = os.stat(self.filepath)
+        return stat.st_size, stat.st_mtime_ns
+
+    def load(self):
+        """
+        Load the sidecar index if it was built from the current feed
+
+        Returns:
+            {Bool} -- True if the index was loaded, False if it is missing or outdated
+
+        """
+        if not os.path.isfile(self.index_filepath):
+            return False
+        with open(self.index_filepath, "rb") as file:
+            magic, size, mtime, count = self.HEADER.unpack(file.read(self.HEADER.size))
+            if magic != self.MAGIC or (size, mtime) != self.stat():
+                return False
+            self.starts = array("Q")
+            self.starts.fromfile(file, count)
+            self.ends = array("Q")
+            self.ends.fromfile(file, count)
+            mpns = file.read().decode("utf-8")
+        self.mpns = mpns.split("\n") if count else []
+        self.positions = None
+        return True
+
+    def build(self):
+        """
+        Index the records of the feed in one pass and store the sidecar index, replacing it atomically
+
+        Returns:
+            None
+
+        """
+        size, mtime = self.stat()
+        data = self.map()
+        self.starts = array("Q")
+        self.ends = array("Q")
+        self.mpns = []
+        self.positions = None
+        depth = 0
+        for match in self.tags.finditer(data):
+            if match.group(1) is None:
+                continue  # A comment or a CDATA section
+            if match.group(1):
+                depth -= 1
+                if depth == 0:
+                    self.ends.append(match.end())
+                    self.mpns.append(self.mpn(data[self.starts[-1]:match.end()]))
+            elif match.group(2):
+                if depth == 0:
+                    self.starts.append(match.start())
+                    self.ends.append(match.end())
+                    self.mpns.append("")
+            else:
+                if depth == 0:
+                    self.starts.append(match.start())
+                depth += 1
+        if depth:
+            raise ValueError("The XML file %s ended inside a %s element" % (self.filepath, self.item_name))
+        temporary_filepath = "%s.%s.tmp" % (self.index_filepath, os.getpid())
+        with open(temporary_filepath, "wb") as file:
+            file.write(self.HEADER.pack(self.MAGIC, size, mtime, len(self.starts)))
+            self.starts.tofile(file)
+            self.ends.tofile(file)
+            file.write("\n".join(self.mpns).encode("utf-8"))
+        os.replace(temporary_filepath, self.index_filepath)
+        print("XML Records Indexed: ", len(self.starts), self.index_filepath)
+
+    def map(self):
+        """
+        Get the memory map of the feed, opening it on first use, with the encoding declared by the feed and the name
+        and namespace declarations of its root element
+
+        Returns:
+            {object} -- The read-only memory map
+
+        """
+        if self.memory_map is None:
+            self.file = open(self.filepath, "rb")
+            self.memory_map = mmap.mmap(self.file.fileno(), 0, access=mmap.ACCESS_READ)
+            declaration = re.match(rb"\s*<\?xml[^>]*encoding=[\"']([\w.:-]+)[\"']", self.memory_map[:256])
+            self.encoding = declaration.group(1).decode("ascii") if declaration else None
+            for match in self.root_pattern.finditer(self.memory_map):
+                if match.group(1) is not None:
+                    self.root_name = match.group(1)
+                    self.namespaces = b"".join(
+                        b" " + namespace.group(0)
+                        for namespace in re.finditer(rb"xmlns(?::[^\s=]+)?\s*=\s*(?:\"[^\"]*\"|'[^']*')", match.group(2))
+                    )
+                    break
+        return self.memory_map
+
+    def open(self):
+        """
+        Load the sidecar index, or build it if it is missing or outdated
+
+        Returns:
+            {object} -- The index itself
+
+        """
+        if not self.load():
+            self.build()
+        self.map()
+        return self
+
+    def mpn(self, data):
+        """
+        Get the MPN of a record, the text of its first `mpn_element` element
+
+        Arguments:
+            data {bytes} -- The XML of the record
+
+        Returns:
+            {str} -- The MPN, or an empty string if the record has none
+
+        """
+        match = self.mpn_pattern.search(data)
+        if match is None:
+            return ""
+        if match.group(1) is not None:
+            return match.group(1).decode("utf-8").strip()
+        return unescape(match.group(2).decode("utf-8").strip(), {"&quot;": '"', "&apos;": "'"})
+
+    def __len__(self):
+        return len(self.starts)
+
+    def split(self, parts):
+        """
+        Split the records in contiguous ranges of about the same number of bytes, one per worker
+
+        Arguments:
+            parts {int} -- The number of ranges
+
+        Returns:
+            ranges {list} -- The start and stop positions of each range, without empty ranges
+
+        """
+        if not self.starts:
+            return []
+        first = self.starts[0]
+        total = self.ends[-1] - first
+        ranges = []
+        start = 0
+        for part in range(1, parts + 1):
+            boundary = first + total * part // parts
+            stop = start
+            while stop < len(self.starts) and (self.ends[stop] <= boundary or part == parts):
+                stop += 1
+            if stop > start:
+                ranges.append((start, stop))
+                start = stop
+        return ranges
+
+    def position(self, mpn):
+        """
+        Get the position of the record of an MPN
+
+        Arguments:
+            mpn {str} -- The MPN
+
+        Returns:
+            {int} -- The position of the first record of the MPN, or None if it is not in the feed
+
+        """
+        if self.positions is None:
+            self.positions = {}
+            for position, record_mpn in enumerate(self.mpns):
+                self.positions.setdefault(record_mpn, position)
+        return self.positions.get(mpn)
+
+    def record(self, data, projection=None):
+        """
+        Parse a record, with its attributes prefixed with "@" like the records streamed by the file manager, inside
+        the namespace declarations of the root element of the feed
+
+        Arguments:
+            data {bytes} -- The XML of the record
+            projection {list} -- The element paths to build, relative to the record
+
+        Returns:
+            {dict} -- The record
+
+        """
+        path = (self.item_name,)
+        if self.namespaces:
+            data = b"<%s%s>%s</%s>" % (self.root_name, self.namespaces, data, self.root_name)
+            path = (self.root_name.decode(self.encoding or "utf-8"),) + path
+        if self.encoding:
+            data = b'<?xml version="1.0" encoding="%s"?>' % self.encoding.encode("ascii") + data
+        if projection is not None:
+            projection = [
+                path + (tuple(element.strip("/").split("/")) if isinstance(element, str) else tuple(element))
+                for element in projection
+            ]
+        record = xmltodict.parse(data, projection=projection)
+        for name in path:
+            record = record.get(name)
+        return record
+
+    def records(self, start=0, stop=None, projection=None):
+        """
+        Yield the records of a range, parsed from the memory map of the feed
+
+        Arguments:
+            start {int} -- The position of the first record
+            stop {int} -- The position following the last record, the end of the feed if not set
+            projection {list} -- The element paths to build, relative to the records
+
+        Returns:
+            {generator} -- The records of the range
+
+        """
+        data = self.map()
+        for position in range(start, len(self.starts) if stop is None else min(stop, len(self.starts))):
+            yield self.record(data[self.starts[position]:self.ends[position]], projection)
+
+    def close(self):
+        """
+        Close the memory map of the feed
+
+        Returns:
+            None
+
+        """
+        if self.memory_map is not None:
+            self.memory_map.close()
+            self.file.close()
+            self.memory_map = None
+            self.file = None
@@ -1,9 +1,7 @@
 from catalog_import.data import providers
 from catalog_import.models import main as main_model
-from threading import Thread
-import boto3
+from catalog_import.models.runner import get_components, get_dynamodb, get_profiler, get_settings, run_providers
 import time
-import datetime
 
 
 def main(**kwargs):
@@ -20,23 +18,32 @@ def main(**kwargs):
     main = main_model.Main(**kwargs)
     main.execute()
 
-def get_metadata(provider_values):
+def replay_main(**kwargs):
     """
-    Retrieves metadata from a provider_values dictionary and constructs a metadata dictionary.
+    Replays the quarantined products and requests of a provider with the main model.
 
     Arguments:
-        provider_values {dict} -- A dictionary containing provider values.
+        **kwargs {dict} -- Keyword arguments to be passed to the main model.
 
     Returns:
-        metadata {dict} -- A dictionary containing the retrieved metadata.
+        None
     """
-    locations = provider_values.get("locations")
-    metadata = {
-        "name": provider_values.get("name"),
-        "datetime": datetime.datetime.now().strftime("%m-%d-%Y, %H:%M:%S"),
-        "i18n": {location.get("location_tag"): location.get("location_label") for location in locations},
-    }
-    return metadata
+    main = main_model.Main(**kwargs)
+    main.replay()
+
+def get_run_components(run_settings):
+    """
+    Creates the components shared by the provider threads from the settings of the run.
+
+    Arguments:
+        run_settings {dict} -- The settings of the run.
+
+    Returns:
+        {dict} -- The shared components.
+    """
+    dynamodb = get_dynamodb(run_settings["dynamodb"])
+    db_table = dynamodb.Table('product_catalog')
+    return get_components(dynamodb, db_table, run_settings)
 
 def execute(event, context):
     """
@@ -49,21 +56,25 @@ def execute(event, context):
     Returns:
         None
     """
-    threads = []
-    providers_dict = providers.providers
-    dynamodb = boto3.resource('dynamodb')
-    db_table = dynamodb.Table('product_catalog')
-    for provider_name, provider_values in providers_dict.items():
-        metadata = get_metadata(provider_values)
-        provider = {
-            "provider_name": provider_name,
-            "provider_values": provider_values,
-            "db_table": db_table,
-            "metadata": metadata,
-        }
-        x = Thread(target=main, kwargs=provider)
-        threads.append(x)
-        x.start()
-
-    for thread in threads:
-        thread.join()
+    run_settings = get_settings(event)
+    run_providers(main, providers.providers, get_run_components(run_settings), get_profiler(run_settings["profiling"]))
+
+def replay(event, context):
+    """
+    Replays the quarantined products and requests of every provider, or of the providers listed in the event.
+
+    Arguments:
+        event {dict} -- The event dict passed to the function, optionally with a "providers" list.
+        context {object} -- The context object passed to the function.
+
+    Returns:
+        None
+    """
+    providers_names = (event or {}).get("providers")
+    providers_dict = {
+        provider_name: provider_values
+        for provider_name, provider_values in providers.providers.items()
+        if not providers_names or provider_name in providers_names
+    }
+    run_settings = get_settings(event)
+    run_providers(replay_main, providers_dict, get_run_components(run_settings), get_profiler(run_settings["profiling"]))
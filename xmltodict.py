@@ -55,7 +55,8 @@ class _DictSAXHandler(object):
                  namespace_separator=':',
                  namespaces=None,
                  force_list=None,
-                 comment_key='#comment'):
+                 comment_key='#comment',
+                 projection=None):
         self.path = []
         self.stack = []
         self.data = []
@@ -75,6 +76,21 @@ class _DictSAXHandler(object):
         self.namespace_declarations = dict_constructor()
         self.force_list = force_list
         self.comment_key = comment_key
+        self.projection = None
+        self.projection_prefixes = None
+        self.projection_inside = 0
+        self.projection_paths = []
+        self.skipping = 0
+        if projection is not None:
+            self.projection = set()
+            self.projection_prefixes = set()
+            for projection_path in projection:
+                if isinstance(projection_path, _basestring):
+                    projection_path = projection_path.strip('/').split('/')
+                projection_path = tuple(projection_path)
+                self.projection.add(projection_path)
+                for i in range(1, len(projection_path)):
+                    self.projection_prefixes.add(projection_path[:i])
 
     def _build_name(self, full_name):
         if self.namespaces is None:
@@ -100,8 +116,26 @@ class _DictSAXHandler(object):
     def startNamespaceDecl(self, prefix, uri):
         self.namespace_declarations[prefix or ''] = uri
 
+    def _skip_element(self, name):
+        if self.projection_inside or len(self.path) < self.item_depth:
+            self.projection_paths.append(())
+            return False
+        relative = self.projection_paths[-1] + (name,) if self.projection_paths else (name,)
+        if relative in self.projection:
+            self.projection_inside = len(self.path) + 1
+        elif relative not in self.projection_prefixes:
+            return True
+        self.projection_paths.append(relative)
+        return False
+
     def startElement(self, full_name, attrs):
+        if self.skipping:
+            self.skipping += 1
+            return
         name = self._build_name(full_name)
+        if self.projection is not None and self._skip_element(name):
+            self.skipping = 1
+            return
         attrs = self._attrs_to_dict(attrs)
         if attrs and self.namespace_declarations:
             attrs['xmlns'] = self.namespace_declarations
@@ -126,6 +160,13 @@ class _DictSAXHandler(object):
             self.data = []
 
     def endElement(self, full_name):
+        if self.skipping:
+            self.skipping -= 1
+            return
+        if self.projection is not None:
+            self.projection_paths.pop()
+            if self.projection_inside == len(self.path):
+                self.projection_inside = 0
         name = self._build_name(full_name)
         if len(self.path) == self.item_depth:
             item = self.item
@@ -157,12 +198,16 @@ class _DictSAXHandler(object):
         self.path.pop()
 
     def characters(self, data):
+        if self.skipping:
+            return
         if not self.data:
             self.data = [data]
         else:
             self.data.append(data)
 
     def comments(self, data):
+        if self.skipping:
+            return
         if self.strip_whitespace:
             data = data.strip()
         self.item = self.push_data(self.item, self.comment_key, data)
@@ -304,6 +349,17 @@ def parse(xml_input, encoding=None, expat=expat, process_namespaces=False,
         a list should be forced is more complex.
 
 
+        If `projection` is given, only the listed element paths are built and
+        every other subtree is skipped without buffering its character data.
+        The paths are sequences of element names, or strings separated by `/`,
+        starting below the `item_depth` level (from the root element when
+        `item_depth` is `0`). The ancestors of a listed path are kept, with
+        their attributes and text, and so is everything below a listed path.
+
+            >>> xmltodict.parse('<a><b>1</b><c><d>2</d><e>3</e></c></a>',
+            ...                 projection=['a/c/d'])
+            {'a': {'c': {'d': '2'}}}
+
         If `process_comment` is `True` then comment will be added with comment_key
         (default=`'#comment'`) to then tag which contains comment
 